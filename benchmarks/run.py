@@ -0,0 +1,194 @@
+"""
+Benchmarks of the factors and of `load_prices` over synthetic hourly OHLCV at several scales.
+
+    python benchmarks/run.py --scale small
+    python benchmarks/run.py --rows 1000000 --symbols 1 100 --cases returns momenta
+    python benchmarks/run.py --scale small --compare benchmarks/results/<baseline>.json
+
+Every case is timed over `--repeat` runs (the fastest is kept) and its peak memory is measured in a separate run
+with `tracemalloc`, so the tracing does not distort the timings. The results are saved as JSON in
+`benchmarks/results/` to be compared with later runs.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tempfile
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from synthetic import synthetic_ohlcv
+from synthetic import write_csv
+from xtrader.dataloaders.ohlc import load_prices
+from xtrader.dataloaders.ohlc import load_prices_chunked
+from xtrader.factors.cache import RETURNS_CACHE
+from xtrader.factors.momenta import Momenta
+from xtrader.factors.returns import Returns
+from xtrader.factors.seasonal import Seasonal
+from xtrader.factors.technical import Technical
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# (rows, symbols) pairs of every scale
+SCALES = {'small': [(100_000, 1), (1_000_000, 100)],
+          'medium': [(1_000_000, 1), (10_000_000, 1_000)],
+          'large': [(50_000_000, 1), (50_000_000, 5_000)]}
+
+# Loader cases, applied to the csv file of one symbol
+LOADERS: Dict[str, Callable[[str], Any]] = {
+    'load_prices': lambda path: dict(load_prices(path)),
+    'load_prices_daily': lambda path: load_prices(path)['daily'],
+    'load_prices_chunked': lambda path: load_prices_chunked(path, chunksize=100_000),
+}
+
+# Factor cases, applied to every symbol of the panel in turn
+CASES: Dict[str, Callable[[pd.DataFrame], Any]] = {
+    'returns': lambda prices: Returns.returns(prices, [1, 2, 3, 6, 12], 'h', return_full=False),
+    'lagged_returns': lambda prices: Returns.lagged_returns(prices, [1, 2, 3, 6, 12], 'h', return_full=False),
+    'forward_returns': lambda prices: Returns.forward_returns(prices, [1, 2, 3], 'h', return_full=False),
+    'momenta': lambda prices: Momenta.momenta(prices, [2, 3, 6, 12], 'h', return_full=False),
+    'rsi': lambda prices: Technical.rsi(prices, 21, 'h', columns='close', return_full=False),
+    'bbands': lambda prices: Technical.bbands(prices, 21, 2, 2, 'h', columns='close', return_full=False),
+    'time_indicators': lambda prices: Seasonal.time_indicators(prices, return_full=False),
+}
+
+
+def _symbols(prices: pd.DataFrame) -> List[pd.DataFrame]:
+    """ Splits a panel from `synthetic_ohlcv` into the frames of its symbols, whose rows are contiguous. """
+    codes = prices['symbol'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    stops = np.r_[starts[1:], len(codes)]
+    return [prices.iloc[start:stop] for start, stop in zip(starts, stops)]
+
+
+def _measure(function: Callable[[], Any], repeat: int) -> Tuple[float, int]:
+    """ Returns the fastest wall time of `repeat` runs and the peak traced memory of one more run. """
+    seconds = []
+    for _ in range(repeat):
+        RETURNS_CACHE.clear()
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+
+    RETURNS_CACHE.clear()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(seconds), peak
+
+
+def _metadata() -> Dict[str, Any]:
+    """ Describes the environment of a run, so that results from different machines are not mixed up. """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(RESULTS_DIR)).stdout.strip()
+    except OSError:
+        commit = ''
+    return {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': commit, 'python': platform.python_version(),
+            'numpy': np.__version__, 'pandas': pd.__version__, 'machine': platform.machine(),
+            'processor': platform.processor(), 'cpus': os.cpu_count()}
+
+
+def run(scales: List[Tuple[int, int]], cases: List[str], repeat: int = 3, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Runs the benchmark cases at every scale and returns one record per case and scale.
+
+    :param scales: List of (rows, symbols) pairs.
+    :param cases: Names of the cases, from `CASES` and `LOADERS`.
+    :param repeat: Number of timed runs of every case.
+    :param seed: Seed of the synthetic bars.
+    """
+    results = []
+    for n_rows, n_symbols in scales:
+        prices = synthetic_ohlcv(n_rows, n_symbols, seed=seed)
+        frames = _symbols(prices)
+        for case in cases:
+            record = {'case': case, 'rows': n_rows, 'symbols': n_symbols, 'seconds': None, 'peak_bytes': None,
+                      'error': None}
+            try:
+                if case in LOADERS:
+                    # One CSV holds the bars of one symbol
+                    with tempfile.TemporaryDirectory() as directory:
+                        path = write_csv(prices, os.path.join(directory, 'prices.csv'))
+                        loader = LOADERS[case]
+                        record['seconds'], record['peak_bytes'] = _measure(lambda: loader(path), repeat)
+                else:
+                    function = CASES[case]
+                    record['seconds'], record['peak_bytes'] = _measure(lambda: [function(frame) for frame in frames],
+                                                                       repeat)
+            except Exception as error:
+                record['error'] = f'{type(error).__name__}: {error}'
+            results.append(record)
+            _print(record)
+        del prices, frames
+    return results
+
+
+def _print(record: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    """ Prints one result, with the ratio of its time and memory to the baseline if there is one. """
+    label = f"{record['case']:<16} {record['rows']:>11,} rows {record['symbols']:>6,} symbols"
+    if record['error']:
+        print(f"{label}  failed: {record['error']}")
+        return
+    line = f"{label}  {record['seconds']:>9.4f} s  {record['peak_bytes'] / 2 ** 20:>10.1f} MiB"
+    if baseline and not baseline.get('error'):
+        line += (f"  x{record['seconds'] / baseline['seconds']:.2f} time"
+                 f"  x{record['peak_bytes'] / max(baseline['peak_bytes'], 1):.2f} memory")
+    print(line)
+
+
+def compare(results: List[Dict[str, Any]], path: str) -> None:
+    """ Prints the results next to those of a saved run with the same cases and scales. """
+    with open(path) as file:
+        saved = json.load(file)
+    baselines = {(record['case'], record['rows'], record['symbols']): record for record in saved['results']}
+    print(f"\nCompared to {path} ({saved['meta'].get('commit') or 'unknown commit'}):")
+    for record in results:
+        _print(record, baselines.get((record['case'], record['rows'], record['symbols'])))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', choices=list(SCALES), default='small', help='preset of (rows, symbols) pairs')
+    parser.add_argument('--rows', type=int, nargs='+', help='total rows, overrides the preset')
+    parser.add_argument('--symbols', type=int, nargs='+', default=[1], help='numbers of symbols, used with --rows')
+    parser.add_argument('--cases', nargs='+', choices=list(CASES) + list(LOADERS),
+                        default=list(CASES) + list(LOADERS), help='cases to run')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per case')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic bars')
+    parser.add_argument('--output', help='path of the results, defaults to benchmarks/results/<time>.json')
+    parser.add_argument('--compare', help='path of saved results to compare with')
+    args = parser.parse_args(argv)
+
+    scales = [(rows, symbols) for rows in args.rows for symbols in args.symbols] if args.rows else SCALES[args.scale]
+    results = run(scales, args.cases, args.repeat, args.seed)
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump({'meta': _metadata(), 'results': results}, file, indent=2)
+    print(f'\nSaved results to {output}')
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
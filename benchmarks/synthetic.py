@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from typing import Optional
+
+
+def synthetic_ohlcv(n_rows: int, n_symbols: int = 1, start: str = '2000-01-03', freq: str = 'h',
+                    seed: int = 0) -> pd.DataFrame:
+    """
+    Generates a deterministic panel of OHLCV bars, with the same seed always giving the same bars. Every symbol
+    gets `n_rows // n_symbols` consecutive bars of a geometric random walk, with the open at the previous close,
+    the high and low outside the open and close and a log-normal volume.
+
+    :param n_rows: Total number of rows over all symbols.
+    :param n_symbols: Number of symbols.
+    :param start: Timestamp of the first bar of every symbol.
+    :param freq: Frequency of the bars.
+    :param seed: Seed of the random generator.
+    """
+    rng = np.random.default_rng(seed)
+    n_bars = max(n_rows // n_symbols, 1)
+    shape = (n_symbols, n_bars)
+
+    # Log prices start around 100 and follow a random walk with symbol specific volatilities
+    volatility = rng.uniform(0.002, 0.02, size=(n_symbols, 1))
+    log_close = np.log(rng.uniform(10, 500, size=(n_symbols, 1))) + np.cumsum(rng.standard_normal(shape) * volatility, axis=1)
+    close = np.exp(log_close)
+    open_ = np.empty(shape)
+    open_[:, 0] = close[:, 0]
+    open_[:, 1:] = close[:, :-1]
+    high = np.maximum(open_, close) * (1 + np.abs(rng.standard_normal(shape)) * volatility)
+    low = np.minimum(open_, close) * (1 - np.abs(rng.standard_normal(shape)) * volatility)
+    volume = np.round(rng.lognormal(10, 1, size=shape))
+
+    symbols = np.array([f'SYM{i:04d}' for i in range(n_symbols)])
+    dates = pd.date_range(start, periods=n_bars, freq=freq)
+    return pd.DataFrame({'open': open_.ravel(), 'high': high.ravel(), 'low': low.ravel(), 'close': close.ravel(),
+                         'volume': volume.ravel(), 'name': np.repeat(symbols, n_bars), 'symbol': np.repeat(symbols, n_bars)},
+                        index=pd.DatetimeIndex(np.tile(dates.values, n_symbols), name='date'))
+
+
+def write_csv(prices: pd.DataFrame, path: str, symbol: Optional[str] = None) -> str:
+    """
+    Writes the bars of one symbol as a CSV file in the layout read by `load_prices`, i.e. with capitalized
+    column names and a `Date` column.
+
+    :param prices: Panel of bars from `synthetic_ohlcv`.
+    :param path: Path of the CSV file.
+    :param symbol: Symbol to write. Defaults to the first symbol.
+    """
+    symbol = symbol or prices['symbol'].iloc[0]
+    bars = prices[prices['symbol'] == symbol]
+    bars.rename(columns=str.capitalize).rename_axis('Date').to_csv(path)
+    return path
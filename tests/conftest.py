@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def make_prices(n_rows: int = 24 * 90, start: str = '2020-12-01', tz: str = None, seed: int = 0) -> pd.DataFrame:
+    """ Hourly OHLCV bars of one symbol in the layout of `load_prices`, with a date index. """
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_rows)))
+    open_ = np.r_[close[0], close[:-1]]
+    index = pd.date_range(start, periods=n_rows, freq='h', tz=tz, name='date')
+    return pd.DataFrame({'open': open_, 'high': np.maximum(open_, close) * 1.001,
+                         'low': np.minimum(open_, close) * 0.999, 'close': close,
+                         'volume': np.round(rng.lognormal(10, 1, n_rows)), 'name': 'Acme', 'symbol': 'ACME'},
+                        index=index)
+
+
+def write_prices_csv(prices: pd.DataFrame, path) -> str:
+    """ Writes bars as a csv file with capitalized columns and a `Date` column, as read by `load_prices`. """
+    prices.rename(columns=str.capitalize).rename_axis('Date').to_csv(path)
+    return str(path)
+
+
+@pytest.fixture(params=[None, 'UTC', 'Asia/Tokyo'], ids=['naive', 'utc', 'tokyo'])
+def prices_csv(request, tmp_path):
+    """ Path of a csv file of hourly bars, naive or tz-aware. """
+    return write_prices_csv(make_prices(tz=request.param), tmp_path / 'prices.csv')
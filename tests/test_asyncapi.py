@@ -0,0 +1,42 @@
+import asyncio
+
+from xtrader.apis import utils
+from xtrader.apis.rest.asyncapi import AsyncAlphaVantageStockAPI
+from xtrader.apis.utils import HTTPTransport
+
+
+def test_larger_pool_keeps_the_settings_of_the_shared_transport(monkeypatch):
+    shared = HTTPTransport(timeout=(1.0, 2.0), pool_connections=2, pool_maxsize=2, retries=5, backoff_factor=0.1,
+                           headers={'X-Team': 'quant'})
+    monkeypatch.setattr(utils, '_TRANSPORT', shared)
+    transport = AsyncAlphaVantageStockAPI('key', concurrency=8).client.transport
+
+    assert transport is not shared and transport.pool_maxsize == 8
+    assert (transport.timeout, transport.pool_connections, transport.retries, transport.backoff_factor) == \
+        (shared.timeout, shared.pool_connections, shared.retries, shared.backoff_factor)
+    assert transport.headers == shared.headers
+
+
+def test_shared_transport_is_used_when_its_pool_is_large_enough(monkeypatch):
+    shared = HTTPTransport(pool_maxsize=16)
+    monkeypatch.setattr(utils, '_TRANSPORT', shared)
+    assert AsyncAlphaVantageStockAPI('key', concurrency=8).client.transport is shared
+
+
+def test_close_closes_only_the_transport_created_for_the_client(monkeypatch):
+    shared = HTTPTransport(pool_maxsize=2)
+    monkeypatch.setattr(utils, '_TRANSPORT', shared)
+    given = HTTPTransport(pool_maxsize=2)
+    owned = AsyncAlphaVantageStockAPI('key', concurrency=8)
+    borrowed = AsyncAlphaVantageStockAPI('key', concurrency=8, transport=given)
+    for transport in [shared, given, owned.client.transport]:
+        transport.session
+
+    async def exit_client():
+        async with owned:
+            pass
+
+    asyncio.run(exit_client())
+    borrowed.close()
+    assert owned.client.transport._session is None
+    assert shared._session is not None and given._session is not None
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_prices
+from xtrader.dataloaders.bars import aggregate_bars
+
+RESAMPLE = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+
+
+def _bars(start: str, end: str, freq: str, tz: str) -> pd.DataFrame:
+    """ OHLCV bars of `make_prices` at another frequency. """
+    index = pd.date_range(start, end, freq=freq, tz=tz, name='date')
+    return make_prices(n_rows=len(index)).select_dtypes('number').set_index(index)
+
+
+def _resample(prices: pd.DataFrame, freq: str) -> pd.DataFrame:
+    """ Bars aggregated by pandas, with the aggregation of every column. """
+    return prices.resample(freq).agg(RESAMPLE)
+
+
+@pytest.mark.parametrize('tz', [None, 'UTC', 'Asia/Tokyo', 'US/Eastern'])
+@pytest.mark.parametrize('freqs', [['1h', '2h', '1D', '2D', '1W', '1ME'], ['2D'], ['1W'], ['1ME']])
+def test_aggregate_bars_matches_resample(tz, freqs):
+    # Fifteen minute bars over both DST changes of 2021 in the US
+    prices = _bars('2021-03-01', '2021-11-30', '15min', tz)
+    prices = prices[np.random.default_rng(0).random(len(prices)) > 0.2]
+    bars = aggregate_bars(prices, freqs)
+    for freq in freqs:
+        pd.testing.assert_frame_equal(bars[freq], _resample(prices, freq), check_freq=False)
+
+
+def test_aggregate_bars_over_the_end_of_dst():
+    prices = _bars('2023-11-04 20:00', '2023-11-06 03:00', '15min', 'US/Eastern')
+    hourly = aggregate_bars(prices, ['1h'])['1h']
+    # The repeated hour is two bins
+    assert len(hourly) == 33
+    assert hourly.index.is_unique
+    pd.testing.assert_frame_equal(hourly, _resample(prices, '1h'), check_freq=False)
+
+
+def test_aggregate_bars_over_the_start_of_dst():
+    prices = _bars('2023-03-11 20:00', '2023-03-13 03:00', '15min', 'US/Eastern')
+    bars = aggregate_bars(prices, ['1h', '2h', '1D'])
+    assert len(bars['1h']) == 31
+    for freq in ['1h', '2h', '1D']:
+        pd.testing.assert_frame_equal(bars[freq], _resample(prices, freq), check_freq=False)
+
+
+def test_aggregate_bars_with_an_origin():
+    prices = _bars('2021-01-01', '2021-03-01', '1h', None)
+    origin = pd.Timestamp('2020-12-31')
+    # Bins of two days from the 31st of December, while resample starts at the first bar
+    first = aggregate_bars(prices, ['2D'], origin=origin)['2D']
+    assert first.index[0] == origin
+    second = aggregate_bars(prices.loc['2021-01-02':], ['2D'], origin=origin)['2D']
+    pd.testing.assert_frame_equal(second, first.loc['2021-01-02':], check_freq=False)
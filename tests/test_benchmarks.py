@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import run as benchmarks  # noqa: E402
+
+
+@pytest.mark.parametrize('scale, cases', [((2000, 1), list(benchmarks.CASES) + list(benchmarks.LOADERS)),
+                                          ((4000, 2), list(benchmarks.CASES))])
+def test_every_benchmark_case_runs(scale, cases, capsys):
+    records = benchmarks.run([scale], cases, repeat=1)
+    assert [record['case'] for record in records] == cases
+    assert {record['case']: record['error'] for record in records if record['error']} == {}
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_prices
+from conftest import write_prices_csv
+from xtrader.dataloaders.checks import _check_missing_in_hourly
+from xtrader.dataloaders.checks import _check_nan
+from xtrader.dataloaders.checks import validate_prices
+from xtrader.dataloaders.ohlc import load_prices
+from xtrader.dataloaders.ohlc import load_prices_chunked
+
+
+@pytest.fixture
+def prices():
+    """ Hourly bars with one issue of every kind. """
+    prices = make_prices(n_rows=100)
+    index = prices.index.to_numpy().copy()
+    index[50:] += np.timedelta64(3, 'h')   # gap of 3 missing bars before row 50
+    index[20] = index[19]                  # duplicate at row 20
+    index[70], index[71] = index[71], index[70]   # row 71 is before row 70
+    prices.index = pd.DatetimeIndex(index, name='date')
+    prices.iloc[10, prices.columns.get_loc('close')] = np.nan
+    prices.iloc[30, prices.columns.get_loc('low')] = prices['high'].iloc[30] + 1
+    prices.iloc[40, prices.columns.get_loc('open')] = -1.0
+    return prices
+
+
+def test_validate_prices_locates_every_issue(prices):
+    report = validate_prices(prices)
+    assert not report.ok
+    locations = {check: list(positions) for check, positions in report.locations.items() if len(positions)}
+    # Swapping rows 70 and 71 leaves a two hour step into row 72
+    assert locations == {'non_monotonic': [71], 'duplicates': [20], 'gaps': [21, 50, 70, 72], 'nan:close': [10],
+                         'ohlc': [30, 40], 'non_positive': [40]}
+    assert report.missing_bars == 1 + 3 + 1 + 1
+    assert list(report.dates('duplicates')) == [prices.index[20]]
+
+
+def test_validate_prices_of_clean_prices():
+    report = validate_prices(make_prices(n_rows=100, tz='America/New_York', start='2021-03-13'))
+    assert report.ok and report.missing_bars == 0
+    assert report.to_frame().empty
+    report.raise_for_issues()
+
+
+def test_validate_prices_in_other_units(prices):
+    expected = validate_prices(prices)
+    prices.index = prices.index.as_unit('s')
+    report = validate_prices(prices)
+    assert report.counts == expected.counts and report.missing_bars == expected.missing_bars
+
+
+def test_report_frame_and_errors(prices):
+    report = validate_prices(prices, checks=['duplicates', 'nan', 'ohlc'])
+    frame = report.to_frame()
+    assert list(frame['position']) == [10, 20, 30, 40]
+    assert list(frame['check']) == ['nan:close', 'duplicates', 'ohlc', 'ohlc']
+    assert len(report.to_frame(limit=1)) == 3
+    with pytest.raises(ValueError, match='duplicates: 1, nan:close: 1, ohlc: 2'):
+        report.raise_for_issues()
+
+
+def test_validate_prices_options(prices):
+    assert 'gaps' not in validate_prices(prices, freq=None).locations
+    assert list(validate_prices(prices, freq='2h', checks=['gaps']).locations['gaps']) == [50]
+    assert list(validate_prices(prices, columns=['open'], checks=['nan']).locations) == ['nan:open']
+    with pytest.raises(ValueError, match='Unknown checks'):
+        validate_prices(prices, checks=['spikes'])
+    with pytest.raises(ValueError, match='fixed frequencies'):
+        validate_prices(prices, freq='1M', checks=['gaps'])
+
+
+def test_check_helpers(prices):
+    clean = make_prices(n_rows=100)
+    assert _check_missing_in_hourly(clean)
+    assert not _check_missing_in_hourly(prices)
+    assert _check_nan(prices, ['close']) and not _check_nan(prices, ['open', 'volume'])
+
+
+@pytest.mark.parametrize('load', [load_prices, load_prices_chunked])
+def test_loads_are_validated(tmp_path, load):
+    prices = make_prices(n_rows=24 * 10)
+    path = write_prices_csv(prices.drop(prices.index[[30, 31]]), tmp_path / 'prices.csv')
+    with pytest.raises(ValueError, match='gaps: 1, 2 missing bars'):
+        load(path, check_missing=True)['daily']
@@ -0,0 +1,92 @@
+import pandas as pd
+import pytest
+
+from conftest import make_prices
+from xtrader.dataloaders.dataset import PriceDataset
+from xtrader.dataloaders.dataset import write_dataset
+from xtrader.dataloaders.store import OHLCVStore
+
+
+def _formats():
+    """ Partition formats that can be written here, parquet needs pyarrow. """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return ['csv', 'npz']
+    return ['parquet', 'csv', 'npz']
+
+
+@pytest.fixture(params=[None, 'Asia/Tokyo'], ids=['naive', 'tokyo'])
+def prices(request):
+    """ Hourly bars of one symbol over three calendar years. """
+    return make_prices(n_rows=24 * 800, start='2020-06-01', tz=request.param)
+
+
+@pytest.mark.parametrize('file_format', _formats())
+@pytest.mark.parametrize('start, end', [('2021-03-01', '2021-03-31'), ('2021-03', '2021-03'),
+                                        ('2020-12-31 12:00', '2021-01-01 05:00'), (None, '2021')])
+def test_load_matches_loc(prices, tmp_path, file_format, start, end):
+    write_dataset(prices, str(tmp_path), file_format=file_format)
+    loaded = PriceDataset(str(tmp_path)).load(start=start, end=end, as_dict=True)['ACME']
+    expected = prices.loc[start:end].drop(columns='symbol')
+    pd.testing.assert_frame_equal(loaded, expected, check_freq=False, check_index_type=False)
+
+
+@pytest.mark.parametrize('file_format', _formats())
+def test_load_opens_only_the_years_of_the_dates(tmp_path, file_format, monkeypatch):
+    write_dataset(make_prices(n_rows=24 * 800, start='2020-06-01'), str(tmp_path), file_format=file_format)
+    read, opened = PriceDataset._read, []
+
+    def spy(path, start, end, columns):
+        opened.append(path)
+        return read(path, start, end, columns)
+
+    monkeypatch.setattr(PriceDataset, '_read', staticmethod(spy))
+    PriceDataset(str(tmp_path)).load(start='2021-03-01', end='2021-03-31')
+    assert [path.split('year=')[1][:4] for path in opened] == ['2021']
+
+
+def test_load_reads_only_the_parquet_row_groups_of_the_dates(tmp_path, monkeypatch):
+    parquet = pytest.importorskip('pyarrow.parquet')
+    write_dataset(make_prices(n_rows=24 * 800, start='2020-06-01'), str(tmp_path), file_format='parquet')
+    read_row_groups, groups = parquet.ParquetFile.read_row_groups, []
+
+    def spy(self, row_groups, *args, **kwargs):
+        groups.append(list(row_groups))
+        return read_row_groups(self, row_groups, *args, **kwargs)
+
+    monkeypatch.setattr(parquet.ParquetFile, 'read_row_groups', spy)
+    loaded = PriceDataset(str(tmp_path)).load(start='2021-03-01', end='2021-03-31')
+    # Groups of 31 days from the 1st of January: March spans the second, from the 1st of February, and the third
+    assert groups == [[1, 2]]
+    assert len(loaded) == 31 * 24
+
+
+@pytest.mark.parametrize('file_format', _formats())
+def test_load_rejects_aware_dates_on_naive_data(tmp_path, file_format):
+    write_dataset(make_prices(n_rows=24 * 10), str(tmp_path), file_format=file_format)
+    with pytest.raises(ValueError, match='time zone'):
+        PriceDataset(str(tmp_path)).load(end=pd.Timestamp('2020-12-05', tz='UTC'))
+
+
+@pytest.mark.parametrize('first_format', _formats())
+@pytest.mark.parametrize('second_format', _formats())
+def test_rewriting_a_partition_in_another_format_replaces_it(tmp_path, first_format, second_format):
+    write_dataset(make_prices(n_rows=24 * 10, seed=0), str(tmp_path), file_format=first_format)
+    prices = make_prices(n_rows=24 * 10, seed=1)
+    paths = write_dataset(prices, str(tmp_path), file_format=second_format)
+
+    assert sum(len(files) for years in PriceDataset(str(tmp_path)).partitions.values()
+               for files in years.values()) == len(paths)
+    loaded = PriceDataset(str(tmp_path)).load(as_dict=True)['ACME']
+    pd.testing.assert_frame_equal(loaded, prices.drop(columns='symbol'), check_freq=False, check_index_type=False)
+
+
+def test_store_bounds_include_the_last_day(prices, tmp_path):
+    store = OHLCVStore.write(prices.select_dtypes('number'), str(tmp_path / 'store'))
+    for start, end in [('2021-03-01', '2021-03-31'), ('2021-03', '2021-03'), ('2021', '2021')]:
+        first, last = store.bounds(start, end)
+        assert last - first == len(prices.loc[start:end])
+    frame = store.frame('2021-03-01', '2021-03-31')
+    pd.testing.assert_frame_equal(frame, prices.loc['2021-03-01':'2021-03-31'].select_dtypes('number'),
+                                  check_freq=False, check_index_type=False)
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from xtrader.apis.rest.crypto.alphavantage import AlphaVantageCryptoAPI
+from xtrader.apis.rest.history import HistorySync
+from xtrader.apis.rest.history import _series_time
+from xtrader.apis.rest.stocks.alphavantage import AlphaVantageStockAPI
+from xtrader.dataloaders.store import OHLCVStore
+
+
+def _history(start: str, periods: int, freq: str) -> pd.DataFrame:
+    """ Bars of a series as stored, with a naive date index. """
+    index = pd.date_range(start, periods=periods, freq=freq, name='date')
+    close = 100 + np.arange(periods, dtype=float)
+    return pd.DataFrame({'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+                         'volume': np.full(periods, 1000.0)}, index=index)
+
+
+def _serve(client, history: pd.DataFrame, calls: list):
+    """ Answers the time series requests of a client from a history, recording their output sizes and months. """
+    def fetch(*args, outputsize: str = 'full', month: str = None, **kwargs) -> pd.DataFrame:
+        if args[0] == 'FAIL':
+            raise ValueError('Invalid API call')
+        calls.append((outputsize, month))
+        bars = history
+        if month is not None:
+            bars = bars[bars.index.to_period('M') == pd.Period(month, freq='M')]
+        elif outputsize == 'compact':
+            bars = bars.iloc[-100:]
+        return bars.reset_index()
+
+    client.get_daily = fetch
+    client.get_intraday = fetch
+    return client
+
+
+def _assert_stored(sync: HistorySync, symbol: str, freq: str, expected: pd.DataFrame) -> None:
+    pd.testing.assert_frame_equal(sync.read(symbol, freq).frame(), expected, check_freq=False, check_index_type=False)
+
+
+def test_first_sync_fetches_the_full_series(tmp_path):
+    history, calls = _history('2023-01-02', 300, 'B'), []
+    sync = HistorySync(_serve(AlphaVantageStockAPI('key'), history, calls), str(tmp_path))
+    now = pd.Timestamp(history.index[-1] + pd.Timedelta(hours=18), tz='US/Eastern')
+
+    synced = sync.sync('IBM', now=now)
+    pd.testing.assert_frame_equal(synced, history, check_freq=False, check_index_type=False)
+    _assert_stored(sync, 'IBM', 'daily', history)
+    assert calls == [('full', None)]
+
+
+def test_sync_merges_a_compact_response_when_the_gap_fits(tmp_path):
+    history = _history('2023-01-02', 300, 'B')
+    partial = history.iloc[:290].copy()
+    partial.iloc[-1, partial.columns.get_loc('close')] = 0.0
+    HistorySync(_serve(AlphaVantageStockAPI('key'), partial, []), str(tmp_path)).sync('IBM')
+
+    calls = []
+    sync = HistorySync(_serve(AlphaVantageStockAPI('key'), history, calls), str(tmp_path))
+    synced = sync.sync('IBM', now=pd.Timestamp(history.index[-1], tz='US/Eastern'))
+    # The partial last bar of the store is replaced by the fetched one
+    pd.testing.assert_frame_equal(synced, history, check_freq=False, check_index_type=False)
+    assert calls == [('compact', None)]
+
+
+def test_sync_falls_back_to_full_for_long_gaps(tmp_path):
+    history = _history('2023-01-02', 300, 'B')
+    HistorySync(_serve(AlphaVantageStockAPI('key'), history.iloc[:100], []), str(tmp_path)).sync('IBM')
+
+    calls = []
+    sync = HistorySync(_serve(AlphaVantageStockAPI('key'), history, calls), str(tmp_path))
+    sync.sync('IBM', now=pd.Timestamp(history.index[-1], tz='US/Eastern'))
+    _assert_stored(sync, 'IBM', 'daily', history)
+    assert calls == [('full', None)]
+
+
+def test_unchanged_series_are_not_written_again(tmp_path):
+    history = _history('2023-01-02', 300, 'B')
+    sync = HistorySync(_serve(AlphaVantageStockAPI('key'), history, []), str(tmp_path))
+    now = pd.Timestamp(history.index[-1], tz='US/Eastern')
+    sync.sync('IBM', now=now)
+    directory = sync.read('IBM').directory
+    sync.sync('IBM', now=now)
+    assert sync.read('IBM').directory == directory
+
+
+def test_stock_intraday_months_end_at_the_eastern_month(tmp_path):
+    # 02:00 UTC on the 1st of April is still the 31st of March in New York, April has no bars yet
+    history, calls = _history('2024-02-01', 24 * 60, '60min'), []
+    history = history[history.index < '2024-03-31 23:00']
+    sync = HistorySync(_serve(AlphaVantageStockAPI('key'), history, calls), str(tmp_path))
+
+    sync.sync('IBM', '60min', since='2024-02', now=pd.Timestamp('2024-04-01 02:00', tz='UTC'))
+    assert calls == [('full', '2024-02'), ('full', '2024-03')]
+    _assert_stored(sync, 'IBM', '60min', history)
+
+
+def test_aware_now_is_compared_on_the_clock_of_the_series(tmp_path):
+    history = _history('2024-01-01', 24 * 10, '60min')
+    HistorySync(_serve(AlphaVantageCryptoAPI('key'), history.iloc[:-20], []), str(tmp_path)).sync('BTC/USD', '60min')
+
+    calls = []
+    sync = HistorySync(_serve(AlphaVantageCryptoAPI('key'), history, calls), str(tmp_path))
+    now = pd.Timestamp(history.index[-1], tz='UTC').tz_convert('Asia/Tokyo')
+    sync.sync('BTC/USD', '60min', now=now)
+    assert calls == [('compact', None)]
+    assert len(OHLCVStore(sync.path('BTC/USD', '60min'))) == len(history)
+
+
+def test_series_time():
+    eastern = _series_time(None, 'stocks')
+    assert eastern.tz is None
+    assert abs(eastern - pd.Timestamp.now(tz='US/Eastern').tz_localize(None)) < pd.Timedelta(minutes=1)
+    assert _series_time(pd.Timestamp('2024-07-01 02:00', tz='UTC'), 'stocks') == pd.Timestamp('2024-06-30 22:00')
+    assert _series_time(pd.Timestamp('2024-07-01 02:00'), 'crypto') == pd.Timestamp('2024-07-01 02:00')
+
+
+def test_sync_many_reports_the_failed_symbols(tmp_path):
+    history = _history('2023-01-02', 300, 'B')
+    sync = HistorySync(_serve(AlphaVantageStockAPI('key'), history, []), str(tmp_path))
+    result = sync.sync_many(['IBM', 'FAIL'])
+    assert list(result.results) == ['IBM'] and list(result.errors) == ['FAIL']
+    with pytest.raises(ValueError, match='freq'):
+        sync.sync('IBM', 'weekly')
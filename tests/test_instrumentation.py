@@ -0,0 +1,54 @@
+import numpy as np
+
+from xtrader.instrumentation import instrument
+from xtrader.instrumentation import instrumented
+
+# Bytes allocated by `_allocate`
+SIZE = 8 * 1024 * 1024
+
+
+@instrumented
+def _allocate(size: int) -> int:
+    return len(np.ones(size // 8))
+
+
+@instrumented
+def _outer(nested: bool) -> None:
+    # Allocated by the call itself, not by an instrumented call it makes
+    np.ones(SIZE // 8)
+    if nested:
+        with instrument(memory=True):
+            _allocate(1024)
+    else:
+        _allocate(1024)
+
+
+def _record(stats, name: str, **params) -> dict:
+    summary = stats.summary()
+    description = ', '.join(f'{key}={value!r}' for key, value in params.items())
+    return summary[(summary['function'] == name) & (summary['params'] == description)].iloc[0].to_dict()
+
+
+def test_calls_include_the_instrumented_calls_they_make():
+    with instrument(memory=True) as stats:
+        _outer(False)
+    outer = _record(stats, '_outer', nested=False)
+    assert outer['calls'] == 1 and outer['peak_bytes'] >= SIZE
+    inner = _record(stats, '_allocate', size=1024)
+    assert inner['calls'] == 1 and inner['peak_bytes'] < SIZE
+    assert outer['seconds'] >= inner['seconds']
+
+
+def test_nested_instrumentation_keeps_the_outer_peak():
+    with instrument(memory=True) as stats:
+        _outer(True)
+    assert _record(stats, '_outer', nested=True)['peak_bytes'] >= SIZE
+    # The nested call is recorded by the nested instrumentation
+    assert list(stats.summary()['function']) == ['_outer']
+
+
+def test_functions_are_not_recorded_outside_the_context():
+    with instrument() as stats:
+        pass
+    _allocate(1024)
+    assert stats.records == {}
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from xtrader.factors import kernels
+
+
+def _exact_std(values: np.ndarray, time_period: int) -> np.ndarray:
+    """ Population standard deviation of every window, computed in extended precision. """
+    windows = np.lib.stride_tricks.sliding_window_view(values.astype(np.longdouble), time_period)
+    deviations = windows - windows.mean(axis=1)[:, None]
+    return np.sqrt((deviations * deviations).mean(axis=1)).astype(float)
+
+
+@pytest.mark.parametrize('time_period', [5, 21, 200])
+def test_bbands_matches_pandas_rolling_on_long_drifting_series(time_period):
+    rng = np.random.default_rng(1)
+    values = 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.01, 500_000)))
+    up, mid, low = kernels.bbands(values, [time_period], [2], [3])[(time_period, 2, 3)]
+
+    rolling = pd.Series(values).rolling(time_period)
+    np.testing.assert_allclose(mid, rolling.mean().to_numpy(), rtol=1e-12)
+    np.testing.assert_allclose((up - mid) / 2, rolling.std(ddof=0).to_numpy(), rtol=1e-6)
+    np.testing.assert_allclose((mid - low) / 3, rolling.std(ddof=0).to_numpy(), rtol=1e-6)
+
+
+def test_bbands_keeps_precision_on_long_random_walk():
+    rng = np.random.default_rng(0)
+    values = np.cumsum(rng.normal(size=1_000_000)) + 1e5
+    up, mid, _ = kernels.bbands(values, [5], [2], [2])[(5, 2, 2)]
+    np.testing.assert_allclose(((up - mid) / 2)[4:], _exact_std(values, 5), rtol=1e-8)
+
+
+def test_bbands_keeps_precision_after_level_shift():
+    rng = np.random.default_rng(2)
+    values = np.r_[10.0, 5000 + rng.uniform(-1e-3, 1e-3, 500_000)]
+    up, mid, _ = kernels.bbands(values, [5], [2], [2])[(5, 2, 2)]
+    np.testing.assert_allclose(((up - mid) / 2)[4:], _exact_std(values, 5), rtol=1e-6)
+
+
+def test_bbands_nan_only_affects_its_windows():
+    values = np.linspace(1, 2, 100)
+    values[50] = np.nan
+    _, mid, _ = kernels.bbands(values, [5], [2], [2])[(5, 2, 2)]
+    assert np.isnan(mid[50:55]).all()
+    assert not np.isnan(mid[55:]).any()
+
+
+def test_bbands_keeps_precision_at_high_price_levels():
+    rng = np.random.default_rng(3)
+    values = 1e6 + rng.normal(0, 0.006, 100_000)
+    # The bands themselves are rounded to the level of the prices
+    _, variance = kernels._window_moments(values, 21)
+    np.testing.assert_allclose(np.sqrt(variance), _exact_std(values, 21), rtol=1e-10)
+
+
+def _wilder_rsi(values: np.ndarray, time_period: int) -> np.ndarray:
+    """ RSI of a series without NaNs, with the Wilder averages computed by pandas. """
+    change = np.diff(values)
+    smoothed = []
+    for moves in [np.maximum(change, 0), np.maximum(-change, 0)]:
+        series = moves[time_period - 1:].copy()
+        series[0] = moves[:time_period].mean()
+        smoothed.append(pd.Series(series).ewm(alpha=1 / time_period, adjust=False).mean().to_numpy())
+    return np.r_[np.full(time_period, np.nan), 100 * smoothed[0] / (smoothed[0] + smoothed[1])]
+
+
+def test_rsi_grid_matches_wilder_smoothing():
+    rng = np.random.default_rng(4)
+    values = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 100_000)))
+    grid = kernels.rsi(values, [2, 5, 14, 200])
+    for time_period, result in grid.items():
+        np.testing.assert_allclose(result, _wilder_rsi(values, time_period), rtol=1e-10)
+
+
+def test_rsi_propagates_nan_as_ta_lib():
+    rng = np.random.default_rng(5)
+    values = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 200)))
+    values[:3] = np.nan
+    values[100] = np.nan
+    result = kernels.rsi(values, [14])[14]
+    # Leading NaNs are skipped, and the RSI is NaN from the first later NaN on
+    np.testing.assert_allclose(result[:100], np.r_[np.full(3, np.nan), _wilder_rsi(values[3:100], 14)])
+    assert np.isnan(result[100:]).all()
@@ -0,0 +1,30 @@
+import pandas as pd
+import pytest
+
+from conftest import make_prices
+from conftest import write_prices_csv
+from xtrader.dataloaders.ohlc import load_prices
+from xtrader.dataloaders.ohlc import load_prices_chunked
+
+
+@pytest.mark.parametrize('chunksize', [500, 24 * 90])
+def test_load_prices_chunked_matches_load_prices(prices_csv, chunksize):
+    expected = load_prices(prices_csv, check_missing=True)
+    loaded = load_prices_chunked(prices_csv, chunksize=chunksize, check_missing=True)
+    for name in ['hourly', 'daily', 'monthly']:
+        pd.testing.assert_frame_equal(loaded[name], expected[name])
+
+
+@pytest.mark.parametrize('chunksize', [500, 24 * 7 + 5])
+def test_load_prices_chunked_bins_do_not_depend_on_the_chunks(prices_csv, chunksize):
+    freqs = {'two_hours': '2h', 'daily': '1D', 'two_days': '2D', 'three_days': '3D', 'weekly': '1W'}
+    expected = load_prices(prices_csv, freqs=freqs)
+    loaded = load_prices_chunked(prices_csv, chunksize=chunksize, freqs=freqs)
+    for name in freqs:
+        pd.testing.assert_frame_equal(loaded[name], expected[name])
+
+
+def test_load_prices_chunked_rejects_unsorted_rows(tmp_path):
+    path = write_prices_csv(make_prices(n_rows=100, tz='UTC').iloc[::-1], tmp_path / 'prices.csv')
+    with pytest.raises(ValueError, match='sorted'):
+        load_prices_chunked(path, chunksize=30)
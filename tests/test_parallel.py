@@ -0,0 +1,68 @@
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+
+from xtrader.factors import parallel as parallel_module
+from xtrader.factors import precision
+from xtrader.factors.panel import Panel
+from xtrader.factors.parallel import ParallelFactors
+
+
+def _panel(tz=None, n_symbols: int = 4, n_bars: int = 300) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    frames = []
+    for i in range(n_symbols):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))
+        index = pd.date_range('2021-01-01', periods=n_bars, freq='h', tz=tz, name='date')
+        frames.append(pd.DataFrame({'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+                                    'volume': rng.lognormal(10, 1, n_bars), 'symbol': f'S{i}'}, index=index))
+    return pd.concat(frames)
+
+
+@pytest.mark.parametrize('tz', [None, 'UTC', 'Asia/Tokyo', 'America/New_York'])
+@pytest.mark.parametrize('n_workers', [1, 2])
+def test_time_indicators_match_serial_panel(tz, n_workers):
+    prices = _panel(tz)
+    parallel = ParallelFactors(n_workers=n_workers).run(prices, 'time_indicators')
+    serial = Panel.time_indicators(prices, return_full=False)
+    pd.testing.assert_frame_equal(parallel, serial)
+    if tz == 'Asia/Tokyo':
+        first = parallel.iloc[0]
+        assert (first['year'], first['month'], first['day']) == (2021, 1, 1)
+
+
+@pytest.mark.parametrize('tz', [None, 'Asia/Tokyo'])
+def test_returns_match_serial_panel(tz):
+    prices = _panel(tz)
+    parallel = ParallelFactors(n_workers=2).run(prices, 'returns', periods=[1, 3], freq='h')
+    serial = Panel.returns(prices, [1, 3], 'h', return_full=False)
+    pd.testing.assert_frame_equal(parallel, serial)
+
+
+@pytest.mark.parametrize('n_workers', [1, 2])
+def test_run_follows_the_precision_policy(n_workers):
+    prices = _panel()
+    with precision.precision('float32') as policy:
+        parallel = ParallelFactors(n_workers=n_workers).run(prices, 'returns', periods=[1, 3], freq='h')
+        serial = Panel.returns(prices, [1, 3], 'h', return_full=False)
+    pd.testing.assert_frame_equal(parallel, serial)
+    assert (parallel.dtypes == np.float32).all()
+    assert len(policy.footprints) == 2
+
+
+def test_run_leaves_the_policy_of_other_threads(monkeypatch):
+    compute, seen = parallel_module._compute, []
+
+    def spy(chunk, method, kwargs):
+        seen.append(precision.get_policy().float_dtype)
+        thread = threading.Thread(target=lambda: seen.append(precision.get_policy().float_dtype))
+        thread.start()
+        thread.join()
+        return compute(chunk, method, kwargs)
+
+    monkeypatch.setattr(parallel_module, '_compute', spy)
+    with precision.precision('float32'):
+        ParallelFactors(n_workers=1).run(_panel(), 'returns', periods=[1], freq='h')
+    # The run computes at full precision while other threads keep the active float32 policy
+    assert seen == [np.float64, np.float32] * 2
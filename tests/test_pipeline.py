@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_prices
+from xtrader.factors.momenta import Momenta
+from xtrader.factors.pipeline import FactorPipeline
+from xtrader.factors.precision import precision
+from xtrader.factors.returns import Returns
+from xtrader.factors.seasonal import Seasonal
+from xtrader.factors.technical import Technical
+
+HOLIDAYS = ['2020-12-25', '2021-01-01']
+SPEC = [{'factor': 'Returns', 'params': {'periods': [1, 3, 12]}, 'freq': 'h'},
+        {'factor': Returns, 'method': 'lagged_returns', 'params': {'lags': [1, 2]}, 'columns': ['close'], 'freq': 'h'},
+        {'factor': 'Momenta', 'params': {'periods': [3, 12]}, 'columns': ['close', 'volume'], 'freq': 'h'},
+        {'factor': 'Technical', 'method': 'rsi', 'params': {'time_period': 14}, 'columns': ['close']},
+        {'factor': 'Technical', 'method': 'bbands', 'params': {'time_period': 21}, 'columns': ['close']},
+        {'factor': 'Seasonal', 'params': {'cyclical': True, 'flags': True, 'holidays': HOLIDAYS}}]
+
+
+def _individual_calls(prices: pd.DataFrame) -> pd.DataFrame:
+    """ Features of `SPEC` from the individual factor functions. """
+    return pd.concat([Returns.returns(prices, [1, 3, 12], 'h', return_full=False),
+                      Returns.lagged_returns(prices, [1, 2], 'h', columns=['close'], return_full=False),
+                      Momenta.momenta(prices, [3, 12], 'h', columns=['close', 'volume'], return_full=False),
+                      Technical.rsi(prices, 14, columns=['close'], return_full=False),
+                      Technical.bbands(prices, 21, columns=['close'], return_full=False),
+                      Seasonal.time_indicators(prices, return_full=False, cyclical=True, flags=True,
+                                               holidays=HOLIDAYS)], axis=1)
+
+
+@pytest.mark.parametrize('tz', [None, 'Asia/Tokyo'])
+def test_pipeline_matches_the_individual_factor_calls(tz):
+    prices = make_prices(tz=tz)
+    pipeline = FactorPipeline(SPEC)
+    features = pipeline.run(prices)
+
+    assert list(features.columns) == pipeline.feature_names
+    pd.testing.assert_frame_equal(features, _individual_calls(prices)[pipeline.feature_names], rtol=1e-12)
+
+
+def test_pipeline_follows_the_precision_policy():
+    prices = make_prices()
+    with precision('float32'):
+        features = FactorPipeline(SPEC).run(prices)
+        expected = _individual_calls(prices)
+    pd.testing.assert_series_equal(features.dtypes, expected.dtypes[features.columns])
+    assert features['close_return_3h'].dtype == np.float32
+    assert features['month'].dtype == np.int8
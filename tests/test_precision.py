@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_prices
+from xtrader.factors import precision
+from xtrader.factors.momenta import Momenta
+from xtrader.factors.returns import Returns
+from xtrader.factors.seasonal import Seasonal
+
+
+def test_memory_footprint_by_dtype():
+    frame = pd.DataFrame({'a': np.zeros(10), 'b': np.zeros(10, dtype=np.float32),
+                          'c': np.zeros(10, dtype=np.float32), 'd': np.zeros(10, dtype=np.int8)})
+    footprint = precision.memory_footprint(frame)
+    assert footprint == {'bytes': 170, 'by_dtype': {'float64': 80, 'float32': 80, 'int8': 10},
+                         'columns': 4, 'rows': 10}
+
+
+def test_apply_casts_only_the_float64_and_int_columns():
+    frame = pd.DataFrame({'a': np.arange(3.0), 'b': np.arange(3, dtype=np.int16), 'c': ['x', 'y', 'z']})
+    policy = precision.PrecisionPolicy('float32', nullable_ints=True)
+    applied = policy.apply(frame)
+    assert applied.dtypes.to_dict() == {'a': np.float32, 'b': pd.Int16Dtype(), 'c': frame['c'].dtype}
+    assert policy.footprints == []
+    assert precision.PrecisionPolicy().apply(frame) is frame
+
+
+def test_float_outputs_are_downcast_after_the_math():
+    prices = make_prices(n_rows=500)
+    expected = Momenta.momenta(prices, [3, 24], 'h', return_full=False)
+    with precision.precision('float32') as policy:
+        momenta = Momenta.momenta(prices, [3, 24], 'h', return_full=False)
+    assert (momenta.dtypes == np.float32).all()
+    np.testing.assert_array_equal(momenta.to_numpy(), expected.to_numpy().astype(np.float32))
+    assert policy.total_bytes == momenta.memory_usage(index=False).sum()
+
+
+def test_precision_records_every_output_and_restores_the_policy():
+    prices = make_prices(n_rows=48)
+    previous = precision.get_policy()
+    with precision.precision('float32', nullable_ints=True) as policy:
+        assert precision.get_policy() is policy
+        returns = Returns.returns(prices, [1, 3], 'h', return_full=False)
+        indicators = Seasonal.time_indicators(prices, return_full=False)
+    assert precision.get_policy() is previous
+
+    assert (returns.dtypes == np.float32).all()
+    assert indicators['year'].dtype == pd.Int16Dtype()
+    assert [footprint['columns'] for footprint in policy.footprints] == [returns.shape[1], indicators.shape[1]]
+    assert policy.total_bytes == sum(frame.memory_usage(index=False).sum() for frame in [returns, indicators])
+
+
+def test_precision_restores_the_policy_on_errors():
+    previous = precision.get_policy()
+    with pytest.raises(ZeroDivisionError):
+        with precision.precision('float16'):
+            1 / 0
+    assert precision.get_policy() is previous
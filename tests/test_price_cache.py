@@ -0,0 +1,31 @@
+import os
+import pandas as pd
+
+from xtrader.dataloaders.cache import PriceCache
+from xtrader.dataloaders.ohlc import load_prices
+
+
+def test_warm_npz_cache_matches_cold_load(prices_csv, tmp_path):
+    cache = PriceCache(str(tmp_path / 'cache'), file_format='npz')
+    cold = load_prices(prices_csv, cache=cache)
+    cold = {name: cold[name] for name in cold}
+    warm = load_prices(prices_csv, cache=cache)
+    assert os.listdir(tmp_path / 'cache')
+
+    for name, frame in cold.items():
+        cached = warm[name]
+        pd.testing.assert_frame_equal(cached, frame)
+        assert cached.index.dtype == frame.index.dtype
+    assert warm.loaded == list(cold)
+
+
+def test_npz_cache_stores_strings_as_codes(prices_csv, tmp_path):
+    import numpy as np
+
+    cache = PriceCache(str(tmp_path / 'cache'), file_format='npz')
+    prices = load_prices(prices_csv, cache=cache)
+    prices['hourly']
+    entry = os.path.join(cache.directory, os.listdir(cache.directory)[0])
+    with np.load(os.path.join(entry, 'hourly.npz')) as arrays:
+        string_arrays = [name for name in arrays.files if arrays[name].dtype.kind == 'U']
+        assert all(len(arrays[name]) == 1 for name in string_arrays)
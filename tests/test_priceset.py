@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_prices
+from conftest import write_prices_csv
+from xtrader.dataloaders.cache import PriceCache
+from xtrader.dataloaders.ohlc import load_prices
+
+
+@pytest.fixture
+def invalid_csv(tmp_path):
+    """ Path of a csv file of hourly bars with one NaN close. """
+    prices = make_prices(n_rows=24 * 10)
+    prices.iloc[30, prices.columns.get_loc('close')] = np.nan
+    return write_prices_csv(prices, tmp_path / 'prices.csv')
+
+
+def test_checked_frames_are_never_returned_invalid(invalid_csv):
+    prices = load_prices(invalid_csv, check_missing=True)
+    for name in ['daily', 'daily', 'hourly', 'monthly']:
+        with pytest.raises(ValueError, match='NaN'):
+            prices[name]
+    assert prices.loaded == []
+
+
+def test_invalid_frames_are_not_cached(invalid_csv, tmp_path):
+    cache = PriceCache(str(tmp_path / 'cache'), file_format='npz')
+    with pytest.raises(ValueError):
+        load_prices(invalid_csv, check_missing=True, cache=cache)['daily']
+    assert cache.read_frame(cache.key(invalid_csv), 'hourly') is None
+    assert cache.read_frame(cache.key(invalid_csv), '1d') is None
+
+
+def test_warm_cache_is_checked(invalid_csv, tmp_path):
+    cache = PriceCache(str(tmp_path / 'cache'), file_format='npz')
+    unchecked = load_prices(invalid_csv, cache=cache)
+    assert unchecked['hourly']['close'].isna().any() and len(unchecked['daily'])
+
+    with pytest.raises(ValueError, match='NaN'):
+        load_prices(invalid_csv, check_missing=True, cache=cache)['daily']
+
+
+def test_valid_frames_are_checked_and_cached(prices_csv, tmp_path):
+    cache = PriceCache(str(tmp_path / 'cache'), file_format='npz')
+    cold = load_prices(prices_csv, check_missing=True, cache=cache)['daily']
+    warm = load_prices(prices_csv, check_missing=True, cache=cache)
+    pd.testing.assert_frame_equal(warm['daily'], cold)
+    assert warm.loaded == ['hourly', 'daily']
@@ -0,0 +1,74 @@
+import json
+import sqlite3
+import threading
+import requests
+
+from unittest import mock
+
+from xtrader.apis import utils
+from xtrader.apis.cache import ResponseCache
+from xtrader.apis.rest.fundamentals.alphavantage import AlphaVantageFundamentalsAPI
+
+
+def _fake_get(self, url, params=None):
+    response = requests.Response()
+    response.status_code = 200
+    response.url = requests.Request('GET', url, params=params).prepare().url
+    response._content = json.dumps({'Symbol': params['symbol']}).encode()
+    return response
+
+
+def test_api_key_is_not_written_to_disk(tmp_path):
+    path = str(tmp_path / 'responses.sqlite3')
+    with mock.patch.object(utils.HTTPTransport, 'get', _fake_get):
+        cache = ResponseCache(path)
+        api = AlphaVantageFundamentalsAPI('SECRETKEY123', transport=cache)
+        assert api.get_company_overview('IBM').json() == {'Symbol': 'IBM'}
+        cached = AlphaVantageFundamentalsAPI('OTHERKEY', transport=cache).get_company_overview('IBM')
+
+    assert cached.json() == {'Symbol': 'IBM'}
+    assert 'apikey' not in cached.url and 'symbol=IBM' in cached.url
+    assert cache.stats()['OVERVIEW'] == {'hits': 1, 'misses': 1, 'evictions': 0}
+    rows = sqlite3.connect(path).execute('SELECT * FROM responses').fetchall()
+    assert 'SECRETKEY123' not in repr(rows)
+    for suffix in ['', '-wal']:
+        with open(path + suffix, 'rb') as file:
+            assert b'SECRETKEY123' not in file.read()
+
+
+def _overview(cache: ResponseCache, symbol: str) -> requests.Response:
+    return cache.get('https://www.alphavantage.co/query', {'function': 'OVERVIEW', 'symbol': symbol})
+
+
+def test_hits_do_not_wait_for_the_write_lock(tmp_path):
+    path = str(tmp_path / 'responses.sqlite3')
+    with mock.patch.object(utils.HTTPTransport, 'get', _fake_get):
+        cache = ResponseCache(path)
+        _overview(cache, 'IBM')
+        writer = sqlite3.connect(path, isolation_level=None)
+        writer.execute('BEGIN IMMEDIATE')
+        hits = []
+        reader = threading.Thread(target=lambda: hits.append(_overview(cache, 'IBM').json()))
+        reader.start()
+        reader.join(timeout=5)
+        waited = reader.is_alive()
+        writer.execute('COMMIT')
+        reader.join()
+
+    assert not waited
+    assert hits == [{'Symbol': 'IBM'}]
+    assert cache.stats()['OVERVIEW'] == {'hits': 1, 'misses': 1, 'evictions': 0}
+
+
+def test_batched_hits_keep_the_least_recently_used_order(tmp_path):
+    size = len(json.dumps({'Symbol': 'IBM'}))
+    with mock.patch.object(utils.HTTPTransport, 'get', _fake_get):
+        cache = ResponseCache(str(tmp_path / 'responses.sqlite3'), max_bytes=2 * size)
+        _overview(cache, 'IBM')
+        _overview(cache, 'AMD')
+        _overview(cache, 'IBM')
+        _overview(cache, 'SAP')
+
+    rows = sqlite3.connect(cache.path).execute('SELECT content FROM responses').fetchall()
+    assert sorted(json.loads(content)['Symbol'] for content, in rows) == ['IBM', 'SAP']
+    assert cache.stats()['OVERVIEW'] == {'hits': 1, 'misses': 3, 'evictions': 1}
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_prices
+from xtrader.factors.returns import Returns
+from xtrader.factors.streaming import StreamingReturns
+
+PERIODS = [1, 3, 24, 168]
+
+
+def _pandas_returns(prices: pd.DataFrame, periods, normalize: bool) -> pd.DataFrame:
+    """ Returns computed as the original implementation did, column by column with pandas. """
+    returns = {}
+    for column in ['high', 'low', 'open', 'close', 'volume']:
+        for period in periods:
+            values = prices[column].pct_change(period)
+            returns[f'{column}_return_{period}h'] = values.add(1).pow(1 / period).sub(1) if normalize else values
+    return pd.DataFrame(returns, index=prices.index)
+
+
+@pytest.fixture
+def prices():
+    prices = make_prices(n_rows=2000, seed=3)
+    prices.iloc[[10, 500], prices.columns.get_loc('close')] = np.nan
+    prices.iloc[700, prices.columns.get_loc('volume')] = 0
+    return prices
+
+
+@pytest.mark.parametrize('normalize', [True, False])
+def test_returns_are_bit_identical_to_pandas(prices, normalize):
+    returns = Returns.returns(prices, PERIODS, 'h', normalize=normalize, return_full=False)
+    expected = _pandas_returns(prices, PERIODS, normalize)
+    np.testing.assert_array_equal(returns.to_numpy(), expected.to_numpy())
+
+
+def test_returns_into_an_array_are_bit_identical_to_pandas(prices):
+    out = np.empty((len(prices), 5 * len(PERIODS)))
+    assert Returns.returns(prices, PERIODS, 'h', return_full=False, out=out) is out
+    np.testing.assert_array_equal(out, _pandas_returns(prices, PERIODS, True).to_numpy())
+
+
+def test_returns_into_a_fortran_array_are_written_in_place(prices):
+    out = np.empty((len(prices), 5 * len(PERIODS)), order='F')
+    assert Returns.returns(prices, PERIODS, 'h', return_full=False, out=out) is out
+    np.testing.assert_array_equal(out, _pandas_returns(prices, PERIODS, True).to_numpy())
+
+
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_returns_into_an_array_require_return_full_false(prices, dtype):
+    out = np.empty((len(prices), 5 * len(PERIODS)), dtype=dtype)
+    with pytest.raises(ValueError, match='return_full'):
+        Returns.returns(prices, PERIODS, 'h', out=out)
+
+
+def test_streaming_returns_match_batch_returns(prices):
+    streamed = StreamingReturns(PERIODS, 'h').warmup(prices)
+    expected = Returns.returns(prices, PERIODS, 'h', return_full=False)
+    np.testing.assert_array_equal(streamed[expected.columns].to_numpy(), expected.to_numpy())
+
+
+@pytest.mark.parametrize('lags', [[0], [3], [1, 2, 3], [6, 4, 2], [0, 5], [1, 2, 24, 168], [3, 1, 2]])
+def test_lag_matrix_matches_lagged_returns(prices, lags):
+    matrix = Returns.lagged_returns(prices, lags, 'h', as_matrix=True)
+    expected = Returns.lagged_returns(prices, lags, 'h', return_full=False)
+
+    assert matrix.values.shape == (len(prices), 5, len(lags))
+    assert matrix.names == list(expected.columns)
+    pd.testing.assert_frame_equal(matrix.to_frame(), expected)
+    np.testing.assert_array_equal(matrix.to_numpy(), expected.to_numpy())
+    names = expected.columns[::-3].tolist()
+    pd.testing.assert_frame_equal(matrix.to_frame(names), expected[names])
+
+
+def test_evenly_spaced_lags_are_views_of_one_block(prices):
+    matrix = Returns.lagged_returns(prices, [1, 2, 3], 'h', columns=['close'], as_matrix=True)
+    series = matrix['close_return_1h_lag_2']
+    assert np.shares_memory(series.to_numpy(), matrix.values)
+    # Lag 2 of row t is lag 1 of row t - 1 in the same memory
+    assert np.shares_memory(matrix.values[1:, 0, 0], matrix.values[:-1, 0, 1])
+    pd.testing.assert_series_equal(series, Returns.lagged_returns(prices, [2], 'h', columns=['close'],
+                                                                  return_full=False)['close_return_1h_lag_2'])
+
+
+def test_lag_matrix_rejects_negative_lags(prices):
+    with pytest.raises(ValueError, match='non-negative'):
+        Returns.lagged_returns(prices, [-1, 1], 'h', as_matrix=True)
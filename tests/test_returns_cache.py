@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from xtrader.factors.cache import RETURNS_CACHE
+from xtrader.factors.momenta import Momenta
+from xtrader.factors.returns import Returns
+
+
+def _prices(n: int = 500) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    index = pd.date_range('2021-01-01', periods=n, freq='h')
+    return pd.DataFrame({'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close}, index=index)
+
+
+def test_lagged_returns_see_in_place_modifications():
+    prices = _prices()
+    before = Returns.lagged_returns(prices, [1], 'h', columns=['close'], return_full=False)
+    prices.loc[prices.index[100], 'close'] = 1000.0
+    after = Returns.lagged_returns(prices, [1], 'h', columns=['close'], return_full=False)
+
+    expected = prices['close'].pct_change(1).shift(1)
+    np.testing.assert_allclose(after['close_return_1h_lag_1'], expected, rtol=1e-12)
+    assert not np.allclose(before['close_return_1h_lag_1'], after['close_return_1h_lag_1'], equal_nan=True)
+
+
+def test_cache_is_scoped():
+    prices = _prices()
+    RETURNS_CACHE.clear()
+    Returns.lagged_returns(prices, [1, 2], 'h', columns=['close'])
+    assert len(RETURNS_CACHE) == 0
+
+    with RETURNS_CACHE.scope():
+        lagged = Returns.lagged_returns(prices, [1, 2], 'h', columns=['close'], return_full=False)
+        momenta = Momenta.momenta(prices, [2, 3], 'h', columns=['close'], return_full=False)
+        assert RETURNS_CACHE.info()['hits'] == 1
+    assert len(RETURNS_CACHE) == 0
+
+    np.testing.assert_allclose(lagged['close_return_1h_lag_2'], prices['close'].pct_change(1).shift(2), rtol=1e-12)
+    uncached = Momenta.momenta(prices, [2, 3], 'h', columns=['close'], return_full=False)
+    pd.testing.assert_frame_equal(momenta, uncached)
+
+
+def test_reassigned_column_is_not_served_from_cache():
+    prices = _prices()
+    with RETURNS_CACHE.scope():
+        Returns.lagged_returns(prices, [1], 'h', columns=['close'])
+        prices['close'] = prices['close'] * 2 + 1
+        after = Returns.lagged_returns(prices, [1], 'h', columns=['close'], return_full=False)
+    np.testing.assert_allclose(after['close_return_1h_lag_1'], prices['close'].pct_change(1).shift(1), rtol=1e-12)
@@ -0,0 +1,93 @@
+import json
+import multiprocessing
+import threading
+
+import pytest
+import requests
+
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+
+from xtrader.apis.scheduler import QuotaExceededError
+from xtrader.apis.scheduler import RequestScheduler
+from xtrader.apis.scheduler import _key_id
+from xtrader.apis.utils import HTTPTransport
+
+
+def _acquire(state_path: str, calls: int) -> None:
+    scheduler = RequestScheduler(['key'], per_minute=100, per_day=None, state_path=state_path)
+    for _ in range(calls):
+        scheduler.acquire()
+
+
+def test_processes_share_the_quotas_of_the_state_file(tmp_path):
+    state_path = str(tmp_path / 'quota.json')
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=_acquire, args=(state_path, 10)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    with open(state_path) as file:
+        assert len(json.load(file)[_key_id('key')]['calls']) == 40
+    scheduler = RequestScheduler(['key'], per_minute=40, per_day=None, state_path=state_path, max_wait=0)
+    assert scheduler.remaining()[_key_id('key')]['minute'] == 0
+    with pytest.raises(QuotaExceededError):
+        scheduler.acquire()
+
+
+def test_schedulers_opened_before_a_call_see_it(tmp_path):
+    state_path = str(tmp_path / 'quota.json')
+    first, second = [RequestScheduler(['key'], per_minute=3, per_day=None, state_path=state_path, max_wait=0)
+                     for _ in range(2)]
+    for scheduler in [first, second, first]:
+        scheduler.acquire()
+    with pytest.raises(QuotaExceededError):
+        second.acquire()
+
+
+def test_schedulers_with_different_keys_share_the_state_file(tmp_path):
+    state_path = str(tmp_path / 'quota.json')
+    first = RequestScheduler(['first'], per_minute=2, per_day=None, state_path=state_path, max_wait=0)
+    second = RequestScheduler(['second'], per_minute=2, per_day=None, state_path=state_path, max_wait=0)
+    for scheduler in [first, second, first, second]:
+        scheduler.acquire()
+
+    with open(state_path) as file:
+        state = json.load(file)
+    assert {key: len(usage['calls']) for key, usage in state.items()} == {_key_id('first'): 2, _key_id('second'): 2}
+    with pytest.raises(QuotaExceededError):
+        RequestScheduler(['first'], per_minute=2, per_day=None, state_path=state_path, max_wait=0).acquire()
+
+
+class _TooManyRequests(BaseHTTPRequestHandler):
+    hits = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        self.send_response(429)
+        self.send_header('Retry-After', '0')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def test_scheduler_does_not_retry_throttled_calls():
+    server = HTTPServer(('127.0.0.1', 0), _TooManyRequests)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        scheduler = RequestScheduler(['key'], per_minute=100, per_day=None)
+        with pytest.raises(requests.HTTPError):
+            scheduler.get(f'http://127.0.0.1:{server.server_port}/query')
+        assert _TooManyRequests.hits == 1
+    finally:
+        server.shutdown()
+
+
+def test_scheduler_rejects_a_transport_that_retries_sent_calls():
+    with pytest.raises(ValueError, match='retry_sent'):
+        RequestScheduler(['key'], transport=HTTPTransport())
+    assert not RequestScheduler(['key'], transport=HTTPTransport(retry_sent=False)).transport.retry_sent
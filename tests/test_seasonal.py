@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_prices
+from xtrader.factors.seasonal import Seasonal
+
+COLUMNS = ['month', 'day', 'day_of_week', 'week_of_year', 'quarter', 'year']
+
+
+def _pandas_indicators(index: pd.DatetimeIndex) -> pd.DataFrame:
+    """ Time indicators computed by pandas field by field, as the original implementation did. """
+    return pd.DataFrame({'month': index.month, 'day': index.day, 'day_of_week': index.dayofweek,
+                         'week_of_year': index.isocalendar().week.astype(float).to_numpy(),
+                         'quarter': index.quarter, 'year': index.year}, index=index, dtype=float)
+
+
+@pytest.mark.parametrize('tz', [None, 'UTC', 'Asia/Tokyo'])
+def test_time_indicators_match_pandas(tz):
+    prices = make_prices(tz=tz)
+    indicators = Seasonal.time_indicators(prices, return_full=False)
+    pd.testing.assert_frame_equal(indicators.astype(float), _pandas_indicators(prices.index))
+
+
+@pytest.mark.parametrize('tz', [None, 'Asia/Tokyo'])
+def test_time_indicators_of_nat_are_missing(tz):
+    prices = make_prices(n_rows=48, tz=tz)
+    prices.index = prices.index.where(np.arange(len(prices)) % 7 != 3)
+    indicators = Seasonal.time_indicators(prices, return_full=False, cyclical=True, flags=True)
+
+    pd.testing.assert_frame_equal(indicators[COLUMNS], _pandas_indicators(prices.index))
+    assert indicators[pd.isna(prices.index)].isna().all().all()
+    assert indicators[pd.notna(prices.index)].notna().all().all()
+
+
+def test_time_indicators_of_all_nat_index():
+    prices = make_prices(n_rows=3)
+    prices.index = pd.DatetimeIndex([pd.NaT] * 3, name='date')
+    assert Seasonal.time_indicators(prices, return_full=False, flags=True).isna().all().all()
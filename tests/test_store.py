@@ -0,0 +1,76 @@
+import os
+import multiprocessing
+
+import pandas as pd
+import pytest
+
+from conftest import make_prices
+from xtrader.dataloaders import store as store_module
+from xtrader.dataloaders.store import OHLCVStore
+
+
+def _prices(seed: int) -> pd.DataFrame:
+    return make_prices(n_rows=100, seed=seed).select_dtypes('number')
+
+
+def test_write_replaces_the_store_and_keeps_opened_versions(tmp_path):
+    root = str(tmp_path / 'store')
+    first, second = _prices(0), _prices(1)
+    opened = OHLCVStore.write(first, root)
+    OHLCVStore.write(second, root)
+
+    pd.testing.assert_frame_equal(opened.frame(), first, check_freq=False, check_index_type=False)
+    pd.testing.assert_frame_equal(OHLCVStore(root).frame(), second, check_freq=False, check_index_type=False)
+    assert sorted(os.listdir(root)) == ['CURRENT', os.path.basename(OHLCVStore(root).directory)]
+
+
+def test_failed_write_leaves_the_previous_store(tmp_path, monkeypatch):
+    root = str(tmp_path / 'store')
+    prices = _prices(0)
+    OHLCVStore.write(prices, root)
+    entries = sorted(os.listdir(root))
+
+    def fail(path, values):
+        raise OSError('No space left on device')
+
+    monkeypatch.setattr(store_module.np, 'save', fail)
+    with pytest.raises(OSError):
+        OHLCVStore.write(_prices(1), root)
+    monkeypatch.undo()
+
+    assert sorted(os.listdir(root)) == entries
+    pd.testing.assert_frame_equal(OHLCVStore(root).frame(), prices, check_freq=False, check_index_type=False)
+
+
+def _write(root: str, seed: int) -> None:
+    OHLCVStore.write(_prices(seed), root)
+
+
+def test_concurrent_writes_leave_a_single_version(tmp_path):
+    root = str(tmp_path / 'store')
+    OHLCVStore.write(_prices(0), root)
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=_write, args=(root, seed)) for seed in range(1, 9)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert all(process.exitcode == 0 for process in processes)
+    assert sorted(os.listdir(root)) == ['CURRENT', os.path.basename(OHLCVStore(root).directory)]
+
+
+def test_write_removes_versions_left_by_killed_writers(tmp_path):
+    root = str(tmp_path / 'store')
+    OHLCVStore.write(_prices(0), root)
+    os.makedirs(os.path.join(root, 'v-orphan'))
+    OHLCVStore.write(_prices(1), root)
+    assert sorted(os.listdir(root)) == ['CURRENT', os.path.basename(OHLCVStore(root).directory)]
+
+
+def test_exists(tmp_path):
+    root = str(tmp_path / 'store')
+    assert not OHLCVStore.exists(root)
+    OHLCVStore.write(_prices(0), root)
+    assert OHLCVStore.exists(root)
+    assert not OHLCVStore.exists(str(tmp_path))
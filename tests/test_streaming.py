@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_prices
+from xtrader.factors.streaming import StreamingBBands
+from xtrader.factors.streaming import StreamingRSI
+from xtrader.factors.streaming import _StreamingFactor
+from xtrader.factors.technical import Technical
+
+
+def test_streaming_factor_requires_update():
+    class Incomplete(_StreamingFactor):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+@pytest.mark.parametrize('time_period', [5, 21])
+def test_streaming_bbands_recover_after_nan_bars(time_period):
+    prices = make_prices(n_rows=500)
+    prices.iloc[[30, 31, 200, 201 + time_period], prices.columns.get_loc('close')] = np.nan
+
+    streamed = StreamingBBands(time_period, columns=['close']).warmup(prices)
+    expected = Technical.bbands(prices, time_period, columns=['close'], return_full=False)
+    pd.testing.assert_frame_equal(streamed, expected, check_dtype=False, rtol=1e-8)
+    assert streamed.iloc[-1].notna().all()
+
+
+@pytest.mark.parametrize('time_period', [5, 21])
+def test_streaming_rsi_skips_leading_nan_bars(time_period):
+    prices = make_prices(n_rows=300)
+    prices.iloc[:10, prices.columns.get_loc('close')] = np.nan
+    prices.iloc[:3, prices.columns.get_loc('open')] = np.nan
+
+    streamed = StreamingRSI(time_period, columns=['open', 'close']).warmup(prices)
+    expected = Technical.rsi(prices, time_period, columns=['open', 'close'], return_full=False)
+    pd.testing.assert_frame_equal(streamed, expected, check_dtype=False, rtol=1e-8)
+    assert streamed[f'close_rsi_{time_period}'].first_valid_index() == prices.index[10 + time_period]
+
+
+def test_streaming_bbands_at_high_price_levels():
+    prices = make_prices(n_rows=2000)
+    # Prices around 1e6 that move by about 0.006
+    prices['close'] = 1e6 + (prices['close'] - prices['close'].mean()) / prices['close'].std() * 0.006
+
+    streamed = StreamingBBands(21, columns=['close']).warmup(prices)
+    expected = Technical.bbands(prices, 21, columns=['close'], return_full=False)
+    width = (expected['close_bbands_21_2_2_up'] - expected['close_bbands_21_2_2_mid']).dropna()
+    assert (width > 0).all()
+    pd.testing.assert_frame_equal(streamed - expected['close_bbands_21_2_2_mid'].to_numpy()[:, None],
+                                  expected - expected['close_bbands_21_2_2_mid'].to_numpy()[:, None],
+                                  check_dtype=False, rtol=1e-6, atol=1e-9)
+
+
+def test_streaming_rsi_after_a_nan_bar():
+    prices = make_prices(n_rows=300)
+    prices.iloc[150, prices.columns.get_loc('close')] = np.nan
+
+    streamed = StreamingRSI(14, columns=['close']).warmup(prices)
+    expected = Technical.rsi(prices, 14, columns=['close'], return_full=False)
+    pd.testing.assert_frame_equal(streamed, expected, check_dtype=False, rtol=1e-8)
+    assert streamed.iloc[150:].isna().all().all()
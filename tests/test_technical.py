@@ -0,0 +1,17 @@
+import numpy as np
+
+from conftest import make_prices
+from xtrader.factors import kernels
+from xtrader.factors.technical import Technical
+
+
+def test_every_column_is_calculated_from_its_own_values():
+    prices = make_prices(n_rows=200)
+    rsi = Technical.rsi(prices, 14, columns=['open', 'volume'], return_full=False)
+    bbands = Technical.bbands(prices, 14, columns=['volume'], return_full=False)
+
+    for column in ['open', 'volume']:
+        np.testing.assert_allclose(rsi[f'{column}_rsi_14'], kernels.rsi(prices[column].to_numpy(), [14])[14])
+    np.testing.assert_allclose(bbands['volume_bbands_14_2_2_mid'], prices['volume'].rolling(14).mean())
+    assert not np.allclose(rsi['open_rsi_14'].dropna(), Technical.rsi(prices, 14, columns=['close'],
+                                                                      return_full=False)['close_rsi_14'].dropna())
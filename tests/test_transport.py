@@ -0,0 +1,132 @@
+import gzip
+import multiprocessing
+import threading
+
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import pytest
+import requests
+
+from xtrader.apis import utils
+from xtrader.apis.utils import HTTPTransport
+from xtrader.apis.utils import call_api
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """ Answers with the statuses queued on the server, then 200, and records the requests. """
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append({'port': self.client_address[1], 'path': self.path, 'headers': dict(self.headers)})
+        status = server.statuses.pop(0) if server.statuses else 200
+        body = gzip.compress(b'{"ok": true}')
+        self.send_response(status)
+        self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    server.requests, server.statuses = [], []
+    server.url = f'http://127.0.0.1:{server.server_address[1]}/query'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_connections_are_reused_and_responses_compressed(server):
+    with HTTPTransport() as transport:
+        responses = [call_api(server.url, {'symbol': 'IBM', 'n': n}, transport) for n in range(5)]
+
+    assert [response.json() for response in responses] == [{'ok': True}] * 5
+    assert len({request['port'] for request in server.requests}) == 1
+    assert server.requests[0]['path'] == '/query?symbol=IBM&n=0'
+    assert 'gzip' in server.requests[0]['headers']['Accept-Encoding']
+    assert server.requests[0]['headers']['User-Agent'] == 'xtrader'
+
+
+def test_transient_errors_are_retried(server):
+    server.statuses = [503, 502]
+    with HTTPTransport(backoff_factor=0) as transport:
+        assert transport.get(server.url).status_code == 200
+    assert len(server.requests) == 3
+
+
+def test_error_statuses_raise_once_the_retries_are_exhausted(server):
+    server.statuses = [503] * 3
+    with HTTPTransport(retries=2, backoff_factor=0) as transport:
+        with pytest.raises(requests.HTTPError, match='503'):
+            transport.get(server.url)
+    assert len(server.requests) == 3
+
+
+def test_requests_that_reached_the_server_are_not_retried_without_retry_sent(server):
+    server.statuses = [503]
+    with HTTPTransport(backoff_factor=0, retry_sent=False) as transport:
+        with pytest.raises(requests.HTTPError):
+            transport.get(server.url)
+    assert len(server.requests) == 1
+
+
+def test_call_api_raises_for_client_errors(server):
+    server.statuses = [404]
+    with HTTPTransport() as transport:
+        with pytest.raises(requests.HTTPError, match='404'):
+            call_api(server.url, {}, transport)
+    assert len(server.requests) == 1
+
+
+def test_close_drops_the_session_until_the_next_request(server):
+    transport = HTTPTransport()
+    session = transport.session
+    assert transport.session is session
+    transport.close()
+    assert transport._session is None
+    transport.get(server.url)
+    assert transport.session is not session
+    transport.close()
+
+
+def _uses_a_new_session(transport: HTTPTransport) -> None:
+    inherited = transport._session
+    raise SystemExit(0 if inherited is not None and transport.session is not inherited else 1)
+
+
+def test_forked_processes_create_their_own_session():
+    transport = HTTPTransport()
+    session = transport.session
+    process = multiprocessing.get_context('fork').Process(target=_uses_a_new_session, args=(transport,))
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+    assert transport.session is session
+    transport.close()
+
+
+def test_replace_keeps_the_other_settings():
+    transport = HTTPTransport(timeout=(1.0, 2.0), pool_connections=2, retries=5, backoff_factor=0.1,
+                              headers={'X-Team': 'quant'}, retry_sent=False)
+    replaced = transport.replace(pool_maxsize=64)
+    assert replaced is not transport and replaced.pool_maxsize == 64 and transport.pool_maxsize == utils.POOL_SIZE
+    assert (replaced.timeout, replaced.pool_connections, replaced.retries, replaced.backoff_factor,
+            replaced.headers, replaced.retry_sent) == ((1.0, 2.0), 2, 5, 0.1, transport.headers, False)
+
+
+def test_configure_transport_closes_the_previous_one(monkeypatch):
+    previous = HTTPTransport()
+    previous.session
+    monkeypatch.setattr(utils, '_TRANSPORT', previous)
+    configured = utils.configure_transport(timeout=5.0)
+    assert utils.get_transport() is configured and configured.timeout == 5.0
+    assert previous._session is None
+    configured.close()
@@ -11,6 +11,7 @@ from xtrader import databricks
 
 __all__ = ['apis',
            'factors',
+           'instrumentation',
            'dataloaders',
            'databricks'
            'utils']
\ No newline at end of file
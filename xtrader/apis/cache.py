@@ -0,0 +1,254 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+import requests
+
+from contextlib import contextmanager
+from requests.structures import CaseInsensitiveDict
+from typing import Dict
+from typing import Iterator
+from typing import Optional
+from typing import Tuple
+from urllib.parse import parse_qsl
+from urllib.parse import urlencode
+from urllib.parse import urlsplit
+from urllib.parse import urlunsplit
+
+from xtrader.apis.rest.format import ERROR_KEYS
+from xtrader.apis.utils import HTTPTransport
+from xtrader.apis.utils import get_transport
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+# Time to live of the responses of every AlphaVantage function, in seconds
+TTLS = {
+    # Quarterly fundamentals
+    'OVERVIEW': 3 * DAY, 'INCOME_STATEMENT': 3 * DAY, 'BALANCE_SHEET': 3 * DAY, 'CASH_FLOW': 3 * DAY,
+    'EARNINGS': 3 * DAY, 'LISTING_STATUS': 12 * HOUR, 'EARNINGS_CALENDAR': 12 * HOUR, 'IPO_CALENDAR': 12 * HOUR,
+    # Monthly, quarterly and annual macro series
+    'REAL_GDP': 6 * HOUR, 'REAL_GDP_PER_CAPITA': 6 * HOUR, 'CPI': 6 * HOUR, 'INFLATION': 6 * HOUR,
+    'RETAIL_SALES': 6 * HOUR, 'DURABLES': 6 * HOUR, 'UNEMPLOYMENT': 6 * HOUR, 'NONFARM_PAYROLL': 6 * HOUR,
+    'TREASURY_YIELD': HOUR, 'FEDERAL_FUNDS_RATE': HOUR,
+    # Daily, weekly and monthly time series
+    'TIME_SERIES_DAILY': HOUR, 'TIME_SERIES_DAILY_ADJUSTED': HOUR, 'FX_DAILY': HOUR, 'DIGITAL_CURRENCY_DAILY': HOUR,
+    'TIME_SERIES_WEEKLY': 6 * HOUR, 'TIME_SERIES_WEEKLY_ADJUSTED': 6 * HOUR, 'FX_WEEKLY': 6 * HOUR,
+    'DIGITAL_CURRENCY_WEEKLY': 6 * HOUR, 'TIME_SERIES_MONTHLY': 6 * HOUR, 'TIME_SERIES_MONTHLY_ADJUSTED': 6 * HOUR,
+    'FX_MONTHLY': 6 * HOUR, 'DIGITAL_CURRENCY_MONTHLY': 6 * HOUR,
+    # Intraday and realtime data
+    'TIME_SERIES_INTRADAY': MINUTE, 'FX_INTRADAY': MINUTE, 'CRYPTO_INTRADAY': MINUTE,
+    'CURRENCY_EXCHANGE_RATE': 10, 'MARKET_STATUS': MINUTE, 'NEWS_SENTIMENT': 5 * MINUTE, 'SYMBOL_SEARCH': DAY,
+}
+# Default path of the cache, overridden by the XTRADER_RESPONSE_CACHE environment variable
+RESPONSE_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'xtrader', 'responses.sqlite3')
+# Default maximum size of the cached responses, in bytes
+MAX_BYTES = 1 << 30
+# Parameters left out of the keys of the responses
+IGNORED_PARAMS = ['apikey']
+# Size under which a response is parsed to check for an error payload, error payloads are short
+ERROR_PAYLOAD_SIZE = 4096
+# Number of hits whose access times and counts are kept in memory before they are written
+TOUCH_BATCH_SIZE = 64
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY, function TEXT, url TEXT, content BLOB, headers TEXT,
+    size INTEGER, expires REAL, accessed REAL);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+CREATE TABLE IF NOT EXISTS stats (
+    function TEXT PRIMARY KEY, hits INTEGER DEFAULT 0, misses INTEGER DEFAULT 0, evictions INTEGER DEFAULT 0);
+"""
+
+
+def _normalize(params: Optional[dict]) -> Dict[str, str]:
+    """ Returns the parameters as strings sorted by name, without the ignored and the None ones. """
+    return {name: str(value) for name, value in sorted((params or {}).items())
+            if value is not None and name not in IGNORED_PARAMS}
+
+
+def _stored_url(url: str, params: Optional[dict] = None) -> str:
+    """ Returns the URL of a request with the normalized parameters, so that the API key is not written to disk. """
+    parts = urlsplit(url)
+    query = [(name, value) for name, value in parse_qsl(parts.query) if name not in IGNORED_PARAMS]
+    query += list(_normalize(params).items())
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _is_error(content: bytes) -> bool:
+    """ Checks if the content is an AlphaVantage error or call limit payload, which is never cached. """
+    if len(content) > ERROR_PAYLOAD_SIZE:
+        return False
+    try:
+        payload = json.loads(content)
+    except ValueError:
+        return False
+    return isinstance(payload, dict) and any(key in payload for key in ERROR_KEYS)
+
+
+class ResponseCache(object):
+
+    def __init__(self, path: Optional[str] = None, ttls: Optional[Dict[str, float]] = None,
+                 max_bytes: int = MAX_BYTES, transport: Optional[HTTPTransport] = None):
+        """
+        Initializes the `ResponseCache` class, an on-disk cache of the API responses used as the transport of the
+        clients, e.g. `AlphaVantageFundamentalsAPI(api_key, transport=ResponseCache())`. Responses are keyed by
+        the URL and the normalized parameters without the API key, so every key shares the entries, and are kept
+        for the time to live of their `function`. Functions without a TTL and error payloads are never cached.
+        The least recently used responses are evicted beyond `max_bytes`. The entries live in a SQLite database
+        in WAL mode, so processes can share the cache, and hits, misses and evictions are counted per function.
+        Hits only read the database: their access times and counts are written in batches, with the next stored
+        response or every `TOUCH_BATCH_SIZE` hits, so readers never wait for the write lock.
+
+        :param path: Path of the database. Defaults to $XTRADER_RESPONSE_CACHE or ~/.cache/xtrader/responses.sqlite3.
+        :param ttls: TTLs in seconds by function, updating `TTLS`. A TTL of 0 disables the cache of a function.
+        :param max_bytes: Maximum size of the cached responses.
+        :param transport: Transport of the requests that miss the cache, e.g. a `RequestScheduler`.
+                          Defaults to the shared one.
+        """
+        self.path = path or os.environ.get('XTRADER_RESPONSE_CACHE', RESPONSE_CACHE_PATH)
+        self.ttls = {**TTLS, **(ttls or {})}
+        self.max_bytes = max_bytes
+        self.transport = transport
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._touches: Dict[str, float] = {}
+        self._counts: Dict[Tuple[str, str], int] = {}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._connection().executescript(SCHEMA)
+
+    @property
+    def pool_maxsize(self) -> int:
+        """ Returns the number of pooled connections of the transport. """
+        return (self.transport or get_transport()).pool_maxsize
+
+    def key(self, url: str, params: Optional[dict] = None) -> str:
+        """ Returns the key of a request. """
+        source = json.dumps([url, _normalize(params)])
+        return hashlib.blake2b(source.encode(), digest_size=16).hexdigest()
+
+    def get(self, url: str, params: Optional[dict] = None) -> requests.Response:
+        """ Returns the cached response of a request, or sends it and caches the response. """
+        function = str((params or {}).get('function', ''))
+        ttl = self.ttls.get(function, 0)
+        if ttl <= 0:
+            return (self.transport or get_transport()).get(url, params=params)
+
+        key = self.key(url, params)
+        now = time.time()
+        row = self._connection().execute('SELECT url, content, headers FROM responses WHERE key = ? AND expires > ?',
+                                         (key, now)).fetchone()
+        with self._lock:
+            counter = (function, 'hits' if row is not None else 'misses')
+            self._counts[counter] = self._counts.get(counter, 0) + 1
+            if row is not None:
+                self._touches[key] = now
+            full = len(self._touches) >= TOUCH_BATCH_SIZE
+        if full:
+            with self._transaction() as connection:
+                self._flush(connection)
+        if row is not None:
+            return self._response(*row)
+
+        response = (self.transport or get_transport()).get(url, params=params)
+        if not _is_error(response.content):
+            self._store(key, function, _stored_url(url, params), response, ttl)
+        return response
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Returns the hits, misses and evictions of every function, counted across all processes. The hits of other
+        processes that are not written yet are left out.
+        """
+        with self._transaction() as connection:
+            self._flush(connection)
+        rows = self._connection().execute('SELECT function, hits, misses, evictions FROM stats ORDER BY function')
+        return {function: {'hits': hits, 'misses': misses, 'evictions': evictions}
+                for function, hits, misses, evictions in rows}
+
+    def size(self) -> int:
+        """ Returns the size of the cached responses, in bytes. """
+        return self._connection().execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def invalidate(self, function: Optional[str] = None) -> None:
+        """ Removes the cached responses of a function, or all of them. """
+        with self._transaction() as connection:
+            if function is None:
+                connection.execute('DELETE FROM responses')
+            else:
+                connection.execute('DELETE FROM responses WHERE function = ?', (function,))
+
+    def _store(self, key: str, function: str, url: str, response: requests.Response, ttl: float) -> None:
+        """ Stores a response, then evicts the expired responses and the least recently used beyond the size. """
+        now = time.time()
+        content = response.content
+        headers = json.dumps({name: value for name, value in response.headers.items()
+                              if name.lower() in ['content-type', 'date']})
+        with self._transaction() as connection:
+            # The access times of the hits decide what is evicted
+            self._flush(connection)
+            connection.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                               (key, function, url, content, headers, len(content), now + ttl, now))
+            connection.execute('DELETE FROM responses WHERE expires <= ?', (now,))
+            excess = connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0] - self.max_bytes
+            if excess > 0:
+                evicted = []
+                for evicted_key, evicted_function, size in connection.execute(
+                        'SELECT key, function, size FROM responses ORDER BY accessed'):
+                    if excess <= 0:
+                        break
+                    evicted.append((evicted_key, evicted_function))
+                    excess -= size
+                connection.executemany('DELETE FROM responses WHERE key = ?', [(k,) for k, _ in evicted])
+                for _, evicted_function in evicted:
+                    self._count(connection, evicted_function, 'evictions')
+
+    @staticmethod
+    def _count(connection: sqlite3.Connection, function: str, counter: str, count: int = 1) -> None:
+        connection.execute(f'INSERT INTO stats (function, {counter}) VALUES (?, ?) '
+                           f'ON CONFLICT (function) DO UPDATE SET {counter} = {counter} + ?', (function, count, count))
+
+    def _flush(self, connection: sqlite3.Connection) -> None:
+        """ Writes the access times and the counts of the hits and misses kept in memory. """
+        with self._lock:
+            touches, self._touches = self._touches, {}
+            counts, self._counts = self._counts, {}
+        connection.executemany('UPDATE responses SET accessed = MAX(accessed, ?) WHERE key = ?',
+                               [(accessed, key) for key, accessed in touches.items()])
+        for (function, counter), count in counts.items():
+            self._count(connection, function, counter, count)
+
+    @staticmethod
+    def _response(url: str, content: bytes, headers: str) -> requests.Response:
+        """ Rebuilds a cached response. """
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = content
+        response.headers = CaseInsensitiveDict(json.loads(headers))
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers) or 'utf-8'
+        return response
+
+    def _connection(self) -> sqlite3.Connection:
+        """ Returns the connection of the current thread and process, SQLite connections cannot be shared. """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """ Runs statements in a transaction that takes the write lock upfront, so concurrent writers wait. """
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
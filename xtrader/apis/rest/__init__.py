@@ -4,5 +4,7 @@ from xtrader.apis.rest import forex
 from xtrader.apis.rest import news
 from xtrader.apis.rest import macroeconomic
 from xtrader.apis.rest import fundamentals
+from xtrader.apis.rest import asyncapi
+from xtrader.apis.rest import history
 
-__all__ = ['stocks', 'crypto', 'forex', 'news', 'macroeconomic', 'fundamentals']
\ No newline at end of file
+__all__ = ['stocks', 'crypto', 'forex', 'news', 'macroeconomic', 'fundamentals', 'asyncapi', 'history']
\ No newline at end of file
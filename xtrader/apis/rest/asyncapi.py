@@ -0,0 +1,185 @@
+import asyncio
+import functools
+import pandas as pd
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Iterable
+from typing import Optional
+
+from xtrader.apis.rest.crypto.alphavantage import AlphaVantageCryptoAPI
+from xtrader.apis.rest.forex.alphavantage import AlphaVantageForexAPI
+from xtrader.apis.rest.format import AV_response_format
+from xtrader.apis.rest.fundamentals.alphavantage import AlphaVantageFundamentalsAPI
+from xtrader.apis.rest.macroeconomic.alphavantage import AlphaVantageMacroAPI
+from xtrader.apis.rest.news.alphavantage import AlphaVantageNewsSentimentAPI
+from xtrader.apis.rest.stocks.alphavantage import AlphaVantageStockAPI
+from xtrader.apis.utils import HTTPTransport
+from xtrader.apis.utils import get_transport
+
+# Default number of requests in flight
+CONCURRENCY = 8
+
+
+class BulkResult(object):
+
+    def __init__(self, results: Dict[Hashable, Any], errors: Dict[Hashable, Exception]):
+        """
+        Initializes the `BulkResult` class, the result of `AsyncAPI.fetch_many`.
+
+        :param results: Parsed responses of the items that succeeded, in the order of the items.
+        :param errors: Exceptions of the items that failed.
+        """
+        self.results = results
+        self.errors = errors
+
+    @property
+    def ok(self) -> bool:
+        """ Returns True if no item failed. """
+        return not self.errors
+
+    def panel(self, symbol: str = 'symbol') -> pd.DataFrame:
+        """
+        Returns the time series of the items that succeeded as a long panel with a symbol column,
+        sorted by symbol and date as `Panel` expects.
+
+        :param symbol: Name of the symbol column.
+        """
+        frames = [frame.assign(**{symbol: name if isinstance(name, str) else '/'.join(name)})
+                  for name, frame in self.results.items() if isinstance(frame, pd.DataFrame)]
+        if not frames:
+            return pd.DataFrame(columns=['date', symbol])
+        panel = pd.concat(frames, ignore_index=True)
+        return panel.sort_values([symbol, 'date'], kind='stable').set_index('date')
+
+    def __repr__(self) -> str:
+        return f"BulkResult(results={len(self.results)}, errors={len(self.errors)})"
+
+
+class AsyncAPI(object):
+    client_class: Callable[..., Any] = None
+
+    def __init__(self, api_key: str, concurrency: int = CONCURRENCY, transport: Optional[HTTPTransport] = None):
+        """
+        Initializes the `AsyncAPI` class, the asyncio counterpart of an AlphaVantage client: every public method
+        of the client is available as a coroutine function with the same arguments, validation and return value,
+        e.g. `await api.get_daily('IBM')`. The requests are sent by a pool of `concurrency` threads over the
+        pooled keep-alive session of the transport, so at most `concurrency` requests are in flight whatever the
+        number of pending coroutines.
+
+        :param api_key: AlphaVantage API key.
+        :param concurrency: Maximum number of requests in flight.
+        :param transport: Transport of the requests. Defaults to the shared one, or to a copy of it with a pool
+                          of `concurrency` connections if the shared pool is smaller, which is closed with the client.
+        """
+        if concurrency < 1:
+            raise ValueError("`concurrency` must be at least 1")
+        # The transport created for the client, closed by `close`
+        self._transport: Optional[HTTPTransport] = None
+        if transport is None:
+            transport = get_transport()
+            if transport.pool_maxsize < concurrency:
+                transport = self._transport = transport.replace(pool_maxsize=concurrency)
+        self.concurrency = concurrency
+        self.client = self.client_class(api_key, transport=transport)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        method = getattr(self.client, name)
+        if not callable(method):
+            return method
+
+        @functools.wraps(method)
+        async def call(*args, **kwargs) -> Any:
+            return await self._run(method, *args, **kwargs)
+        return call
+
+    async def fetch_many(self, method: str, items: Iterable[Any], parse: bool = True, **kwargs) -> BulkResult:
+        """
+        Calls a method of the client for many items concurrently, e.g. the daily bars of 2,000 symbols with
+        `await api.fetch_many('get_daily', symbols, outputsize='full')`. A failed item is reported in the errors
+        of the result and does not abort the others.
+
+        :param method: Name of the method of the client, e.g. 'get_daily'.
+        :param items: Items passed as the first argument of the method, e.g. symbols, or tuples of positional
+                      arguments, e.g. ('EUR', 'USD') for forex pairs.
+        :param parse: If True, the responses are parsed by `AV_response_format`, into frames for time series.
+        :param kwargs: Keyword arguments passed to every call.
+        """
+        function = getattr(self.client, method)
+        items = list(dict.fromkeys(items))
+
+        async def fetch(item: Any) -> Any:
+            args = item if isinstance(item, tuple) else (item,)
+            response = await self._run(function, *args, **kwargs)
+            return AV_response_format(response) if parse else response
+
+        outcomes = await asyncio.gather(*[fetch(item) for item in items], return_exceptions=True)
+        results, errors = {}, {}
+        for item, outcome in zip(items, outcomes):
+            if isinstance(outcome, Exception):
+                errors[item] = outcome
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                results[item] = outcome
+        return BulkResult(results, errors)
+
+    def close(self) -> None:
+        """
+        Shuts the threads of the client down and closes the connections of the transport created for the client.
+        Both are started again on the next request.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._transport is not None:
+            self._transport.close()
+
+    async def __aenter__(self) -> 'AsyncAPI':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    async def _run(self, function: Callable[..., Any], *args, **kwargs) -> Any:
+        """ Runs a blocking method of the client in the thread pool. """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='xtrader-api')
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(function, *args, **kwargs))
+
+
+class AsyncAlphaVantageStockAPI(AsyncAPI):
+    """ Asyncio counterpart of `AlphaVantageStockAPI`. """
+    client_class = AlphaVantageStockAPI
+
+
+class AsyncAlphaVantageCryptoAPI(AsyncAPI):
+    """ Asyncio counterpart of `AlphaVantageCryptoAPI`. """
+    client_class = AlphaVantageCryptoAPI
+
+
+class AsyncAlphaVantageForexAPI(AsyncAPI):
+    """ Asyncio counterpart of `AlphaVantageForexAPI`, whose bulk items are (from_symbol, to_symbol) pairs. """
+    client_class = AlphaVantageForexAPI
+
+
+class AsyncAlphaVantageFundamentalsAPI(AsyncAPI):
+    """ Asyncio counterpart of `AlphaVantageFundamentalsAPI`. """
+    client_class = AlphaVantageFundamentalsAPI
+
+
+class AsyncAlphaVantageMacroAPI(AsyncAPI):
+    """ Asyncio counterpart of `AlphaVantageMacroAPI`. """
+    client_class = AlphaVantageMacroAPI
+
+
+class AsyncAlphaVantageNewsSentimentAPI(AsyncAPI):
+    """ Asyncio counterpart of `AlphaVantageNewsSentimentAPI`, whose bulk items are comma separated symbols. """
+    client_class = AlphaVantageNewsSentimentAPI
@@ -1,7 +1,8 @@
 import pandas as pd
-from typing import Any
+from typing import Any, Optional
 
 from xtrader.apis.rest.crypto.base import BaseCryptoAPI
+from xtrader.apis.utils import HTTPTransport
 from xtrader.apis.utils import call_api
 
 BASE_URL = 'https://www.alphavantage.co/query?'
@@ -12,8 +13,10 @@ INTRADAY_INTERVALS = ['1min', '5min', '15min', '30min', '60min']
 
 class AlphaVantageCryptoAPI(BaseCryptoAPI):
 
-    def __init__(self, api_key):
+    def __init__(self, api_key, transport: Optional[HTTPTransport] = None):
+        """ :param transport: Transport of the requests. Defaults to the shared pooled one, see `get_transport`. """
         self.api_key = api_key
+        self.transport = transport
     
 
     def get_exchange_rate(self, from_symbol: str, to_symbol: str) -> Any:
@@ -22,7 +25,7 @@ class AlphaVantageCryptoAPI(BaseCryptoAPI):
         (e.g., Bitcoin) or physical currency (e.g., USD).
         """
         params = {'function': 'CURRENCY_EXCHANGE_RATE', 'from_currency': from_symbol, 'to_currency': to_symbol, 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
     
 
     def get_intraday(self, symbol: str, market: str, interval: str, outputsize: str='compact') -> Any:
@@ -40,7 +43,7 @@ class AlphaVantageCryptoAPI(BaseCryptoAPI):
         
         params = {'function': 'CRYPTO_INTRADAY', 'symbol': symbol, 'market': market, 'interval': interval,
                   'outputsize': outputsize, 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
     
 
     def get_daily(self, symbol: str, market: str) -> Any:
@@ -50,7 +53,7 @@ class AlphaVantageCryptoAPI(BaseCryptoAPI):
         Prices and volumes are quoted in both the market-specific currency and USD.
         """
         params = {'function': 'DIGITAL_CURRENCY_DAILY', 'symbol': symbol, 'market': market, 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
     
     
     def get_weekly(self, symbol: str, market: str) -> Any:
@@ -60,7 +63,7 @@ class AlphaVantageCryptoAPI(BaseCryptoAPI):
         Prices and volumes are quoted in both the market-specific currency and USD.
         """
         params = {'function': 'DIGITAL_CURRENCY_WEEKLY', 'symbol': symbol, 'market': market, 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
     
 
     def get_monthly(self, symbol: str, market: str) -> Any:
@@ -70,5 +73,5 @@ class AlphaVantageCryptoAPI(BaseCryptoAPI):
         Prices and volumes are quoted in both the market-specific currency and USD.
         """
         params = {'function': 'DIGITAL_CURRENCY_MONTHLY', 'symbol': symbol, 'market': market, 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
     
\ No newline at end of file
@@ -1,6 +1,7 @@
 from typing import Optional, Any
 import pandas as pd
 
+from xtrader.apis.utils import HTTPTransport
 from xtrader.apis.utils import call_api
 
 BASE_URL = 'https://www.alphavantage.co/query?'
@@ -16,8 +17,10 @@ def is_valid_symbol(symbol: str) -> bool:
 
 class AlphaVantageForexAPI:
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, transport: Optional[HTTPTransport] = None):
+        """ :param transport: Transport of the requests. Defaults to the shared pooled one, see `get_transport`. """
         self.api_key = api_key
+        self.transport = transport
 
 
     def get_exchange_rate(self, from_symbol: str, to_symbol: str) -> Any:
@@ -33,7 +36,7 @@ class AlphaVantageForexAPI:
             raise ValueError(f"to_symbol is not a valid symbol. use AlphaVantageForexAPI.get_currency_list() to get a list of valid symbols")
        
         params = {'function': 'CURRENCY_EXCHANGE_RATE', 'from_currency': from_symbol, 'to_currency': to_symbol, 'apikey': self.api_key}        
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
     
     
     def get_intraday(self, from_symbol: str, to_symbol: str, interval: str, outputsize: str = 'compact') -> Any:
@@ -56,7 +59,7 @@ class AlphaVantageForexAPI:
         
         params = {'function': 'FX_INTRADAY', 'from_symbol': from_symbol, 'to_symbol': to_symbol, 'interval': interval,
                   'outputsize': outputsize, 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
 
 
     def get_daily(self, from_symbol: str, to_symbol: str, outputsize: str = 'compact') -> Any:
@@ -75,7 +78,7 @@ class AlphaVantageForexAPI:
         
         params = {'function': 'FX_DAILY', 'from_symbol': from_symbol, 'to_symbol': to_symbol,
                   'outputsize': outputsize, 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
     
 
     def get_weekly(self, from_symbol: str, to_symbol: str) -> Any:
@@ -89,7 +92,7 @@ class AlphaVantageForexAPI:
             raise ValueError(f"to_symbol is not a valid symbol. use AlphaVantageForexAPI.get_currency_list() to get a list of valid symbols")
         
         params = {'function': 'FX_WEEKLY', 'from_symbol': from_symbol, 'to_symbol': to_symbol, 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
     
 
     def get_monthly(self, from_symbol: str, to_symbol: str) -> Any:
@@ -103,7 +106,7 @@ class AlphaVantageForexAPI:
             raise ValueError(f"to_symbol is not a valid symbol. use AlphaVantageForexAPI.get_currency_list() to get a list of valid symbols")
 
         params = {'function': 'FX_MONTHLY', 'from_symbol': from_symbol, 'to_symbol': to_symbol, 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
 
 
 
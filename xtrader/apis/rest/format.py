@@ -1,22 +1,42 @@
 import pandas as pd
-from typing import Any
+from typing import Any, Union
+
+# Keys of the AlphaVantage payloads that carry an error or a call limit message instead of data
+ERROR_KEYS = ['Error Message', 'Information', 'Note']
+
+
+def _payload(response: Any) -> dict:
+    """ Returns the JSON payload of a response, and raises a ValueError for the error messages of AlphaVantage. """
+    if hasattr(response, 'json'):
+        response = response.json()
+    for key in ERROR_KEYS:
+        if isinstance(response, dict) and key in response:
+            raise ValueError(response[key])
+    return response
+
 
 def AV_OHLC_response_format(response: Any, data_key: str) -> pd.DataFrame:
-    """ 
+    """
     Receives the AlphaVantage response, handles errors
-    and returns a DataFrame with OHLC format
+    and returns a DataFrame with OHLC format, sorted by date
+    """
+    data = _payload(response)[data_key]
+    data_df = pd.DataFrame.from_dict(data, orient='index', dtype=float)
+    # '1. open' -> 'open', '5. adjusted close' -> 'adjusted close'
+    data_df.columns = [column.split('. ', 1)[-1] for column in data_df.columns]
+    data_df.index = pd.to_datetime(data_df.index)
+    return data_df.sort_index().rename_axis('date').reset_index()
+
+
+def AV_response_format(response: Any) -> Union[pd.DataFrame, dict]:
+    """
+    Receives any AlphaVantage response, handles errors and returns a DataFrame with OHLC format
+    for the time series, and the JSON payload otherwise
     """
-    if 'Information' in response.keys():
-        raise ValueError(response['Information'])
-    elif 'Error Message' in response.keys():
-        raise ValueError(response['Error Message'])
-    
-    data = response[data_key]
-    dates = list(data.keys())
-    data_df = pd.DataFrame({'date': dates,
-                                'open': [data[date]['1. open'] for date in dates],
-                                'high': [data[date]['2. high'] for date in dates],
-                                'low': [data[date]['3. low'] for date in dates],
-                                'close': [data[date]['4. close'] for date in dates],
-                                'volume': [data[date]['5. volume'] for date in dates]})
-    return data_df
\ No newline at end of file
+    if isinstance(response, pd.DataFrame):
+        return response
+    payload = _payload(response)
+    data_keys = [key for key in payload if 'Time Series' in key] if isinstance(payload, dict) else []
+    if data_keys:
+        return AV_OHLC_response_format(payload, data_keys[0])
+    return payload
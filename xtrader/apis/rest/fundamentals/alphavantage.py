@@ -2,14 +2,17 @@ import requests
 from typing import Optional, Any
 from datetime import datetime
 
+from xtrader.apis.utils import HTTPTransport
 from xtrader.apis.utils import call_api
 
 BASE_URL = 'https://www.alphavantage.co/query?'
 
 class AlphaVantageFundamentalsAPI:
 
-    def __init__(self, api_key):
+    def __init__(self, api_key, transport: Optional[HTTPTransport] = None):
+        """ :param transport: Transport of the requests. Defaults to the shared pooled one, see `get_transport`. """
         self.api_key = api_key
+        self.transport = transport
 
 
     def get_company_overview(self, symbol: str) -> Any:
@@ -18,7 +21,7 @@ class AlphaVantageFundamentalsAPI:
         Data is generally refreshed on the same day a company reports its latest earnings and financials. 
         """
         params = {'function': 'OVERVIEW', 'symbol': symbol, 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
     
 
     def get_income_statement(self, symbol: str) -> Any:
@@ -28,7 +31,7 @@ class AlphaVantageFundamentalsAPI:
         Data is generally refreshed on the same day a company reports its latest earnings and financials.
         """
         params = {'function': 'INCOME_STATEMENT', 'symbol': symbol, 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
     
     
     def get_balance_sheet(self, symbol: str) -> Any:
@@ -38,7 +41,7 @@ class AlphaVantageFundamentalsAPI:
         Data is generally refreshed on the same day a company reports its latest earnings and financials.
         """
         params = {'function': 'BALANCE_SHEET', 'symbol': symbol, 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
     
 
     def get_cash_flow(self, symbol: str) -> Any:
@@ -48,7 +51,7 @@ class AlphaVantageFundamentalsAPI:
         Data is generally refreshed on the same day a company reports its latest earnings and financials.
         """
         params = {'function': 'CASH_FLOW', 'symbol': symbol, 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
     
 
     def get_earnings(self, symbol: str) -> Any:
@@ -57,7 +60,7 @@ class AlphaVantageFundamentalsAPI:
         Quarterly data also includes analyst estimates and surprise metrics.
         """
         params = {'function': 'EARNINGS', 'symbol': symbol, 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
     
 
     def get_listing_delisting_status(self, date: Optional[str]=None, state: str='active') -> Any:
@@ -77,13 +80,13 @@ class AlphaVantageFundamentalsAPI:
         params = {'function': 'LISTING_STATUS', 'state': state, 'apikey': self.api_key}
         if date:
             params['date'] = date
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
     
 
     def get_ipo_calendar(self) -> str:
         """ Returns the initial public offering (IPO) and lockup expiration dates for US equity markets. """
         params = {'function': 'IPO_CALENDAR', 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
     
 
     def get_earnings_calendar(self, symbol: Optional[str] = None, horizon: str = '3month') -> Any:
@@ -103,5 +106,5 @@ class AlphaVantageFundamentalsAPI:
         params = {'function': 'EARNINGS_CALENDAR', 'horizon': horizon, 'apikey': self.api_key}
         if symbol:
             params['symbol'] = symbol
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
         
@@ -0,0 +1,164 @@
+import os
+import numpy as np
+import pandas as pd
+
+from typing import Any
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Union
+
+from xtrader.apis.rest.asyncapi import BulkResult
+from xtrader.apis.rest.crypto.alphavantage import AlphaVantageCryptoAPI
+from xtrader.apis.rest.forex.alphavantage import AlphaVantageForexAPI
+from xtrader.apis.rest.format import AV_response_format
+from xtrader.apis.rest.stocks.alphavantage import AlphaVantageStockAPI
+from xtrader.apis.rest.stocks.alphavantage import INTRADAY_INTERVALS
+from xtrader.dataloaders.store import OHLCVStore
+from xtrader.instrumentation import instrumented
+
+# Number of points of a `compact` response
+COMPACT_POINTS = 100
+# Hours of data per day of every asset class, stock intraday bars include the extended hours
+HOURS_PER_DAY = {'stocks': 16, 'forex': 24, 'crypto': 24}
+# Frequencies of the series that can be synced
+SYNC_FREQS = ['daily'] + INTRADAY_INTERVALS
+# Time zone of the naive timestamps of the series of every asset class
+SERIES_TZ = {'stocks': 'US/Eastern', 'forex': 'UTC', 'crypto': 'UTC'}
+
+
+def _asset(client: Any) -> str:
+    """ Returns the asset class of a client. """
+    for asset, client_class in [('stocks', AlphaVantageStockAPI), ('forex', AlphaVantageForexAPI),
+                                ('crypto', AlphaVantageCryptoAPI)]:
+        if isinstance(client, client_class):
+            return asset
+    raise TypeError(f"Only the stock, forex and crypto clients can be synced, got {type(client).__name__}")
+
+
+def _series_time(now: Optional[pd.Timestamp], asset: str) -> pd.Timestamp:
+    """ Returns the current time, or a tz-aware `now`, as a naive timestamp in the time zone of the series. """
+    now = pd.Timestamp.now(tz='UTC') if now is None else pd.Timestamp(now)
+    if now.tz is not None:
+        now = now.tz_convert(SERIES_TZ[asset]).tz_localize(None)
+    return now
+
+
+def _missing_points(last: pd.Timestamp, now: pd.Timestamp, freq: str, asset: str) -> int:
+    """ Returns an upper bound of the number of bars after the last stored one. """
+    if asset == 'crypto':
+        days = (now.normalize() - last.normalize()).days
+    else:
+        days = int(np.busday_count(last.date(), now.date()))
+    if freq == 'daily':
+        return days
+    minutes = int(freq[:-len('min')])
+    return (days + 1) * HOURS_PER_DAY[asset] * 60 // minutes
+
+
+class HistorySync(object):
+
+    def __init__(self, client: Union[AlphaVantageStockAPI, AlphaVantageForexAPI, AlphaVantageCryptoAPI],
+                 root: str):
+        """
+        Initializes the `HistorySync` class, which keeps a local history of stock, forex or crypto time series
+        current with as little transfer as possible. Every series is kept in an `OHLCVStore` under
+        `root/<asset>/<symbol>/<freq>`. A sync requests `compact` output, the last 100 points, when the bars
+        missing since the last stored one fit in it, and otherwise falls back to `full` output or, for stock
+        intraday series, to one `full` request per month since the last stored bar. The new bars are merged into
+        the store, replacing the stored bars of the same dates, e.g. the partial bar of the current day.
+
+        :param client: Stock, forex or crypto AlphaVantage client, e.g. with a `RequestScheduler` transport.
+        :param root: Root directory of the stores.
+        """
+        self.client = client
+        self.root = root
+        self.asset = _asset(client)
+
+    def path(self, symbol: str, freq: str = 'daily') -> str:
+        """ Returns the directory of the store of a series. """
+        return os.path.join(self.root, self.asset, symbol.replace('/', '_'), freq)
+
+    def read(self, symbol: str, freq: str = 'daily') -> Optional[OHLCVStore]:
+        """ Returns the store of a series, or None if it has not been synced. """
+        path = self.path(symbol, freq)
+        return OHLCVStore(path) if OHLCVStore.exists(path) else None
+
+    @instrumented
+    def sync(self, symbol: str, freq: str = 'daily', since: Optional[str] = None,
+             now: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        Fetches the bars of a series missing from its store, merges them and returns the stored series.
+
+        :param symbol: Symbol of the series, e.g. 'IBM', or 'EUR/USD' and 'BTC/USD' for forex and crypto pairs.
+        :param freq: 'daily' or an intraday interval, e.g. '5min'.
+        :param since: First month of an empty stock intraday series, e.g. '2020-01'. Defaults to the
+                      latest `full` response.
+        :param now: Current time, defaults to now. A naive time is taken to be in `SERIES_TZ` of the asset class,
+                    the time zone of the stored bars, e.g. US/Eastern for stocks.
+        """
+        if freq not in SYNC_FREQS:
+            raise ValueError(f"`freq` must be one of {SYNC_FREQS}")
+        now = _series_time(now, self.asset)
+        store = self.read(symbol, freq)
+        stored = store.frame() if store is not None and len(store) else None
+
+        if stored is None:
+            if since is not None and self.asset == 'stocks' and freq != 'daily':
+                fetched = self._fetch_months(symbol, freq, pd.Period(since, freq='M'), now)
+            else:
+                fetched = self._fetch(symbol, freq, 'full')
+        else:
+            last = stored.index[-1]
+            fetched = None
+            if _missing_points(last, now, freq, self.asset) < COMPACT_POINTS:
+                fetched = self._fetch(symbol, freq, 'compact')
+                # The compact bars must overlap the stored ones, otherwise bars are missing in between
+                if len(fetched) and fetched.index[0] > last:
+                    fetched = None
+            if fetched is None:
+                if self.asset == 'stocks' and freq != 'daily':
+                    fetched = self._fetch_months(symbol, freq, pd.Period(last, freq='M'), now)
+                else:
+                    fetched = self._fetch(symbol, freq, 'full')
+
+        merged = fetched if stored is None else pd.concat([stored, fetched])
+        merged = merged[~merged.index.duplicated(keep='last')].sort_index(kind='stable')
+        if stored is not None and len(merged) == len(stored) and merged.equals(stored):
+            return stored
+        return OHLCVStore.write(merged, self.path(symbol, freq)).frame()
+
+    def sync_many(self, symbols: Iterable[str], freq: str = 'daily', since: Optional[str] = None) -> BulkResult:
+        """ Syncs many series, reporting the failed symbols in the errors of the result rather than raising. """
+        results, errors = {}, {}
+        for symbol in symbols:
+            try:
+                results[symbol] = self.sync(symbol, freq, since)
+            except Exception as error:
+                errors[symbol] = error
+        return BulkResult(results, errors)
+
+    def _fetch(self, symbol: str, freq: str, outputsize: str, month: Optional[str] = None) -> pd.DataFrame:
+        """ Requests the bars of a series and returns them indexed by date. """
+        if self.asset == 'stocks':
+            if freq == 'daily':
+                response = self.client.get_daily(symbol, outputsize=outputsize)
+            else:
+                response = self.client.get_intraday(symbol, interval=freq, month=month, outputsize=outputsize)
+        else:
+            base, quote = symbol.split('/')
+            if freq == 'daily' and self.asset == 'forex':
+                response = self.client.get_daily(base, quote, outputsize=outputsize)
+            elif freq == 'daily':
+                # The daily crypto series has no compact output
+                response = self.client.get_daily(base, quote)
+            else:
+                response = self.client.get_intraday(base, quote, interval=freq, outputsize=outputsize)
+        frame = AV_response_format(response)
+        return frame.set_index('date').select_dtypes('number')
+
+    def _fetch_months(self, symbol: str, freq: str, first: pd.Period, now: pd.Timestamp) -> pd.DataFrame:
+        """ Requests the bars of a stock intraday series month by month, from a month to the current one. """
+        months: List[pd.DataFrame] = [self._fetch(symbol, freq, 'full', month=str(month))
+                                      for month in pd.period_range(first, pd.Period(now, freq='M'), freq='M')]
+        return pd.concat(months)
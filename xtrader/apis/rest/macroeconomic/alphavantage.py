@@ -1,4 +1,5 @@
-from typing import Any, Union
+from typing import Any, Optional, Union
+from xtrader.apis.utils import HTTPTransport
 from xtrader.apis.utils import call_api
 
 
@@ -17,9 +18,14 @@ class AlphaVantageMacroAPI:
     By using this data feed, you agree to be bound by the FRED® API Terms of Use.
     """
 
-    def __init__(self, api_key):
-        """ Initialize the class with a valid AlphaVantage API key."""
+    def __init__(self, api_key, transport: Optional[HTTPTransport] = None):
+        """
+        Initialize the class with a valid AlphaVantage API key.
+
+        :param transport: Transport of the requests. Defaults to the shared pooled one, see `get_transport`.
+        """
         self.api_key = api_key
+        self.transport = transport
 
 
     def get_real_gdp(self, country: str = 'USA', interval: str = 'annual') -> Any:
@@ -34,7 +40,7 @@ class AlphaVantageMacroAPI:
             raise ValueError(f'`interval` must be one of: {AQ_INTERVALS}')
         
         params = {'function': 'REAL_GDP', 'interval': interval, 'apikey': self.api_key}
-        return call_api(BASE_URL, params=params)
+        return call_api(BASE_URL, params=params, transport=self.transport)
     
 
     def get_real_gdp_per_capita(self, country: str = 'USA') -> Any:
@@ -43,7 +49,7 @@ class AlphaVantageMacroAPI:
             raise ValueError('AlphaVantageMacroAPI only supports USA for now.')
         
         params = {'function': 'REAL_GDP_PER_CAPITA', 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
     
 
     def get_treasury_yield(self, country: str = 'USA', interval='monthly', maturity='10year') -> Any:
@@ -61,7 +67,7 @@ class AlphaVantageMacroAPI:
         
         params = {'function': 'TREASURY_YIELD', 'interval': interval,
                   'maturity': maturity, 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
     
 
     def get_fed_funds_rate(self, interval: str = 'monthly') -> Union[Any, str]:
@@ -74,7 +80,7 @@ class AlphaVantageMacroAPI:
             raise ValueError(f'`interval` must be one of: {DWM_INTERVALS}')
 
         params = {'function': 'FEDERAL_FUNDS_RATE', 'interval': interval, 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
     
 
     def get_cpi(self, country: str = 'USA', interval: str = 'monthly') -> Any:
@@ -88,7 +94,7 @@ class AlphaVantageMacroAPI:
             raise ValueError(f'`interval` must be one of: {MS_INTERVALS}')
         
         params = {'function': 'CPI', 'interval': interval, 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
     
 
     def get_inflation(self, country: str = 'USA') -> Any:
@@ -97,7 +103,7 @@ class AlphaVantageMacroAPI:
             raise ValueError('AlphaVantageMacroAPI only supports USA for now.')
         
         params = {'function': 'INFLATION', 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
     
 
     def get_retail_sales(self, country='USA') -> Any:
@@ -106,7 +112,7 @@ class AlphaVantageMacroAPI:
             raise ValueError('AlphaVantageMacroAPI only supports USA for now.')
         
         params = {'function': 'RETAIL_SALES', 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
     
 
     def get_durables(self, country='USA') -> Any:
@@ -115,7 +121,7 @@ class AlphaVantageMacroAPI:
             raise ValueError('AlphaVantageMacroAPI only supports USA for now.')
         
         params = {'function': 'DURABLES', 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
 
 
     def get_unemployment(self, country='USA') -> Any:
@@ -127,7 +133,7 @@ class AlphaVantageMacroAPI:
             raise ValueError('AlphaVantageMacroAPI only supports USA for now.')
         
         params = {'function': 'UNEMPLOYMENT', 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
     
 
     def get_nonfarm_payroll(self, country='USA') -> Any:
@@ -140,5 +146,5 @@ class AlphaVantageMacroAPI:
             raise ValueError('AlphaVantageMacroAPI only supports USA for now.')
         
         params = {'function': 'NONFARM_PAYROLL', 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
         
\ No newline at end of file
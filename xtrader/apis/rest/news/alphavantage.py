@@ -2,6 +2,7 @@ import requests
 from typing import Optional
 from datetime import datetime
 
+from xtrader.apis.utils import HTTPTransport
 from xtrader.apis.utils import call_api
 
 BASE_URL = 'https://www.alphavantage.co/query?'
@@ -16,8 +17,10 @@ def is_valid_time_format(input_string):
 
 class AlphaVantageNewsSentimentAPI:
 
-    def __init__(self, api_key):
+    def __init__(self, api_key, transport: Optional[HTTPTransport] = None):
+        """ :param transport: Transport of the requests. Defaults to the shared pooled one, see `get_transport`. """
         self.api_key = api_key
+        self.transport = transport
     
     def get_news_sentiment(self, symbols:Optional[str]=None, topics:Optional[str]=None,
                             time_from:Optional[str]=None, time_to:Optional[str]=None,
@@ -75,4 +78,4 @@ class AlphaVantageNewsSentimentAPI:
             if time_to is not None:
                 params['time_to'] = time_to
         
-        return call_api(base_url=BASE_URL, params=params)
\ No newline at end of file
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
\ No newline at end of file
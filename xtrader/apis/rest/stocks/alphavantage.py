@@ -1,6 +1,7 @@
 import requests
 from typing import Any, Optional
 
+from xtrader.apis.utils import HTTPTransport
 from xtrader.apis.utils import call_api
 from xtrader.apis.rest.format import AV_OHLC_response_format
 from xtrader.apis.rest.stocks.base import BaseStockAPI
@@ -11,9 +12,14 @@ INTRADAY_INTERVALS = ['1min', '5min', '15min', '30min', '60min']
 
 class AlphaVantageStockAPI(BaseStockAPI):  
 
-    def __init__(self, api_key):
-        """ Initialize the API object with AlphaVantage API key."""
+    def __init__(self, api_key, transport: Optional[HTTPTransport] = None):
+        """
+        Initialize the API object with AlphaVantage API key.
+
+        :param transport: Transport of the requests. Defaults to the shared pooled one, see `get_transport`.
+        """
         self.api_key = api_key
+        self.transport = transport
 
 
     def get_daily(self, symbol, adjusted: bool = False, outputsize: str = 'compact') -> Any:
@@ -32,8 +38,8 @@ class AlphaVantageStockAPI(BaseStockAPI):
             function = 'TIME_SERIES_DAILY_ADJUSTED'
         else:
             function = 'TIME_SERIES_DAILY'
-        params = {'function': function, 'symbol': symbol, 'apikey': self.api_key}
-        response = call_api(base_url=BASE_URL, params=params)
+        params = {'function': function, 'symbol': symbol, 'outputsize': outputsize, 'apikey': self.api_key}
+        response = call_api(base_url=BASE_URL, params=params, transport=self.transport)
         
         return AV_OHLC_response_format(response, 'Time Series (Daily)')
 
@@ -55,7 +61,7 @@ class AlphaVantageStockAPI(BaseStockAPI):
         
         params = {'function': 'TIME_SERIES_INTRADAY', 'symbol': symbol, 'interval': interval, 'month': month,
                   'adjusted': adjusted, 'extended_hours': extended_hours, 'outputsize': outputsize, 'apikey': self.api_key}
-        response = call_api(base_url=BASE_URL, params=params)
+        response = call_api(base_url=BASE_URL, params=params, transport=self.transport)
         
         return AV_OHLC_response_format(response, f'Time Series ({interval})')  
 
@@ -74,7 +80,7 @@ class AlphaVantageStockAPI(BaseStockAPI):
         else:
             function = 'TIME_SERIES_WEEKLY'
         params = {'function': function, 'symbol': symbol, 'apikey': self.api_key}
-        response = call_api(base_url=BASE_URL, params=params)
+        response = call_api(base_url=BASE_URL, params=params, transport=self.transport)
 
         return AV_OHLC_response_format(response, 'Weekly Time Series')
     
@@ -86,7 +92,7 @@ class AlphaVantageStockAPI(BaseStockAPI):
         else:
             function = 'TIME_SERIES_MONTHLY'
         params = {'function': function, 'symbol': symbol, 'apikey': self.api_key}
-        response = call_api(base_url=BASE_URL, params=params)
+        response = call_api(base_url=BASE_URL, params=params, transport=self.transport)
 
         return AV_OHLC_response_format(response, 'Monthly Time Series')
 
@@ -94,12 +100,12 @@ class AlphaVantageStockAPI(BaseStockAPI):
     def search_symbol(self, keywords):
         """ Search for a symbol based on keywords. """""
         params = {'function': 'SYMBOL_SEARCH', 'keywords': keywords, 'apikey': self.api_key}
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
     
     def global_market_status(self):
         """ Get the current global market status. """
         params = {'function': 'MARKET_STATUS', 'apikey': self.api_key}  
-        return call_api(base_url=BASE_URL, params=params)
+        return call_api(base_url=BASE_URL, params=params, transport=self.transport)
 
 
     
\ No newline at end of file
@@ -0,0 +1,274 @@
+import os
+import json
+import time
+import heapq
+import hashlib
+import itertools
+import tempfile
+import threading
+import requests
+
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from xtrader.apis.utils import HTTPTransport
+from xtrader.apis.utils import call_api
+from xtrader.apis.utils import get_transport
+
+try:
+    import fcntl
+except ImportError:
+    # Without file locks (Windows), the state file is only shared by the threads of a process
+    fcntl = None
+
+# Priorities of the requests, lower values are sent first
+LIVE = 0
+BACKFILL = 10
+# Default limits of an AlphaVantage key: calls per minute and per day (None for no daily limit)
+CALLS_PER_MINUTE = 5
+CALLS_PER_DAY = 25
+MINUTE = 60.0
+DAY = 86400.0
+
+
+class QuotaExceededError(RuntimeError):
+    """ Raised when no API key is available within the maximum wait of the scheduler. """
+
+
+def _key_id(key: str) -> str:
+    """ Returns the id of an API key in the state file, so that the keys themselves are not written to disk. """
+    return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+
+class _KeyQuota(object):
+
+    def __init__(self, key: str, per_minute: int, per_day: Optional[int]):
+        """
+        Quota of an API key: a token bucket of `per_minute` tokens, where every token is returned a minute after
+        it is spent, so that no window of a minute ever has more than `per_minute` calls (a bucket refilled at a
+        constant rate allows twice as many right after an idle minute), and a count of the calls of the UTC day.
+        """
+        self.key = key
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.calls: deque = deque()
+        self.day = 0
+        self.day_calls = 0
+
+    def ready_at(self, now: float) -> float:
+        """ Returns the time at which the key can be used next. """
+        while self.calls and self.calls[0] <= now - MINUTE:
+            self.calls.popleft()
+        ready_at = now if len(self.calls) < self.per_minute else self.calls[0] + MINUTE
+        if self.per_day is not None and int(now // DAY) == self.day and self.day_calls >= self.per_day:
+            ready_at = max(ready_at, (self.day + 1) * DAY)
+        return ready_at
+
+    def spend(self, now: float) -> None:
+        """ Records a call. """
+        self.calls.append(now)
+        if int(now // DAY) != self.day:
+            self.day, self.day_calls = int(now // DAY), 0
+        self.day_calls += 1
+
+    def remaining(self, now: float) -> Dict[str, Optional[int]]:
+        """ Returns the number of calls left in the current minute and day. """
+        self.ready_at(now)
+        day_calls = self.day_calls if int(now // DAY) == self.day else 0
+        return {'minute': self.per_minute - len(self.calls),
+                'day': None if self.per_day is None else max(0, self.per_day - day_calls)}
+
+    def to_dict(self) -> dict:
+        return {'calls': list(self.calls), 'day': self.day, 'day_calls': self.day_calls}
+
+    def update(self, state: dict) -> None:
+        """ Merges the calls persisted by every process into the calls of this one. """
+        self.calls = deque(sorted(set(self.calls) | set(state.get('calls', []))))
+        day, day_calls = state.get('day', 0), state.get('day_calls', 0)
+        if day > self.day:
+            self.day, self.day_calls = day, day_calls
+        elif day == self.day:
+            self.day_calls = max(self.day_calls, day_calls)
+
+
+class _PriorityTransport(object):
+
+    def __init__(self, scheduler: 'RequestScheduler', priority: int):
+        self.scheduler = scheduler
+        self.priority = priority
+
+    @property
+    def pool_maxsize(self) -> int:
+        return self.scheduler.pool_maxsize
+
+    def get(self, url: str, params: Optional[dict] = None) -> requests.Response:
+        return self.scheduler.get(url, params, priority=self.priority)
+
+
+class RequestScheduler(object):
+
+    def __init__(self, keys: Union[List[str], Dict[str, Tuple[int, Optional[int]]]],
+                 per_minute: int = CALLS_PER_MINUTE, per_day: Optional[int] = CALLS_PER_DAY,
+                 state_path: Optional[str] = None, transport: Optional[HTTPTransport] = None,
+                 max_wait: Optional[float] = None):
+        """
+        Initializes the `RequestScheduler` class, which sends the API calls within the call limits of a set of
+        AlphaVantage keys, so that the calls are delayed rather than answered with a throttling message. Every
+        call waits for a key with a token left, the keys are used in turn, and the waiting calls are sent by
+        priority, then in order, so live requests go ahead of backfills. The calls of every key are persisted
+        to `state_path`, so restarting a job does not reset the quotas, and processes that share the file share
+        the quotas: every key is picked under a lock of the file, after merging the calls the file records.
+        The calls are not retried once they reach the server, as the retries would not be counted.
+
+        The scheduler is used as the transport of the clients, e.g.
+        `AlphaVantageStockAPI(None, transport=scheduler.with_priority(LIVE))`, and sets the key of every call.
+
+        :param keys: API keys, or the keys and their (calls per minute, calls per day) limits.
+        :param per_minute: Calls per minute of every key of a list.
+        :param per_day: Calls per UTC day of every key of a list, or None for no daily limit.
+        :param state_path: JSON file the usage of the keys is persisted to, locked by `state_path`.lock.
+        :param transport: Transport of the calls, which must not retry the calls that reached the server, see
+                          `HTTPTransport(retry_sent=False)`. Defaults to the shared one without those retries.
+        :param max_wait: Maximum wait for a key in seconds, after which a `QuotaExceededError` is raised,
+                         e.g. when every key is exhausted for the day. None waits for as long as needed.
+        """
+        limits = keys if isinstance(keys, dict) else {key: (per_minute, per_day) for key in keys}
+        if not limits:
+            raise ValueError("At least one API key is required")
+        if getattr(transport, 'retry_sent', False):
+            raise ValueError("The transport of a scheduler must not retry the calls that reached the server, "
+                             "use `HTTPTransport(retry_sent=False)`")
+        self.quotas = [_KeyQuota(key, *limit) for key, limit in limits.items()]
+        self.state_path = state_path
+        self.transport = transport if transport is not None else get_transport().replace(retry_sent=False)
+        self.max_wait = max_wait
+        self._condition = threading.Condition()
+        self._queue: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._next = 0
+        with self._locked():
+            self._load()
+
+    @property
+    def pool_maxsize(self) -> int:
+        """ Returns the number of pooled connections of the transport. """
+        return self.transport.pool_maxsize
+
+    def with_priority(self, priority: int) -> _PriorityTransport:
+        """ Returns a transport that sends the calls of a client through the scheduler with a priority. """
+        return _PriorityTransport(self, priority)
+
+    def get(self, url: str, params: Optional[dict] = None, priority: int = BACKFILL) -> requests.Response:
+        """
+        Waits for a key, then sends a GET request with it.
+
+        :param priority: Priority of the request, e.g. `LIVE` or `BACKFILL`. Lower values are sent first.
+        """
+        key = self.acquire(priority)
+        return call_api(url, params={**(params or {}), 'apikey': key}, transport=self.transport)
+
+    def acquire(self, priority: int = BACKFILL) -> str:
+        """ Waits until the request is the first by priority and a key has a token left, spends it and returns the key. """
+        ticket = (priority, next(self._sequence))
+        with self._condition:
+            heapq.heappush(self._queue, ticket)
+            self._condition.notify_all()
+            try:
+                while True:
+                    if self._queue[0] != ticket:
+                        self._condition.wait()
+                        continue
+                    with self._locked():
+                        self._load()
+                        now = time.time()
+                        quota, ready_at = self._pick(now)
+                        if ready_at <= now:
+                            quota.spend(now)
+                            self._save()
+                            return quota.key
+                    if self.max_wait is not None and ready_at - now > self.max_wait:
+                        raise QuotaExceededError(f"No API key is available for {ready_at - now:.0f} seconds")
+                    self._condition.wait(ready_at - now)
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._condition.notify_all()
+
+    def remaining(self) -> Dict[str, Dict[str, Optional[int]]]:
+        """ Returns the calls left in the current minute and day of every key, by the id of the key. """
+        with self._condition, self._locked():
+            self._load()
+            now = time.time()
+            return {_key_id(quota.key): quota.remaining(now) for quota in self.quotas}
+
+    def _pick(self, now: float) -> Tuple[_KeyQuota, float]:
+        """ Returns the next key in turn with a token left, or the key with the earliest token if none has one. """
+        count = len(self.quotas)
+        earliest = None
+        for offset in range(count):
+            position = (self._next + offset) % count
+            quota = self.quotas[position]
+            ready_at = quota.ready_at(now)
+            if ready_at <= now:
+                self._next = position + 1
+                return quota, ready_at
+            if earliest is None or ready_at < earliest[1]:
+                earliest = (quota, ready_at)
+        return earliest
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """ Holds the lock of the state file, so that processes read, update and write it in turn. """
+        if self.state_path is None or fcntl is None:
+            yield
+            return
+        directory = os.path.dirname(os.path.abspath(self.state_path))
+        os.makedirs(directory, exist_ok=True)
+        with open(f'{self.state_path}.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read(self) -> dict:
+        """ Returns the usage of the keys recorded in the state file, by the id of the key. """
+        if self.state_path is None or not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _load(self) -> None:
+        """ Merges the usage of the keys recorded in the state file. """
+        state = self._read()
+        for quota in self.quotas:
+            quota.update(state.get(_key_id(quota.key), {}))
+
+    def _save(self) -> None:
+        """
+        Writes the usage of the keys to a temporary file and moves it in place atomically. The keys of the other
+        schedulers that share the file are kept, so `_save` must be called with the lock held, see `_locked`.
+        """
+        if self.state_path is None:
+            return
+        state = self._read()
+        state.update({_key_id(quota.key): quota.to_dict() for quota in self.quotas})
+        directory = os.path.dirname(os.path.abspath(self.state_path))
+        os.makedirs(directory, exist_ok=True)
+        descriptor, staging = tempfile.mkstemp(prefix='.quota-', dir=directory)
+        try:
+            with os.fdopen(descriptor, 'w') as file:
+                json.dump(state, file)
+            os.replace(staging, self.state_path)
+        finally:
+            if os.path.exists(staging):
+                os.remove(staging)
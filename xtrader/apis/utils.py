@@ -1,7 +1,145 @@
+import os
+import threading
 import requests
 
-def call_api(base_url: str, params: dict):
-        """ Requests data from the API and returns the response."""
-        response = requests.get(base_url, params=params)
+from requests.adapters import HTTPAdapter
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+from typing import Union
+from urllib3.util.retry import Retry
+
+# Default (connect, read) timeouts of the requests, in seconds
+TIMEOUT = (3.05, 30.0)
+# Default number of connections kept alive per host
+POOL_SIZE = 16
+# Headers sent with every request, the responses are gzip compressed and the connections reused
+HEADERS = {'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive', 'User-Agent': 'xtrader'}
+# Statuses of the responses that are retried, with the connection errors
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+
+
+class HTTPTransport(object):
+
+    def __init__(self, timeout: Union[float, Tuple[float, float]] = TIMEOUT, pool_connections: int = 4,
+                 pool_maxsize: int = POOL_SIZE, retries: int = 3, backoff_factor: float = 0.5,
+                 headers: Optional[Dict[str, str]] = None, retry_sent: bool = True):
+        """
+        Initializes the `HTTPTransport` class, a persistent `requests.Session` whose connections are pooled and
+        kept alive, so that consecutive calls to the same host skip the TCP and TLS handshakes. Responses are
+        requested gzip compressed, every request has connect and read timeouts, and connection errors and
+        transient server errors are retried with an exponential backoff. The session is created on first use,
+        and again in forked processes, which must not share the sockets of their parent.
+
+        :param timeout: Timeout of the requests in seconds, or a (connect, read) tuple.
+        :param pool_connections: Number of hosts whose connections are pooled.
+        :param pool_maxsize: Number of connections kept alive per host, e.g. the number of threads sending requests.
+        :param retries: Number of retries of the failed requests.
+        :param backoff_factor: Factor of the exponential backoff between the retries, in seconds.
+        :param headers: Headers sent with every request, in addition to `HEADERS`.
+        :param retry_sent: If True, the requests that reached the server are retried too, on read errors and
+                           `RETRY_STATUSES`. If False, only the connection errors are, e.g. for a scheduler that
+                           counts every call against a quota.
+        """
+        self.timeout = timeout
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.headers = {**HEADERS, **(headers or {})}
+        self.retry_sent = retry_sent
+        self._session: Optional[requests.Session] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        """ Returns the session of the current process, creating it on first use. """
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    self._session = self._create_session()
+                    self._pid = os.getpid()
+        return self._session
+
+    def get(self, url: str, params: Optional[dict] = None) -> requests.Response:
+        """ Sends a GET request through the pooled session and raises for error statuses. """
+        response = self.session.get(url, params=params, timeout=self.timeout)
         response.raise_for_status()
-        return response
\ No newline at end of file
+        return response
+
+    def replace(self, **changes) -> 'HTTPTransport':
+        """
+        Returns a new transport with the settings of this one but the given ones, e.g. a larger pool.
+
+        :param changes: Arguments of `HTTPTransport` to change.
+        """
+        settings = {'timeout': self.timeout, 'pool_connections': self.pool_connections,
+                    'pool_maxsize': self.pool_maxsize, 'retries': self.retries, 'backoff_factor': self.backoff_factor,
+                    'headers': self.headers, 'retry_sent': self.retry_sent}
+        return HTTPTransport(**{**settings, **changes})
+
+    def close(self) -> None:
+        """ Closes the pooled connections. The session is created again on the next request. """
+        with self._lock:
+            if self._session is not None and self._pid == os.getpid():
+                self._session.close()
+            self._session = None
+
+    def __enter__(self) -> 'HTTPTransport':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        session.headers.update(self.headers)
+        if self.retry_sent:
+            retry = Retry(total=self.retries, backoff_factor=self.backoff_factor, status_forcelist=RETRY_STATUSES,
+                          allowed_methods=['GET'], raise_on_status=False)
+        else:
+            retry = Retry(total=self.retries, read=0, other=0, backoff_factor=self.backoff_factor,
+                          allowed_methods=['GET'], respect_retry_after_header=False, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize, max_retries=retry)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+
+_TRANSPORT: Optional[HTTPTransport] = None
+_TRANSPORT_LOCK = threading.Lock()
+
+
+def get_transport() -> HTTPTransport:
+    """ Returns the transport shared by the API clients, creating it with the default settings on first use. """
+    global _TRANSPORT
+    if _TRANSPORT is None:
+        with _TRANSPORT_LOCK:
+            if _TRANSPORT is None:
+                _TRANSPORT = HTTPTransport()
+    return _TRANSPORT
+
+
+def configure_transport(**kwargs) -> HTTPTransport:
+    """
+    Replaces the transport shared by the API clients, e.g. configure_transport(timeout=(5, 60), pool_maxsize=32),
+    and closes the connections of the previous one.
+
+    :param kwargs: Arguments of `HTTPTransport`.
+    """
+    global _TRANSPORT
+    with _TRANSPORT_LOCK:
+        previous, _TRANSPORT = _TRANSPORT, HTTPTransport(**kwargs)
+    if previous is not None:
+        previous.close()
+    return _TRANSPORT
+
+
+def call_api(base_url: str, params: dict, transport: Optional[HTTPTransport] = None) -> requests.Response:
+    """
+    Requests data from the API and returns the response.
+
+    :param transport: Transport to send the request through. Defaults to the shared one, see `get_transport`.
+    """
+    return (transport or get_transport()).get(base_url, params=params)
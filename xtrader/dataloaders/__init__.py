@@ -1,3 +1,8 @@
 from xtrader.dataloaders import ohlc
 
-__all__ = ['ohlc']
\ No newline at end of file
+__all__ = ['bars',
+           'cache',
+           'dataset',
+           'ohlc',
+           'priceset',
+           'store']
@@ -0,0 +1,254 @@
+import re
+import numpy as np
+import pandas as pd
+
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+# Aggregation of the OHLCV columns, all other columns keep their last value
+AGGREGATIONS = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+# Length of the fixed frequencies in nanoseconds
+TICK_UNITS = {'s': 10 ** 9, 'min': 60 * 10 ** 9, 't': 60 * 10 ** 9, 'h': 3600 * 10 ** 9, 'd': 86400 * 10 ** 9}
+# Calendar frequencies, labelled with the last day of the week (Sunday), month, quarter or year as in pandas
+CALENDAR_UNITS = {'w': 'week', 'M': 'month', 'ME': 'month', 'q': 'quarter', 'qe': 'quarter',
+                  'y': 'year', 'ye': 'year', 'a': 'year'}
+# Order of the calendar frequencies, every one nests into the later ones except weeks
+CALENDAR_ORDER = ['week', 'month', 'quarter', 'year']
+DAY = 86400 * 10 ** 9
+# Largest step of the daylight saving time changes, the local midnights of tz-aware bars are this far apart
+DST_STEP = 30 * 60 * 10 ** 9
+
+
+def _parse_freq(freq: str) -> Tuple[str, int]:
+    """
+    Parses a frequency like '5min', '1h', '1d', '1w' or '1M' into ('tick', nanoseconds) or (calendar unit, 1).
+    'M' is a month and 'min' (or 'T') a minute.
+    """
+    match = re.fullmatch(r'\s*(\d*)\s*([A-Za-z]+)\s*', freq)
+    if match is None:
+        raise ValueError(f"Invalid frequency: {freq}")
+    n, unit = int(match.group(1) or 1), match.group(2)
+    unit = unit if unit in ['M', 'ME'] else unit.lower()
+    if unit in TICK_UNITS and n > 0:
+        return 'tick', n * TICK_UNITS[unit]
+    if unit in CALENDAR_UNITS:
+        if n != 1:
+            raise ValueError(f"Only single {CALENDAR_UNITS[unit]}s are supported, got {freq}")
+        return CALENDAR_UNITS[unit], 1
+    raise ValueError(f"Invalid frequency: {freq}")
+
+
+def _duration(freq: Tuple[str, int]) -> int:
+    """ Returns the (longest) length of the bins of a parsed frequency in nanoseconds. """
+    if freq[0] == 'tick':
+        return freq[1]
+    return {'week': 7, 'month': 31, 'quarter': 92, 'year': 366}[freq[0]] * DAY
+
+
+def _intraday(freq: Tuple[str, int]) -> bool:
+    """ Checks if a parsed frequency is a fixed frequency that is not a whole number of days. """
+    return freq[0] == 'tick' and freq[1] % DAY != 0
+
+
+def _nests(fine: Tuple[str, int], coarse: Tuple[str, int], aware: bool = False) -> bool:
+    """
+    Checks if every bin of the `fine` frequency lies within a single bin of the `coarse` frequency.
+
+    :param aware: If True, the bars are tz-aware, so the intraday bins follow the elapsed time from the first
+                  midnight and the other bins the local calendar, see `BarAggregator`.
+    """
+    if fine[0] == 'tick' and coarse[0] == 'tick' and _intraday(fine) == _intraday(coarse):
+        # Both are anchored at the same midnight
+        return coarse[1] % fine[1] == 0
+    if fine[0] == 'tick':
+        # Intraday bins of tz-aware bars are only aligned with the local midnights after a DST change if they
+        # divide the change
+        return DAY % fine[1] == 0 and not (aware and DST_STEP % fine[1] != 0)
+    if coarse[0] == 'tick' or fine[0] == 'week' or coarse[0] == 'week':
+        return fine == coarse
+    return CALENDAR_ORDER.index(fine[0]) <= CALENDAR_ORDER.index(coarse[0])
+
+
+def _bin_codes(stamps: np.ndarray, freq: Tuple[str, int], origin: int) -> Tuple[np.ndarray, int, np.ndarray]:
+    """
+    Returns the bin of every timestamp, relative to the bin of the first one, the number of bins and their labels.
+    Fixed frequencies are anchored at the origin and labelled with their start, calendar frequencies are
+    labelled with their last day, both as `resample` does.
+
+    :param stamps: Sorted int64 timestamps in nanoseconds, in local time, or in UTC for the intraday bins of
+                   tz-aware bars.
+    :param freq: Parsed frequency, see `_parse_freq`.
+    :param origin: Timestamp the fixed frequencies are anchored at, in the time of `stamps`.
+    """
+    unit, step = freq
+    if unit == 'tick':
+        codes = (stamps - origin) // step
+        first = codes[0]
+        labels = lambda bins: origin + bins * step
+    elif unit == 'week':
+        # Weeks from Monday to Sunday, 1970-01-01 is a Thursday
+        codes = (stamps // DAY + 3) // 7
+        first = codes[0]
+        labels = lambda bins: (bins * 7 + 3) * DAY
+    else:
+        months = stamps.view('datetime64[ns]').astype('datetime64[M]').astype(np.int64)
+        size = {'month': 1, 'quarter': 3, 'year': 12}[unit]
+        codes = months // size
+        first = codes[0]
+        labels = lambda bins: (((bins + 1) * size).astype('datetime64[M]').astype('datetime64[ns]').astype(np.int64)
+                               - DAY)
+    codes = codes - first
+    n_bins = int(codes[-1]) + 1
+    return codes, n_bins, labels(np.arange(n_bins) + first)
+
+
+def _reduce(values: np.ndarray, how: str, starts: np.ndarray, n_rows: int) -> np.ndarray:
+    """ Aggregates the values of every non-empty bin, given by the positions where the bins start, skipping NaNs. """
+    missing = pd.isna(values)
+    if how == 'sum':
+        return np.add.reduceat(np.where(missing, 0, values), starts)
+    if how in ['max', 'min']:
+        function = np.fmax if how == 'max' else np.fmin
+        return function.reduceat(values, starts)
+
+    # First and last valid value of every bin
+    positions = np.arange(n_rows)
+    if how == 'first':
+        chosen = np.minimum.reduceat(np.where(missing, n_rows, positions), starts)
+    else:
+        chosen = np.maximum.reduceat(np.where(missing, -1, positions), starts)
+    valid = (chosen >= 0) & (chosen < n_rows)
+    result = np.full(len(starts), np.nan, dtype=values.dtype if values.dtype.kind == 'f' else object)
+    result[valid] = values[chosen[valid]]
+    return result
+
+
+class BarAggregator(object):
+
+    def __init__(self, index: pd.DatetimeIndex, origin: Optional[pd.Timestamp] = None):
+        """
+        Initializes the `BarAggregator` class, which aggregates bars of a sorted datetime index into any set of
+        coarser frequencies, with the first open, highest high, lowest low, last close and total volume of every
+        bin. The bins of every frequency are computed once and reused for all frames with the same index.
+
+        As in `resample`, the bins of tz-aware bars are days, weeks, months, quarters and years of the local
+        calendar, while the intraday bins, e.g. '1h', follow the elapsed time from the first midnight, so that
+        the hour repeated when the clocks go back is two bins and the hour skipped when they go forward none.
+
+        :param index: Sorted datetime index of the base bars.
+        :param origin: Midnight the fixed frequencies are anchored at, e.g. to aggregate chunks of bars to the
+                       same bins. Defaults to the midnight of the first bar.
+        """
+        index = pd.DatetimeIndex(index)
+        if not index.is_monotonic_increasing:
+            raise ValueError("The index of the bars must be sorted")
+        self.index = index
+        self.tz = index.tz
+        local = index.tz_localize(None) if index.tz is not None else index
+        self._stamps = local.as_unit('ns').asi8
+        self._utc = index.as_unit('ns').asi8
+        if origin is None:
+            origin = local[0].normalize() if len(local) else pd.Timestamp(0)
+        origin = pd.Timestamp(origin)
+        if origin.tz is not None:
+            origin = origin.tz_convert(self.tz).tz_localize(None) if self.tz is not None else origin.tz_localize(None)
+        self._origin = origin.as_unit('ns').value
+        self._utc_origin = self._origin if self.tz is None else \
+            origin.tz_localize(self.tz, ambiguous=True, nonexistent='shift_forward').as_unit('ns').value
+        self._bins: Dict[Tuple[str, int], Tuple[np.ndarray, np.ndarray, pd.DatetimeIndex]] = {}
+
+    def bins(self, freq: str) -> Tuple[np.ndarray, np.ndarray, pd.DatetimeIndex]:
+        """
+        Returns the start position of every non-empty bin of a frequency, the position of these bins among all
+        the bins, and the labels of all the bins. The bins are cached.
+
+        :param freq: Frequency of the bins, e.g. '5min', '1h', '1d', '1w' or '1M'.
+        """
+        key = _parse_freq(freq)
+        if key not in self._bins:
+            if self.tz is not None and _intraday(key):
+                codes, n_bins, labels = _bin_codes(self._utc, key, self._utc_origin)
+                index = pd.DatetimeIndex(labels.view('datetime64[ns]'), name=self.index.name).as_unit(self.index.unit)
+                index = index.tz_localize('UTC').tz_convert(self.tz)
+            else:
+                codes, n_bins, labels = _bin_codes(self._stamps, key, self._origin)
+                index = pd.DatetimeIndex(labels.view('datetime64[ns]'), name=self.index.name).as_unit(self.index.unit)
+                if self.tz is not None:
+                    # Local midnights that occur twice are labelled with the first one
+                    index = index.tz_localize(self.tz, ambiguous=True, nonexistent='shift_forward')
+            starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+            self._bins[key] = (starts, codes[starts], index)
+        return self._bins[key]
+
+    def aggregate(self, prices: pd.DataFrame, freq: str, aggregations: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+        """
+        Aggregates the bars into one frequency. Bins without bars are kept as rows of NaNs (and zero volume).
+
+        :param prices: Bars with the index of the aggregator.
+        :param freq: Frequency to aggregate to.
+        :param aggregations: Aggregation ('first', 'last', 'max', 'min' or 'sum') per column. Defaults to `AGGREGATIONS`,
+                             with 'last' for the other columns.
+        """
+        if len(prices) != len(self.index):
+            raise ValueError("The bars must have the index of the aggregator")
+        aggregations = {**AGGREGATIONS, **(aggregations or {})}
+        if len(prices) == 0:
+            return prices.iloc[:0]
+
+        starts, positions, index = self.bins(freq)
+        columns = {}
+        for column, dtype in prices.dtypes.items():
+            how = aggregations.get(column, 'last')
+            values = prices[column].to_numpy()
+            if values.dtype.kind in 'biu':
+                # Integers become floats, as bins without bars are NaN
+                values = values.astype(float)
+            result = _reduce(values, how, starts, len(values))
+            full = np.zeros(len(index), dtype=result.dtype) if how == 'sum' else np.full(len(index), np.nan, dtype=result.dtype)
+            full[positions] = result
+            series = pd.Series(full, index=index, name=column, copy=False)
+            if dtype.kind not in 'biuf':
+                series = series.astype(dtype)
+            columns[column] = series
+        return pd.DataFrame(columns, index=index, copy=False)
+
+
+def aggregate_bars(prices: pd.DataFrame, freqs: List[str], aggregations: Optional[Dict[str, str]] = None,
+                   origin: Optional[pd.Timestamp] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Aggregates OHLCV bars into every frequency of `freqs` in one pass. Every frequency is aggregated from the
+    smallest frequency already computed whose bins nest into its own (e.g. months from days), since the first,
+    max, min, last and sum of partial bins give those of the whole bin, so each step only reads a few rows.
+
+    Frames with a `date` column instead of a datetime index, like those of the AlphaVantage clients, are sorted
+    by date and their OHLCV columns converted to floats first.
+
+    :param prices: Bars indexed by date.
+    :param freqs: Frequencies to aggregate to, e.g. ['5min', '1h', '1d', '1w', '1M'].
+    :param aggregations: Aggregation per column, see `BarAggregator.aggregate`.
+    :param origin: Midnight the fixed frequencies are anchored at, see `BarAggregator`.
+    """
+    if not isinstance(prices.index, pd.DatetimeIndex) and 'date' in prices.columns:
+        prices = prices.set_index(pd.DatetimeIndex(pd.to_datetime(prices['date']), name='date')).drop(columns='date')
+        numeric = [column for column in AGGREGATIONS if column in prices.columns]
+        prices = prices.astype({column: float for column in numeric}).sort_index(kind='stable')
+
+    parsed = {freq: _parse_freq(freq) for freq in freqs}
+    order = sorted(freqs, key=lambda freq: _duration(parsed[freq]))
+
+    aggregator = BarAggregator(prices.index, origin)
+    origin = pd.Timestamp(aggregator._origin)
+    aware = aggregator.tz is not None
+    sources = [(None, aggregator, prices)]
+    bars = {}
+    for freq in order:
+        # The smallest source whose bins nest into the bins of the frequency
+        source_freq, aggregator, source = min([entry for entry in sources
+                                               if entry[0] is None or _nests(parsed[entry[0]], parsed[freq], aware)],
+                                              key=lambda entry: len(entry[2]))
+        bars[freq] = aggregator.aggregate(source, freq, aggregations)
+        if len(bars[freq]):
+            sources.append((freq, BarAggregator(bars[freq].index, origin), bars[freq]))
+    return {freq: bars[freq] for freq in freqs}
@@ -0,0 +1,194 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+import pandas as pd
+
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# Bump to invalidate the caches written by older versions of the loaders
+CACHE_VERSION = 4
+# Default directory of the cache, overridden by the XTRADER_CACHE_DIR environment variable
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'xtrader', 'prices')
+# Size of the blocks read to hash the source files
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def _content_hash(path: str) -> str:
+    """ Hashes the contents of a file in blocks, so that large files are not read into memory. """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _fingerprint(path: str, **options) -> str:
+    """ Returns the cache key of a source file from its path, size, mtime and content hash and the load options. """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    source = json.dumps([CACHE_VERSION, path, stat.st_size, stat.st_mtime_ns, _content_hash(path), options],
+                        sort_keys=True, default=str)
+    return hashlib.blake2b(source.encode(), digest_size=16).hexdigest()
+
+
+def _datetimes(values: Union[pd.Index, pd.Series]) -> Tuple[np.ndarray, Optional[str], str]:
+    """ Returns the int64 timestamps of datetimes in their own unit (UTC for tz-aware ones), their tz and unit. """
+    values = pd.DatetimeIndex(values)
+    return values.asi8, None if values.tz is None else str(values.tz), values.unit
+
+
+def _from_datetimes(stamps: np.ndarray, tz: Optional[str], unit: str, name: Optional[str] = None,
+                    freq: Optional[str] = None) -> pd.DatetimeIndex:
+    """ Rebuilds the datetimes returned by `_datetimes`. """
+    index = pd.DatetimeIndex(stamps.view(f'datetime64[{unit}]'), name=name)
+    if tz is not None:
+        index = index.tz_localize('UTC').tz_convert(tz)
+    return pd.DatetimeIndex(index, freq=freq) if freq is not None else index
+
+
+def _write_npz(frame: pd.DataFrame, path: str) -> None:
+    """
+    Writes a frame as one array per column. Datetimes are stored as int64 with their tz and unit, and the other
+    non-numeric columns as int32 codes and their categories, rather than a fixed width string per row.
+    """
+    index = frame.index
+    meta = {'columns': list(frame.columns), 'dtypes': {}, 'index_name': index.name, 'index': None,
+            'freq': index.freqstr if isinstance(index, pd.DatetimeIndex) else None}
+    if isinstance(index, pd.DatetimeIndex):
+        stamps, tz, unit = _datetimes(index)
+        arrays = {'__index__': stamps}
+        meta['index'] = {'tz': tz, 'unit': unit}
+    else:
+        arrays = {'__index__': index.to_numpy()}
+
+    for i, (column, dtype) in enumerate(frame.dtypes.items()):
+        values = frame[column]
+        meta['dtypes'][column] = str(dtype)
+        if dtype.kind == 'M':
+            arrays[f'c{i}'], tz, unit = _datetimes(values)
+            meta['dtypes'][column] = {'tz': tz, 'unit': unit}
+        elif dtype.kind in 'biufcm':
+            arrays[f'c{i}'] = values.to_numpy()
+        else:
+            codes, categories = pd.factorize(values, use_na_sentinel=True)
+            arrays[f'c{i}'] = codes.astype(np.int32, copy=False)
+            arrays[f'k{i}'] = np.asarray(categories, dtype=str)
+    arrays['__meta__'] = np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8)
+    with open(path, 'wb') as file:
+        np.savez(file, **arrays)
+
+
+def _read_npz(path: str) -> pd.DataFrame:
+    """ Reads a frame written by `_write_npz`. """
+    with np.load(path, allow_pickle=False) as arrays:
+        meta = json.loads(arrays['__meta__'].tobytes().decode())
+        if meta['index'] is not None:
+            index = _from_datetimes(arrays['__index__'], **meta['index'], name=meta['index_name'], freq=meta['freq'])
+        else:
+            index = pd.Index(arrays['__index__'], name=meta['index_name'])
+        columns = {}
+        for i, column in enumerate(meta['columns']):
+            dtype = meta['dtypes'][column]
+            values = arrays[f'c{i}']
+            if isinstance(dtype, dict):
+                columns[column] = pd.Series(_from_datetimes(values, **dtype), index=index)
+            elif f'k{i}' in arrays:
+                categorical = pd.Categorical.from_codes(values, categories=arrays[f'k{i}'])
+                columns[column] = pd.Series(categorical, index=index).astype(dtype)
+            else:
+                columns[column] = pd.Series(values, index=index, copy=False).astype(dtype)
+    return pd.DataFrame(columns, index=index)
+
+
+class PriceCache(object):
+
+    def __init__(self, directory: Optional[str] = None, file_format: Optional[str] = None):
+        """
+        Initializes the `PriceCache` class, an on-disk cache of the frames parsed by the loaders. Entries are
+        keyed by the path, size, mtime and content hash of the source file, so editing or replacing the file
+        invalidates them. Every frame of an entry is stored on its own, when it is first computed, in a columnar
+        binary format: Feather (Arrow IPC) if pyarrow is installed, otherwise one NumPy array per column.
+
+        :param directory: Directory of the cache. Defaults to $XTRADER_CACHE_DIR or ~/.cache/xtrader/prices.
+        :param file_format: 'feather' or 'npz'. Defaults to 'feather' if pyarrow is installed.
+        """
+        self.directory = directory or os.environ.get('XTRADER_CACHE_DIR', CACHE_DIR)
+        self.file_format = file_format or ('feather' if pyarrow is not None else 'npz')
+        if self.file_format not in ['feather', 'npz']:
+            raise ValueError("`file_format` must be 'feather' or 'npz'")
+        if self.file_format == 'feather' and pyarrow is None:
+            raise ImportError("pyarrow is required for the 'feather' format")
+
+    def key(self, path: str, **options) -> str:
+        """ Returns the key of a source file, see `_fingerprint`. """
+        return _fingerprint(path, file_format=self.file_format, **options)
+
+    def read(self, key: str, names: Optional[List[str]] = None) -> Optional[Dict[str, pd.DataFrame]]:
+        """
+        Returns the cached frames of a key, or None if any of them is not cached.
+
+        :param key: Key of the entry.
+        :param names: Names of the frames. Defaults to all the frames of the entry.
+        """
+        entry = os.path.join(self.directory, key)
+        if names is None:
+            suffix = f'.{self.file_format}'
+            names = [file[:-len(suffix)] for file in os.listdir(entry)] if os.path.isdir(entry) else []
+            names = [name for name in names if name and not name.startswith('.')]
+        frames = {name: self.read_frame(key, name) for name in names}
+        if not frames or any(frame is None for frame in frames.values()):
+            return None
+        return frames
+
+    def read_frame(self, key: str, name: str) -> Optional[pd.DataFrame]:
+        """ Returns a cached frame of a key, or None if it is not cached. """
+        try:
+            return self._read_frame(os.path.join(self.directory, key, f'{name}.{self.file_format}'))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def write(self, key: str, frames: Dict[str, pd.DataFrame]) -> None:
+        """ Stores the frames of a key. """
+        for name, frame in frames.items():
+            self.write_frame(key, name, frame)
+
+    def write_frame(self, key: str, name: str, frame: pd.DataFrame) -> None:
+        """ Stores a frame of a key. The frame is written to a temporary file and moved in place atomically. """
+        entry = os.path.join(self.directory, key)
+        os.makedirs(entry, exist_ok=True)
+        descriptor, staging = tempfile.mkstemp(prefix=f'.{name}-', dir=entry)
+        os.close(descriptor)
+        try:
+            self._write_frame(frame, staging)
+            os.replace(staging, os.path.join(entry, f'{name}.{self.file_format}'))
+        finally:
+            if os.path.exists(staging):
+                os.remove(staging)
+
+    def clear(self) -> None:
+        """ Removes all entries of the cache. """
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _write_frame(self, frame: pd.DataFrame, path: str) -> None:
+        if self.file_format == 'feather':
+            frame.reset_index().to_feather(path)
+        else:
+            _write_npz(frame, path)
+
+    def _read_frame(self, path: str) -> pd.DataFrame:
+        if self.file_format == 'feather':
+            frame = pd.read_feather(path)
+            return frame.set_index(frame.columns[0])
+        return _read_npz(path)
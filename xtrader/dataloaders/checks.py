@@ -1,16 +1,145 @@
+import numpy as np
 import pandas as pd
-from typing import List
+from typing import Dict, List, Optional, Tuple
+
+from xtrader.dataloaders.bars import _parse_freq
+from xtrader.instrumentation import instrumented
+
+HOUR = 3600 * 10 ** 9
+# Columns whose values must be positive prices
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+# Checks of `validate_prices`
+CHECKS = ['non_monotonic', 'duplicates', 'gaps', 'nan', 'ohlc', 'non_positive']
+
+
+def _stamps(index: pd.Index) -> Tuple[np.ndarray, int]:
+    """ Returns the int64 timestamps of an index in its own unit, without copying, and the nanoseconds per unit. """
+    index = pd.DatetimeIndex(index)
+    return index.asi8, int(pd.Timedelta(1, unit=index.unit).value)
 
 
 def _check_nan(df: pd.DataFrame, columns: List[str]) -> bool:
     """ Checks if there are NaN values in the given columns of a dataframe. """
-    return df.isnull().values.any()
+    columns = [column for column in columns if column in df.columns]
+    return any(bool(np.isnan(df[column].to_numpy(dtype=float)).any()) for column in columns)
 
 
 def _check_missing_in_hourly(df: pd.DataFrame, column: str = None) -> bool:
-    """ Checks if there are missing values in the given column of a dataframe. """
-    if column is None:
-        series = df.index
-    else:
-        series = df[column]
-    return series.to_series().diff().dt.total_seconds().div(3600).round().eq(1).all()
\ No newline at end of file
+    """ Checks if every row of the given column (or the index) is one hour after the previous one, i.e. none are missing. """
+    stamps, unit = _stamps(df.index if column is None else df[column])
+    return bool(np.all(np.diff(stamps) == HOUR // unit))
+
+
+class ValidationReport(object):
+
+    def __init__(self, index: pd.Index, locations: Dict[str, np.ndarray], missing_bars: int = 0):
+        """
+        Initializes the `ValidationReport` class, the result of `validate_prices`.
+
+        :param index: Index of the validated prices.
+        :param locations: Row positions of the issues found by every check, e.g. locations['nan:close'].
+        :param missing_bars: Number of bars missing in the gaps.
+        """
+        self.index = index
+        self.locations = locations
+        self.missing_bars = missing_bars
+
+    @property
+    def ok(self) -> bool:
+        """ Returns True if no check found an issue. """
+        return not any(len(positions) for positions in self.locations.values())
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        """ Returns the number of issues found by every check. """
+        return {check: len(positions) for check, positions in self.locations.items()}
+
+    def dates(self, check: str) -> pd.Index:
+        """ Returns the dates of the rows with an issue found by a check. """
+        return self.index[self.locations[check]]
+
+    def to_frame(self, limit: Optional[int] = 1000) -> pd.DataFrame:
+        """
+        Returns the issues as a frame with one row per check and location, sorted by position.
+
+        :param limit: Maximum number of locations per check, or None for all of them.
+        """
+        rows = [pd.DataFrame({'check': check, 'position': positions[:limit], 'date': self.index[positions[:limit]]})
+                for check, positions in self.locations.items() if len(positions)]
+        if not rows:
+            return pd.DataFrame(columns=['check', 'position', 'date'])
+        return pd.concat(rows, ignore_index=True).sort_values(['position', 'check'], kind='stable', ignore_index=True)
+
+    def raise_for_issues(self) -> None:
+        """ Raises a ValueError listing the checks that found issues. """
+        if not self.ok:
+            issues = ', '.join(f'{check}: {count}' for check, count in self.counts.items() if count)
+            raise ValueError(f"Invalid prices ({issues})")
+
+    def __repr__(self) -> str:
+        issues = {check: count for check, count in self.counts.items() if count}
+        return f"ValidationReport(ok={self.ok}, issues={issues}, missing_bars={self.missing_bars})"
+
+
+@instrumented
+def validate_prices(prices: pd.DataFrame, freq: Optional[str] = '1h', columns: Optional[List[str]] = None,
+                    checks: Optional[List[str]] = None) -> ValidationReport:
+    """
+    Validates prices with vectorized passes over the int64 timestamps and the float columns, cheap enough for
+    every load of large files, and reports the row positions of the issues:
+
+    - non_monotonic: rows whose timestamp is before the previous one
+    - duplicates: rows whose timestamp equals the previous one
+    - gaps: rows more than one `freq` after the previous one, with the number of missing bars in `missing_bars`
+    - nan:<column>: rows with a NaN in the column
+    - ohlc: rows that break low <= open, close <= high
+    - non_positive: rows with a price (open, high, low or close) <= 0
+
+    :param prices: Prices indexed by date.
+    :param freq: Expected spacing of the rows, e.g. '1h'. None skips the gaps check, e.g. for trading hours only.
+    :param columns: Columns to check for NaNs. Defaults to the numeric columns.
+    :param checks: Checks to run, from `CHECKS`. Defaults to all of them.
+    """
+    checks = CHECKS if checks is None else checks
+    unknown = [check for check in checks if check not in CHECKS]
+    if unknown:
+        raise ValueError(f"Unknown checks {unknown}, must be from {CHECKS}")
+
+    locations: Dict[str, np.ndarray] = {}
+    missing_bars = 0
+    stamps, unit = _stamps(prices.index)
+    steps = np.diff(stamps)
+    if 'non_monotonic' in checks:
+        locations['non_monotonic'] = np.flatnonzero(steps < 0) + 1
+    if 'duplicates' in checks:
+        locations['duplicates'] = np.flatnonzero(steps == 0) + 1
+    if 'gaps' in checks and freq is not None:
+        kind, step = _parse_freq(freq)
+        if kind != 'tick':
+            raise ValueError(f"Gaps can only be checked for fixed frequencies, got {freq}")
+        step = step // unit
+        gaps = np.flatnonzero(steps > step)
+        locations['gaps'] = gaps + 1
+        missing_bars = int(((steps[gaps] - 1) // step).sum())
+    del steps
+
+    if 'nan' in checks:
+        columns = columns or [column for column, dtype in prices.dtypes.items() if dtype.kind in 'biuf']
+        for column in columns:
+            values = prices[column].to_numpy()
+            locations[f'nan:{column}'] = np.flatnonzero(np.isnan(values) if values.dtype.kind == 'f' else pd.isna(values))
+
+    values = {column: prices[column].to_numpy(dtype=float) for column in PRICE_COLUMNS if column in prices.columns}
+    with np.errstate(invalid='ignore'):
+        if 'ohlc' in checks and len(values) == len(PRICE_COLUMNS):
+            low, high = values['low'], values['high']
+            broken = (low > high) | (values['open'] < low) | (values['open'] > high) | \
+                (values['close'] < low) | (values['close'] > high)
+            locations['ohlc'] = np.flatnonzero(broken)
+        if 'non_positive' in checks and values:
+            broken = np.zeros(len(prices), dtype=bool)
+            for column_values in values.values():
+                broken |= column_values <= 0
+            locations['non_positive'] = np.flatnonzero(broken)
+
+    return ValidationReport(prices.index, locations, missing_bars)
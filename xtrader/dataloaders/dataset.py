@@ -0,0 +1,197 @@
+import os
+import re
+import pandas as pd
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from xtrader.dataloaders.cache import _read_npz
+from xtrader.dataloaders.cache import _write_npz
+from xtrader.dataloaders.cache import pyarrow
+from xtrader.instrumentation import instrumented
+
+# File formats of the partitions, parquet needs pyarrow
+PARTITION_FORMATS = ['parquet', 'csv', 'npz']
+# Name of the partition directories, e.g. symbol=AAPL/year=2020
+PARTITION_PATTERN = re.compile(r'symbol=(?P<symbol>[^/\\]+)[/\\]year=(?P<year>\d+)$')
+
+
+def _timestamp(value: Optional[Union[str, pd.Timestamp]], end: bool = False) -> Optional[pd.Timestamp]:
+    """
+    Converts an optional date bound to a timestamp. A string without a time zone covers its whole period, as in the
+    partial string slicing of `.loc`, so an end of '2021-03-31' or '2021-03' includes the last day up to its last bar.
+    """
+    if value is None:
+        return None
+    stamp = pd.Timestamp(value)
+    if isinstance(value, str) and stamp.tz is None:
+        period = pd.Period(value)
+        return period.end_time if end else period.start_time
+    return stamp
+
+
+def _localize(stamp: Optional[pd.Timestamp], tz: Optional[object]) -> Optional[pd.Timestamp]:
+    """ Expresses a date bound in the time zone of the data, where naive bounds are local times. """
+    if stamp is None or stamp.tz is None and tz is None:
+        return stamp
+    if stamp.tz is None:
+        return stamp.tz_localize(tz)
+    if tz is None:
+        raise ValueError("The dataset has naive timestamps, but the date has a time zone")
+    return stamp
+
+
+def write_dataset(prices: pd.DataFrame, root: str, symbol: str = 'symbol', file_format: Optional[str] = None,
+                  row_group_size: int = 24 * 31) -> List[str]:
+    """
+    Writes a long panel of prices as a dataset partitioned by symbol and year, with one file per partition
+    in `root/symbol=<symbol>/year=<year>/`, and returns the paths of the files. Existing partitions are replaced,
+    the files of a partition in any format included, so a partition is never read twice.
+
+    :param prices: Long panel of prices with a date index and a symbol column.
+    :param root: Root directory of the dataset.
+    :param symbol: Name of the symbol column.
+    :param file_format: One of `PARTITION_FORMATS`. Defaults to parquet if pyarrow is installed, npz otherwise.
+    :param row_group_size: Number of rows per parquet row group, e.g. a month of hourly bars.
+    """
+    file_format = file_format or ('parquet' if pyarrow is not None else 'npz')
+    if file_format not in PARTITION_FORMATS:
+        raise ValueError(f"`file_format` must be one of {PARTITION_FORMATS}")
+
+    paths = []
+    index = pd.DatetimeIndex(prices.index)
+    for (name, year), partition in prices.groupby([prices[symbol].to_numpy(), index.year], sort=True):
+        directory = os.path.join(root, f'symbol={name}', f'year={year}')
+        os.makedirs(directory, exist_ok=True)
+        partition = partition.drop(columns=symbol).sort_index(kind='stable').rename_axis('date')
+        path = os.path.join(directory, f'part-0.{file_format}')
+        if file_format == 'parquet':
+            partition.to_parquet(path, row_group_size=row_group_size)
+        elif file_format == 'csv':
+            partition.to_csv(path)
+        else:
+            _write_npz(partition, path)
+        for file in os.listdir(directory):
+            if file != os.path.basename(path) and file.rsplit('.', 1)[-1] in PARTITION_FORMATS:
+                os.remove(os.path.join(directory, file))
+        paths.append(path)
+    return paths
+
+
+class PriceDataset(object):
+
+    def __init__(self, root: str, n_workers: Optional[int] = None):
+        """
+        Initializes the `PriceDataset` class, which loads prices from a directory partitioned by symbol and year,
+        e.g. `root/symbol=AAPL/year=2020/part-0.parquet` as written by `write_dataset`. Only the partitions of the
+        requested symbols and years are read, only the parquet row groups that overlap the requested dates, and
+        the files are read in parallel by a thread pool.
+
+        :param root: Root directory of the dataset.
+        :param n_workers: Number of threads reading the files. Defaults to that of `ThreadPoolExecutor`.
+        """
+        self.root = root
+        self.n_workers = n_workers
+
+    @property
+    def partitions(self) -> Dict[str, Dict[int, List[str]]]:
+        """ Returns the files of every symbol and year of the dataset. """
+        partitions: Dict[str, Dict[int, List[str]]] = {}
+        for directory, _, files in os.walk(self.root):
+            match = PARTITION_PATTERN.search(os.path.relpath(directory, self.root))
+            files = sorted(file for file in files if file.rsplit('.', 1)[-1] in PARTITION_FORMATS)
+            if match and files:
+                years = partitions.setdefault(match.group('symbol'), {})
+                years[int(match.group('year'))] = [os.path.join(directory, file) for file in files]
+        return partitions
+
+    @property
+    def symbols(self) -> List[str]:
+        """ Returns the symbols of the dataset. """
+        return sorted(self.partitions)
+
+    @instrumented
+    def load(self, symbols: Optional[List[str]] = None, start: Optional[Union[str, pd.Timestamp]] = None,
+             end: Optional[Union[str, pd.Timestamp]] = None, columns: Optional[List[str]] = None,
+             as_dict: bool = False, symbol: str = 'symbol') -> Union[pd.DataFrame, Dict[str, pd.DataFrame]]:
+        """
+        Loads the prices of some symbols between two dates, both included. Dates given as strings cover their
+        whole period as in `.loc`, e.g. an end of '2021-03-31' includes the bars of that day, and naive dates
+        are in the time zone of tz-aware data.
+
+        :param symbols: Symbols to load. Defaults to all the symbols.
+        :param start: First date to load. Defaults to the start of the data.
+        :param end: Last date to load. Defaults to the end of the data.
+        :param columns: Columns to load. Defaults to all the columns.
+        :param as_dict: If True, a frame per symbol is returned. If False, a long panel with a symbol column,
+                        sorted by symbol and date as `Panel` expects.
+        :param symbol: Name of the symbol column of the long panel.
+        """
+        start, end = _timestamp(start), _timestamp(end, end=True)
+        partitions = self.partitions
+        if symbols is None:
+            symbols = sorted(partitions)
+        missing = [name for name in symbols if name not in partitions]
+        if missing:
+            raise KeyError(f"Symbols not in the dataset: {missing}")
+
+        # Partition pruning on the symbols and years. The years are local to the data, so a bound with a time
+        # zone keeps the neighbouring year, which may hold the same instant
+        first_year = None if start is None else start.year - (start.tz is not None)
+        last_year = None if end is None else end.year + (end.tz is not None)
+        tasks: List[Tuple[str, str]] = []
+        for name in symbols:
+            for year, files in sorted(partitions[name].items()):
+                if (first_year is None or year >= first_year) and (last_year is None or year <= last_year):
+                    tasks += [(name, path) for path in files]
+
+        with ThreadPoolExecutor(max_workers=self.n_workers) as pool:
+            parts = list(pool.map(lambda task: self._read(task[1], start, end, columns), tasks))
+
+        frames: Dict[str, List[pd.DataFrame]] = {name: [] for name in symbols}
+        for (name, _), part in zip(tasks, parts):
+            frames[name].append(part)
+        frames = {name: pd.concat(parts) if parts else pd.DataFrame(columns=columns) for name, parts in frames.items()}
+        if as_dict:
+            return frames
+        return pd.concat([frame.assign(**{symbol: name}) for name, frame in frames.items()])
+
+    @staticmethod
+    def _read(path: str, start: Optional[pd.Timestamp], end: Optional[pd.Timestamp],
+              columns: Optional[List[str]]) -> pd.DataFrame:
+        """ Reads the rows of a partition file between two dates, skipping the parquet row groups outside them. """
+        file_format = path.rsplit('.', 1)[-1]
+        if file_format == 'parquet':
+            from pyarrow import parquet
+
+            file = parquet.ParquetFile(path)
+            position = file.schema_arrow.get_field_index('date')
+            tz = getattr(file.schema_arrow.field(position).type, 'tz', None)
+            start, end = _localize(start, tz), _localize(end, tz)
+            groups = []
+            for group in range(file.metadata.num_row_groups):
+                statistics = file.metadata.row_group(group).column(position).statistics
+                if statistics is not None and statistics.has_min_max:
+                    if (start is not None and pd.Timestamp(statistics.max) < start) or \
+                            (end is not None and pd.Timestamp(statistics.min) > end):
+                        continue
+                groups.append(group)
+            frame = file.read_row_groups(groups, columns=None if columns is None else ['date'] + columns).to_pandas()
+            frame = frame.set_index('date') if 'date' in frame.columns else frame
+        elif file_format == 'csv':
+            frame = pd.read_csv(path, index_col='date', parse_dates=['date'],
+                                usecols=None if columns is None else ['date'] + columns)
+        else:
+            frame = _read_npz(path)
+            frame = frame if columns is None else frame[columns]
+
+        # The rows of a partition are sorted, so the dates are sliced without a mask
+        index = frame.index
+        start, end = _localize(start, index.tz), _localize(end, index.tz)
+        first = 0 if start is None else index.searchsorted(start, side='left')
+        last = len(index) if end is None else index.searchsorted(end, side='right')
+        return frame.iloc[first:last]
@@ -1,8 +1,37 @@
+import numpy as np
 import pandas as pd
-from xtrader.dataloaders.checks import _check_nan, _check_missing_in_hourly
+from typing import Dict, Iterator, Optional, Union
+from xtrader.dataloaders.bars import aggregate_bars
+from xtrader.dataloaders.cache import PriceCache
+from xtrader.dataloaders.checks import validate_prices
+from xtrader.dataloaders.priceset import PriceSet
+from xtrader.instrumentation import instrumented
 
-def load_prices(path: str, check_missing: bool = False) -> pd.DataFrame:
-    """ Loads hourly prices from csv file and returns a dataframe with hourly, daily and monthly prices."""
+# Dtypes of the price columns, applied while the csv file is parsed
+PRICE_DTYPES = {"open": "float64", "high": "float64", "low": "float64", "close": "float64", "volume": "float64",
+                "name": str, "symbol": str}
+# Frames aggregated from the hourly prices and their frequencies
+RESAMPLE_FREQS = {"daily": "1d", "monthly": "1M"}
+# Size of the blocks read to count the lines of a csv file
+COUNT_BLOCK_SIZE = 1 << 20
+# Checks of `validate_prices` run on the hourly prices when they are loaded with `check_missing`
+LOAD_CHECKS = ['non_monotonic', 'duplicates', 'gaps', 'nan']
+
+
+def _check_prices(prices_hourly: pd.DataFrame) -> None:
+    """ Raises if there are NaNs or missing, duplicate or unsorted hours in the hourly prices. """
+    columns = [column for column in ['open', 'high', 'low', 'close', 'volume'] if column in prices_hourly.columns]
+    report = validate_prices(prices_hourly, '1h', columns, LOAD_CHECKS)
+    if any(report.counts[f'nan:{column}'] for column in columns):
+        raise ValueError("Missing values (NaN) in prices_hourly")
+    if not report.ok:
+        issues = ', '.join(f'{check}: {count}' for check, count in report.counts.items() if count)
+        raise ValueError(f"Missing values in prices_hourly ({issues}, {report.missing_bars} missing bars)")
+
+
+@instrumented
+def _read_prices(path: str) -> pd.DataFrame:
+    """ Reads the hourly prices from a csv file, with lowercase columns, a date index and numeric prices. """
     # Import csv file
     prices_hourly = pd.read_csv(path)
     # Make column names lowercase
@@ -11,19 +40,145 @@ def load_prices(path: str, check_missing: bool = False) -> pd.DataFrame:
     prices_hourly = prices_hourly.set_index('date', inplace=False)
     prices_hourly.index = pd.to_datetime(prices_hourly.index)
 
-    # Check for missing values
-    if check_missing:
-        if _check_nan(prices_hourly, ['open', 'high', 'low', 'close', 'volume']):
-            raise ValueError("Missing values (NaN) in prices_hourly")
-        if not _check_missing_in_hourly(prices_hourly):
-            raise ValueError("Missing values in prices_hourly")
-
     # Convert to numeric
-    prices_hourly = prices_hourly.astype({"open": float, "high": float, "low": float,
-                                          "close": float, "volume": float,
-                                          "name": str, "symbol": str})
+    return prices_hourly.astype({"open": float, "high": float, "low": float,
+                                 "close": float, "volume": float,
+                                 "name": str, "symbol": str})
+
+
+@instrumented
+def load_prices(path: str, check_missing: bool = False, cache: Union[bool, PriceCache] = False,
+                freqs: Optional[Dict[str, str]] = None) -> PriceSet:
+    """ 
+    Loads hourly prices from csv file and returns a `PriceSet` with hourly, daily and monthly prices, e.g.
+    prices["daily"]. The set is lazy: the csv file is read when a frame is first accessed and every other frame
+    is aggregated when it is first accessed, with the first open, highest high, lowest low, last close and total
+    volume. Other frequencies are aggregated on request, e.g. prices["1w"] or prices.resample("1Q", "quarterly").
+
+    :param path: path of the csv file
+    :param check_missing: raise if there are NaNs or missing hours in the hourly prices, when they are loaded
+    :param cache: read the frames from, and store them in, a `PriceCache` (the default one if True), which is
+                  invalidated when the csv file changes
+    :param freqs: frames to aggregate from the hourly prices and their frequencies, defaults to `RESAMPLE_FREQS`,
+                  e.g. {"daily": "1d", "weekly": "1w"}
+    """
+    freqs = RESAMPLE_FREQS if freqs is None else freqs
+    key = None
+    if cache:
+        cache = cache if isinstance(cache, PriceCache) else PriceCache()
+        key = cache.key(path)
+    return PriceSet(lambda: _read_prices(path), freqs, cache=cache or None, key=key,
+                    check=_check_prices if check_missing else None)
+
+
+def _count_lines(path: str) -> int:
+    """ Counts the lines of a file in blocks, an upper bound of its number of rows plus the header. """
+    lines = 0
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(COUNT_BLOCK_SIZE), b''):
+            lines += block.count(b'\n')
+            last = block
+    return lines + (lines > 0 and not last.endswith(b'\n'))
+
 
-    prices_daily = prices_hourly.resample('D').last()
-    prices_monthly = prices_hourly.resample('M').last()
+def _read_chunks(path: str, chunksize: int, dtypes: Dict[str, Union[str, type]], engine: str) -> Iterator[pd.DataFrame]:
+    """ Reads a csv file in chunks with lowercase columns and a date index, parsing the dtypes as it reads. """
+    header = pd.read_csv(path, nrows=0).columns
+    names = {column.lower(): column for column in header}
+    if 'date' not in names:
+        raise ValueError("The csv file has no date column")
+
+    if engine == 'pyarrow':
+        import pyarrow
+        from pyarrow import csv
+
+        # Numeric columns are converted by the reader, the others once the batch is in pandas
+        types = {names[column]: pyarrow.from_numpy_dtype(np.dtype(dtype)) for column, dtype in dtypes.items()
+                 if column in names and isinstance(dtype, (str, type)) and np.dtype(dtype).kind in 'biuf'}
+        reader = csv.open_csv(path, read_options=csv.ReadOptions(block_size=max(chunksize * 64, 1 << 20)),
+                              convert_options=csv.ConvertOptions(column_types=types))
+        # Blocks of about `chunksize` rows of 64 bytes
+        chunks = (batch.to_pandas() for batch in reader)
+    else:
+        chunks = pd.read_csv(path, chunksize=chunksize, parse_dates=[names['date']],
+                             dtype={names[column]: dtype for column, dtype in dtypes.items() if column in names})
+
+    for chunk in chunks:
+        chunk.columns = chunk.columns.str.lower()
+        chunk = chunk.set_index('date')
+        chunk.index = pd.to_datetime(chunk.index)
+        yield chunk.astype({column: dtype for column, dtype in dtypes.items() if column in chunk.columns})
+
+
+@instrumented
+def load_prices_chunked(path: str, chunksize: int = 1_000_000, dtypes: Optional[Dict[str, Union[str, type]]] = None,
+                        engine: str = 'c', check_missing: bool = False,
+                        freqs: Optional[Dict[str, str]] = None) -> PriceSet:
+    """ 
+    Loads hourly prices from a csv file chunk by chunk and returns the same frames as `load_prices`, loaded. The dtypes
+    and dates are parsed while reading, every chunk is written into columns preallocated from a count of the lines
+    of the file, and the daily and monthly bars are aggregated from every chunk as it is read. The peak memory is
+    the output plus one chunk and a copy of the string columns, rather than over twice the output.
+
+    :param path: path of the csv file, sorted by date
+    :param chunksize: number of rows per chunk
+    :param dtypes: dtypes of the columns, e.g. {"close": "float32", "symbol": "category"}, defaults to `PRICE_DTYPES`
+    :param engine: 'c' for the pandas parser or 'pyarrow' for the streaming pyarrow reader
+    :param check_missing: raise if there are NaNs or missing hours in the hourly prices
+    :param freqs: frames to aggregate from the hourly prices and their frequencies, defaults to `RESAMPLE_FREQS`
+    """
+    freqs = RESAMPLE_FREQS if freqs is None else freqs
+    if engine not in ['c', 'pyarrow']:
+        raise ValueError("`engine` must be 'c' or 'pyarrow'")
+    dtypes = {**PRICE_DTYPES, **(dtypes or {})}
+    capacity = max(_count_lines(path) - 1, 0)
+
+    # The dates are kept as int64 in the unit of the first chunk, UTC for tz-aware dates, and localized at the end
+    columns, dates, dtypes_out, tz, unit, origin = {}, None, None, None, None, None
+    parts = {name: [] for name in freqs}
+    filled = 0
+    for chunk in _read_chunks(path, chunksize, dtypes, engine):
+        if len(chunk) == 0:
+            continue
+        if dtypes_out is None:
+            dtypes_out, tz, unit = chunk.dtypes, chunk.index.tz, chunk.index.unit
+            # The bins of every chunk start from the first midnight of the file, as those of `load_prices`
+            origin = chunk.index[0].normalize()
+            dates = np.empty(capacity, dtype=np.int64)
+            for column, dtype in dtypes_out.items():
+                columns[column] = np.empty(capacity, dtype=chunk[column].to_numpy().dtype)
+
+        if (chunk.index.tz is None) != (tz is None):
+            raise ValueError("The dates of the csv file must be all tz-naive or all tz-aware")
+        stamps = chunk.index.as_unit(unit).asi8
+        if filled and stamps[0] < dates[filled - 1]:
+            raise ValueError("The rows of the csv file must be sorted by date")
+        stop = filled + len(chunk)
+        dates[filled:stop] = stamps
+        for column in columns:
+            columns[column][filled:stop] = chunk[column].to_numpy()
+        filled = stop
+
+        bars = aggregate_bars(chunk, list(freqs.values()), origin=origin)
+        for name, freq in freqs.items():
+            parts[name].append(bars[freq])
+        del chunk, bars
+
+    if dtypes_out is None:
+        # Nothing to stream from a file without rows
+        return PriceSet.from_frames(dict(load_prices(path, check_missing, freqs=freqs)), freqs)
+
+    index = pd.DatetimeIndex(dates[:filled].view(f'datetime64[{unit}]'), name='date')
+    if tz is not None:
+        index = index.tz_localize('UTC').tz_convert(tz)
+    prices_hourly = pd.DataFrame({column: pd.Series(values[:filled], index=index, copy=False)
+                                  .astype(dtypes_out[column]) for column, values in columns.items()},
+                                 index=index, copy=False)
+    if check_missing:
+        _check_prices(prices_hourly)
 
-    return {"hourly": prices_hourly, "daily": prices_daily, "monthly": prices_monthly}
+    # The partial bars of the chunks aggregate to the bars of the whole file, merging the bins split between two chunks
+    frames = {"hourly": prices_hourly}
+    for name, freq in freqs.items():
+        frames[name] = aggregate_bars(pd.concat(parts[name]), [freq], origin=origin)[freq]
+    return PriceSet.from_frames(frames, freqs)
@@ -0,0 +1,119 @@
+import pandas as pd
+
+from collections.abc import Mapping
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+
+from xtrader.dataloaders.bars import BarAggregator
+from xtrader.dataloaders.bars import _parse_freq
+from xtrader.dataloaders.cache import PriceCache
+
+
+class PriceSet(Mapping):
+
+    def __init__(self, load: Callable[[], pd.DataFrame], freqs: Dict[str, str], base: str = 'hourly',
+                 cache: Optional[PriceCache] = None, key: Optional[str] = None,
+                 check: Optional[Callable[[pd.DataFrame], None]] = None):
+        """
+        Initializes the `PriceSet` class, a lazy mapping from names like 'hourly' or 'daily' to price frames.
+        Nothing is loaded until a frame is first accessed: the base frame is then loaded, and every other frame
+        is aggregated from it on its first access (see `BarAggregator`) and kept. Frequencies that are not
+        named, e.g. prices['1w'] or prices.resample('1Q'), are aggregated on request in the same way.
+
+        :param load: Function that loads the base frame.
+        :param freqs: Names of the aggregated frames and their frequencies, e.g. {'daily': '1d', 'monthly': '1M'}.
+        :param base: Name of the base frame.
+        :param cache: Cache to read the frames from and to store them in when they are computed.
+        :param key: Key of the frames in the cache.
+        :param check: Function called with the base frame when it is loaded, e.g. to validate it. The base frame
+                      is checked before it is kept or cached, and before any other frame is returned, also when
+                      the other frames are read from the cache.
+        """
+        self.freqs = dict(freqs)
+        self.base = base
+        self._load = load
+        self._cache = cache
+        self._key = key
+        self._check = check
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._aggregator: Optional[BarAggregator] = None
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame], freqs: Dict[str, str], base: str = 'hourly') -> 'PriceSet':
+        """ Builds a price set from frames that are already loaded, which can still be resampled on request. """
+        prices = cls(lambda: frames[base], freqs, base)
+        for name, frame in frames.items():
+            prices._frames[prices._label(name)] = frame
+        return prices
+
+    @property
+    def loaded(self) -> List[str]:
+        """ Returns the names of the frames that are materialized. """
+        return [name for name in self if self._label(name) in self._frames]
+
+    def resample(self, freq: str, name: Optional[str] = None) -> pd.DataFrame:
+        """
+        Returns the prices aggregated to a frequency, and adds it to the names of the set if a name is given.
+
+        :param freq: Frequency, e.g. '1w', '1Q' or '4h'.
+        :param name: Name to access the frame by, e.g. 'weekly'.
+        """
+        _parse_freq(freq)
+        if name is not None:
+            self.freqs[name] = freq
+        return self[freq if name is None else name]
+
+    def __getitem__(self, name: str) -> pd.DataFrame:
+        label = self._label(name)
+        if label not in self._frames:
+            if label == self.base:
+                self._frames[label] = self._materialize(label, self._load, self._check)
+            else:
+                try:
+                    _parse_freq(label)
+                except ValueError:
+                    raise KeyError(name) from None
+                if self._check is not None:
+                    # The frames aggregated from an invalid base frame are not returned either
+                    self[self.base]
+                self._frames[label] = self._materialize(label, lambda: self._aggregate(label))
+        return self._frames[label]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([self.base] + list(self.freqs))
+
+    def __len__(self) -> int:
+        return 1 + len(self.freqs)
+
+    def __repr__(self) -> str:
+        return f"PriceSet({list(self)}, loaded={self.loaded})"
+
+    def _label(self, name: str) -> str:
+        """ Returns the label a frame is kept and cached under: the name of the base frame or the frequency. """
+        return self.freqs.get(name, name)
+
+    def _materialize(self, label: str, compute: Callable[[], pd.DataFrame],
+                     check: Optional[Callable[[pd.DataFrame], None]] = None) -> pd.DataFrame:
+        """ Reads a frame from the cache, or computes it and stores it in the cache, after checking it. """
+        if self._cache is not None:
+            frame = self._cache.read_frame(self._key, label)
+            if frame is not None:
+                if check is not None:
+                    check(frame)
+                return frame
+        frame = compute()
+        if check is not None:
+            check(frame)
+        if self._cache is not None:
+            self._cache.write_frame(self._key, label, frame)
+        return frame
+
+    def _aggregate(self, freq: str) -> pd.DataFrame:
+        """ Aggregates the base frame, with the bins of all the frequencies kept by a single aggregator. """
+        base = self[self.base]
+        if self._aggregator is None:
+            self._aggregator = BarAggregator(base.index)
+        return self._aggregator.aggregate(base, freq)
@@ -0,0 +1,223 @@
+import os
+import json
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+from contextlib import contextmanager
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from xtrader.dataloaders.dataset import _timestamp
+
+try:
+    import fcntl
+except ImportError:
+    # Without file locks (Windows), concurrent writes of a store may leave versions behind
+    fcntl = None
+
+# Version of the layout of the store directory
+STORE_VERSION = 1
+# File naming the directory of the current version of a store
+CURRENT = 'CURRENT'
+# Prefix of the version directories of a store
+VERSION_PREFIX = 'v-'
+# Attempts to open a store whose current version is replaced while it is opened
+OPEN_ATTEMPTS = 3
+
+
+def _current(root: str) -> Optional[str]:
+    """ Returns the directory of the current version of a store, or None if there is no store. """
+    try:
+        with open(os.path.join(root, CURRENT)) as file:
+            return os.path.join(root, file.read().strip())
+    except FileNotFoundError:
+        return None
+
+
+@contextmanager
+def _locked(root: str) -> Iterator[None]:
+    """ Holds an exclusive lock of the directory of a store, so that writers write and swap versions in turn. """
+    if fcntl is None:
+        yield
+        return
+    descriptor = os.open(root, os.O_RDONLY)
+    try:
+        fcntl.flock(descriptor, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(descriptor)
+
+
+class OHLCVStore(object):
+
+    def __init__(self, root: str):
+        """
+        Initializes the `OHLCVStore` class, which opens a directory written by `OHLCVStore.write`: one contiguous
+        .npy array per column and a sorted int64 array of the timestamps in nanoseconds (UTC for tz-aware data).
+        The arrays are memory mapped read-only, so opening the store reads nothing, slices are views of the mapped
+        files found by binary search on the timestamps, and processes that open the same store share the pages of
+        the OS page cache rather than each holding a copy. Stores pickle as their path, so they can be sent to
+        worker processes cheaply.
+
+        The arrays live in a directory per version of the store, named by the `CURRENT` file of the store. Every
+        array is mapped when the store is opened, so an opened store keeps reading the version it opened after a
+        new one is written.
+
+        :param root: Directory of the store.
+        """
+        self.root = root
+        for attempt in range(OPEN_ATTEMPTS):
+            directory = _current(root)
+            if directory is None:
+                raise FileNotFoundError(f"No store in {root}")
+            try:
+                self._open(directory)
+                break
+            except FileNotFoundError:
+                # The version was replaced and removed since `CURRENT` was read
+                if attempt == OPEN_ATTEMPTS - 1 or _current(root) == directory:
+                    raise
+        self.directory = directory
+
+    def _open(self, directory: str) -> None:
+        """ Reads the metadata of a version of the store and maps its arrays. """
+        with open(os.path.join(directory, 'meta.json')) as file:
+            self.meta = json.load(file)
+        if self.meta.get('version') != STORE_VERSION:
+            raise ValueError(f"Unsupported store version {self.meta.get('version')}")
+        self.timestamps = np.load(os.path.join(directory, 'index.npy'), mmap_mode='r')
+        self._columns: Dict[str, np.ndarray] = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+                                                for name in self.meta['columns']}
+
+    @staticmethod
+    def exists(root: str) -> bool:
+        """ Checks if a directory holds a store. """
+        directory = _current(root)
+        return directory is not None and os.path.exists(os.path.join(directory, 'meta.json'))
+
+    @classmethod
+    def write(cls, prices: pd.DataFrame, root: str, columns: Optional[List[str]] = None) -> 'OHLCVStore':
+        """
+        Writes prices to a store, replacing it if it exists, and opens it. The store is written to a new version
+        directory, then the `CURRENT` file is replaced atomically to point to it and the other versions are
+        removed, so readers see either the previous or the new store, never a partial one, and a failed write
+        leaves the previous store in place. Writers hold a lock of the directory, so concurrent writes do not
+        leave versions behind. Stores already opened keep their mapped arrays of the previous version.
+
+        :param prices: Prices with a datetime index.
+        :param root: Directory of the store.
+        :param columns: Numeric columns to store. Defaults to all the numeric columns.
+        """
+        index = pd.DatetimeIndex(prices.index)
+        if not index.is_monotonic_increasing:
+            raise ValueError("The index of the prices must be sorted")
+        columns = columns or [column for column, dtype in prices.dtypes.items() if dtype.kind in 'biuf']
+        invalid = [column for column in columns if prices[column].dtype.kind not in 'biuf']
+        if invalid:
+            raise ValueError(f"Only numeric columns can be stored, got {invalid}")
+
+        os.makedirs(root, exist_ok=True)
+        with _locked(root):
+            cls._write(prices, index, root, columns)
+        return cls(root)
+
+    @staticmethod
+    def _write(prices: pd.DataFrame, index: pd.DatetimeIndex, root: str, columns: List[str]) -> None:
+        """ Writes a new version of a store, points `CURRENT` to it and removes the other versions. """
+        staging = tempfile.mkdtemp(prefix=VERSION_PREFIX, dir=root)
+        try:
+            stamps = (index.tz_convert('UTC').tz_localize(None) if index.tz is not None else index).as_unit('ns')
+            np.save(os.path.join(staging, 'index.npy'), stamps.asi8)
+            for column in columns:
+                np.save(os.path.join(staging, f'{column}.npy'), np.ascontiguousarray(prices[column].to_numpy()))
+            meta = {'version': STORE_VERSION, 'columns': columns, 'rows': len(index), 'index_name': index.name,
+                    'tz': None if index.tz is None else str(index.tz)}
+            with open(os.path.join(staging, 'meta.json'), 'w') as file:
+                json.dump(meta, file)
+            descriptor, pointer = tempfile.mkstemp(prefix='.current-', dir=root)
+            with os.fdopen(descriptor, 'w') as file:
+                file.write(os.path.basename(staging))
+            os.replace(pointer, os.path.join(root, CURRENT))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        # The replaced version, and any version left by a writer that was killed
+        for name in os.listdir(root):
+            if name.startswith(VERSION_PREFIX) and name != os.path.basename(staging):
+                shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+    @property
+    def columns(self) -> List[str]:
+        """ Returns the names of the stored columns. """
+        return list(self.meta['columns'])
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __reduce__(self) -> Tuple[type, Tuple[str]]:
+        return self.__class__, (self.root,)
+
+    def column(self, name: str) -> np.ndarray:
+        """ Returns the read-only memory mapped array of a column. """
+        return self._columns[name]
+
+    def bounds(self, start: Optional[Union[str, pd.Timestamp]] = None,
+               end: Optional[Union[str, pd.Timestamp]] = None) -> Tuple[int, int]:
+        """
+        Returns the positions [first, last) of the rows between two dates, both included, by binary search.
+        Dates given as strings cover their whole period as in `.loc`, e.g. an end of '2021-03-31' includes that day.
+
+        :param start: First date. Defaults to the first row.
+        :param end: Last date. Defaults to the last row.
+        """
+        first = 0 if start is None else int(np.searchsorted(self.timestamps, self._stamp(start), side='left'))
+        last = len(self) if end is None else int(np.searchsorted(self.timestamps, self._stamp(end, end=True), side='right'))
+        return first, max(first, last)
+
+    def arrays(self, start: Optional[Union[str, pd.Timestamp]] = None, end: Optional[Union[str, pd.Timestamp]] = None,
+               columns: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Returns views of the timestamps (key 'index') and of the columns between two dates, without copying.
+
+        :param start: First date. Defaults to the first row.
+        :param end: Last date. Defaults to the last row.
+        :param columns: Columns to return. Defaults to all the columns.
+        """
+        first, last = self.bounds(start, end)
+        arrays = {'index': self.timestamps[first:last]}
+        for column in columns or self.columns:
+            arrays[column] = self.column(column)[first:last]
+        return arrays
+
+    def frame(self, start: Optional[Union[str, pd.Timestamp]] = None, end: Optional[Union[str, pd.Timestamp]] = None,
+              columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Returns the prices between two dates as a frame whose columns are read-only views of the mapped files.
+        Only the index of tz-aware stores is copied, to convert it to the time zone of the prices.
+
+        :param start: First date. Defaults to the first row.
+        :param end: Last date. Defaults to the last row.
+        :param columns: Columns to return. Defaults to all the columns.
+        """
+        arrays = self.arrays(start, end, columns)
+        index = pd.DatetimeIndex(arrays.pop('index').view('datetime64[ns]'), name=self.meta['index_name'], copy=False)
+        if self.meta['tz'] is not None:
+            index = index.tz_localize('UTC').tz_convert(self.meta['tz'])
+        return pd.DataFrame({column: pd.Series(values, index=index, copy=False) for column, values in arrays.items()},
+                            index=index, copy=False)
+
+    def _stamp(self, value: Union[str, pd.Timestamp], end: bool = False) -> int:
+        """ Converts a date to the nanoseconds of the stored timestamps, in the time zone of the store if naive. """
+        stamp = _timestamp(value, end)
+        if self.meta['tz'] is not None:
+            stamp = stamp.tz_localize(self.meta['tz']) if stamp.tz is None else stamp
+            stamp = stamp.tz_convert('UTC').tz_localize(None)
+        elif stamp.tz is not None:
+            raise ValueError("The store has naive timestamps, but the date has a time zone")
+        return stamp.as_unit('ns').value
@@ -4,4 +4,11 @@ __all__ = ['returns',
            'momenta',
            'technical',
            'seasonal',
+           'cache',
+           'kernels',
+           'panel',
+           'parallel',
+           'pipeline',
+           'precision',
+           'streaming',
            'utils']
\ No newline at end of file
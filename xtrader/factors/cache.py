@@ -0,0 +1,121 @@
+import weakref
+import numpy as np
+import pandas as pd
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict
+from typing import Hashable
+from typing import Iterator
+from typing import Tuple
+
+
+class ReturnsCache(object):
+
+    def __init__(self, maxsize: int = 256):
+        """
+        Initializes the `ReturnsCache` class, a bounded LRU cache of return series shared by all factor classes.
+        The cache is opt-in: return series are only cached inside a `scope`, and all entries are dropped when
+        the outermost scope exits, so the factors of separate calls never share stale returns. Entries are keyed
+        by (frame identity, column buffer, column, period, freq, normalize) and hold a reference to the column
+        buffer, so reassigning a column invalidates its entries and its address cannot be reused while they are
+        cached. The prices must not be modified in place inside a scope.
+
+        :param maxsize: Maximum number of return series kept before the least recently used ones are evicted.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._finalizers: Dict[int, weakref.finalize] = {}
+        self._depth = 0
+
+    @contextmanager
+    def scope(self) -> Iterator['ReturnsCache']:
+        """
+        Caches the return series computed inside the block, e.g. to share them between `Returns` and `Momenta`
+        calls on the same prices, and drops them when the outermost scope exits.
+        """
+        self._depth += 1
+        try:
+            yield self
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                self._drop()
+
+    def returns(self, prices: pd.DataFrame, column: str, period: int, freq: str, normalize: bool = True) -> pd.Series:
+        """
+        Returns the `period` return series of `column`, computing it only if it is not cached.
+        If the prices already contain the return column, it is returned as is.
+
+        :param prices: Prices to calculate the returns from.
+        :param column: Column to calculate the returns for.
+        :param period: Period to calculate the returns for.
+        :param freq: Frequency of the prices label. Can be 'h' for hour, 'd' for day etc.
+        :param normalize: If True, the returns are normalized with the geometric average.
+        """
+        name = f'{column}_return_{period}{freq}'
+        if name in prices.columns:
+            return prices[name]
+
+        # Imported here as `returns` imports this module
+        from xtrader.factors.returns import _returns_matrix
+
+        values = prices[column].to_numpy()
+        if not self._depth:
+            result = _returns_matrix(values.astype(float, copy=False).reshape(-1, 1), [period], normalize)[:, 0]
+            return pd.Series(result, index=prices.index, name=name, copy=False)
+
+        key = (self._frame_key(prices, values), column, period, freq, normalize)
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        else:
+            self.misses += 1
+            result = _returns_matrix(values.astype(float, copy=False).reshape(-1, 1), [period], normalize)[:, 0]
+            result.setflags(write=False)
+            self._store(key, (values, result))
+        return pd.Series(self._entries[key][1], index=prices.index, name=name, copy=False)
+
+    def clear(self) -> None:
+        """ Removes all cached return series and resets the statistics. """
+        self._drop()
+        self.hits, self.misses = 0, 0
+
+    def info(self) -> Dict[str, int]:
+        """ Returns the hit/miss statistics and the current size of the cache. """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _frame_key(self, prices: pd.DataFrame, values: np.ndarray) -> Tuple[Hashable, ...]:
+        """ Returns the identity/version key of a frame and registers the eviction of its entries on collection. """
+        frame_id = id(prices)
+        if frame_id not in self._finalizers:
+            self._finalizers[frame_id] = weakref.finalize(prices, self._evict_frame, frame_id)
+        return frame_id, values.__array_interface__['data'][0], len(values)
+
+    def _store(self, key: Tuple[Hashable, ...], entry: Tuple[np.ndarray, np.ndarray]) -> None:
+        """ Stores a column buffer and its return series, and evicts the least recently used beyond `maxsize`. """
+        self._entries[key] = entry
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _drop(self) -> None:
+        """ Removes all cached return series. """
+        for finalizer in self._finalizers.values():
+            finalizer.detach()
+        self._entries.clear()
+        self._finalizers.clear()
+
+    def _evict_frame(self, frame_id: int) -> None:
+        """ Evicts all entries of a garbage collected frame, so that its id can be safely reused. """
+        self._finalizers.pop(frame_id, None)
+        for key in [key for key in self._entries if key[0][0] == frame_id]:
+            del self._entries[key]
+
+
+# Cache shared by `Returns`, `Momenta` and the other factor classes inside `RETURNS_CACHE.scope()`
+RETURNS_CACHE = ReturnsCache()
@@ -0,0 +1,179 @@
+import numpy as np
+
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+# Number of values of the windows processed at once by `_window_moments`
+WINDOW_BLOCK_SIZE = 1 << 21
+# Windows whose variance from the re-centred sums is below this fraction of the sum of squares are recomputed
+RECENTRED_TOLERANCE = 1e-6
+# Largest weight of the block-wise Wilder smoothing, the blocks are rescaled before the weights grow past it
+WILDER_MAX_WEIGHT = 1e100
+
+
+def _valid_tail(values: np.ndarray) -> int:
+    """ Returns the index of the first non-NaN value, as TA-Lib skips leading NaNs. """
+    finite = np.flatnonzero(~np.isnan(values))
+    return int(finite[0]) if len(finite) else len(values)
+
+
+def _exact_moments(values: np.ndarray, time_period: int, windows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """ Returns the mean and the population variance of some windows, each computed in two passes over the window. """
+    windows = np.lib.stride_tricks.sliding_window_view(values, time_period)[windows]
+    mean = windows.mean(axis=1)
+    deviations = windows - mean[:, None]
+    return mean, np.einsum('ij,ij->i', deviations, deviations) / time_period
+
+
+def _window_moments(values: np.ndarray, time_period: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the mean and the population variance of every window of `time_period` values in O(N). The windows are
+    split in blocks of `time_period` windows, and the moments of a block come from the prefix sums of the
+    differences of its values to their mean, so unlike prefix sums over the whole series their precision does not
+    degrade along long or drifting series. The few windows whose variance is too small for the precision of the
+    sums of their block, e.g. right after a jump of the level, are recomputed from the window itself. Windows with
+    a NaN are NaN.
+    """
+    n_windows = len(values) - time_period + 1
+    n_blocks = -(-n_windows // time_period)
+    width = 2 * time_period - 1
+    padded = np.r_[values, np.full(n_blocks * time_period - n_windows, np.nan)]
+    blocks = np.lib.stride_tricks.sliding_window_view(padded, width)[::time_period]
+
+    mean = np.empty(n_blocks * time_period)
+    variance = np.empty(n_blocks * time_period)
+    recompute = np.zeros(n_blocks * time_period, dtype=bool)
+    step = max(1, WINDOW_BLOCK_SIZE // width)
+    for first in range(0, n_blocks, step):
+        block = blocks[first:first + step]
+        finite = ~np.isnan(block)
+        counts = finite.sum(axis=1)
+        with np.errstate(invalid='ignore'):
+            shift = np.where(finite, block, 0).sum(axis=1) / counts
+        deviations = np.where(finite, block - shift[:, None], 0)
+        sums = []
+        for moments in [deviations, deviations * deviations, ~finite]:
+            cumulative = np.zeros((len(block), width + 1))
+            np.cumsum(moments, axis=1, out=cumulative[:, 1:])
+            sums.append((cumulative[:, time_period:] - cumulative[:, :time_period], cumulative[:, time_period:]))
+        (first_sum, _), (second_sum, prefix), (nans, _) = sums
+        squares = second_sum - first_sum * first_sum / time_period
+        positions = slice(first * time_period, (first + len(block)) * time_period)
+        mean[positions] = np.where(nans > 0, np.nan, shift[:, None] + first_sum / time_period).ravel()
+        variance[positions] = np.where(nans > 0, np.nan, np.maximum(squares, 0) / time_period).ravel()
+        recompute[positions] = ((nans == 0) & (squares < RECENTRED_TOLERANCE * prefix)).ravel()
+
+    windows = np.flatnonzero(recompute[:n_windows])
+    step = max(1, WINDOW_BLOCK_SIZE // time_period)
+    for first in range(0, len(windows), step):
+        some = windows[first:first + step]
+        mean[some], variance[some] = _exact_moments(values, time_period, some)
+    return mean[:n_windows], variance[:n_windows]
+
+
+def _wilder(moves: np.ndarray, time_periods: np.ndarray) -> np.ndarray:
+    """
+    Returns the Wilder smoothing of non-negative moves for every time period at once, seeded with the mean of the
+    first `time_period` moves, with one row per time period and NaN before the seed. The exponential averages are
+    the cumulative sums of the moves weighted by growing powers of 1 / (1 - alpha), over blocks short enough for the
+    weights to stay below `WILDER_MAX_WEIGHT`. A NaN move makes the averages NaN from then on, as in TA-Lib.
+    """
+    smoothed = np.empty((len(time_periods), len(moves)))
+    # The seeds divided by alpha, so that the averages equal the seeds
+    seeds = np.cumsum(moves)[time_periods - 1]
+    alpha = 1 / time_periods[:, None]
+    beta = 1 - alpha
+    slowest = beta[time_periods > 1].min(initial=1.0)
+    length = max(1, int(np.log(WILDER_MAX_WEIGHT) / -np.log(slowest))) if slowest < 1 else len(moves)
+    powers = beta ** np.arange(1, min(length, len(moves)) + 1)
+    with np.errstate(divide='ignore'):
+        # Alpha of one keeps the last move, see below
+        weights = np.where(beta == 0, 0, alpha / powers)
+
+    previous = np.zeros((len(time_periods), 1))
+    block = np.empty((len(time_periods), min(length, len(moves))))
+    for first in range(0, len(moves), length):
+        size = min(length, len(moves) - first)
+        averages = block[:, :size]
+        averages[:] = moves[first:first + size]
+        for row, time_period in enumerate(time_periods):
+            # Nothing before the seed
+            if first < time_period:
+                averages[row, :time_period - 1 - first] = 0
+                if time_period - 1 - first < size:
+                    averages[row, time_period - 1 - first] = seeds[row]
+        averages *= weights[:, :size]
+        np.cumsum(averages, axis=1, out=averages)
+        averages += previous
+        averages *= powers[:, :size]
+        smoothed[:, first:first + size] = averages
+        previous = smoothed[:, first + size - 1:first + size]
+
+    for row, time_period in enumerate(time_periods):
+        if time_period == 1:
+            # Alpha of one keeps the last move, the weights of which overflow
+            smoothed[row] = moves
+        smoothed[row, :time_period - 1] = np.nan
+    return smoothed
+
+
+def rsi(values: np.ndarray, time_periods: List[int]) -> Dict[int, np.ndarray]:
+    """
+    Calculates the RSI of a series for a grid of time periods, with the same definition as TA-Lib. The price
+    changes are computed once and smoothed for the whole grid at once. The average gains and losses are seeded with
+    their mean over the first `time_period` changes and then updated with Wilder smoothing, an exponential average
+    with alpha = 1 / time_period. As in TA-Lib, leading NaNs are skipped and the RSI is NaN from the first later
+    NaN on.
+
+    :param values: 1D array of prices.
+    :param time_periods: List of periods to calculate the RSI for.
+    """
+    values = np.asarray(values, dtype=float)
+    start = _valid_tail(values)
+    change = np.diff(values[start:])
+    gains = np.where(np.isnan(change), np.nan, np.where(change > 0, change, 0))
+    losses = np.where(np.isnan(change), np.nan, np.where(change < 0, -change, 0))
+
+    out = {time_period: np.full(len(values), np.nan) for time_period in time_periods}
+    grid = np.unique([time_period for time_period in time_periods if len(change) >= time_period])
+    if len(grid):
+        average_gains, total = _wilder(gains, grid), _wilder(losses, grid)
+        total += average_gains
+        with np.errstate(divide='ignore', invalid='ignore'):
+            average_gains *= 100
+            average_gains /= total
+        average_gains[np.abs(total) < 1e-8] = 0
+        for row, time_period in enumerate(grid):
+            out[time_period][start + time_period:] = average_gains[row, time_period - 1:]
+    return out
+
+
+def bbands(values: np.ndarray, time_periods: List[int], stds_up: List[float],
+           stds_down: List[float]) -> Dict[Tuple[int, float, float], Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Calculates the Bollinger Bands of a series for the grid of every time period and number of standard deviations,
+    with the same definition as TA-Lib: a simple moving average with bands at multiples of the population standard
+    deviation. The moments of every window are computed from the window itself, see `_window_moments`.
+
+    :param values: 1D array of prices.
+    :param time_periods: List of periods to calculate the bands for.
+    :param stds_up: List of numbers of standard deviations for the upper band.
+    :param stds_down: List of numbers of standard deviations for the lower band.
+    """
+    values = np.asarray(values, dtype=float)
+    start = _valid_tail(values)
+    tail = values[start:]
+
+    out = {}
+    for time_period in time_periods:
+        mid = np.full(len(values), np.nan)
+        std = np.full(len(values), np.nan)
+        if len(tail) >= time_period:
+            mean, variance = _window_moments(tail, time_period)
+            mid[start + time_period - 1:] = mean
+            std[start + time_period - 1:] = np.sqrt(variance)
+        for up in stds_up:
+            for down in stds_down:
+                out[(time_period, up, down)] = (mid + up * std, mid, mid - down * std)
+    return out
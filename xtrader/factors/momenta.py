@@ -1,11 +1,13 @@
+import numpy as np
 import pandas as pd
 
 from typing import Optional
 from typing import List
 from typing import Union
 
-from xtrader.factors.returns import Returns
 from xtrader.factors import utils
+from xtrader.factors.cache import RETURNS_CACHE
+from xtrader.instrumentation import instrumented
 from xtrader.utils import TIME_SYMBOLS
 
 
@@ -16,10 +18,19 @@ class Momenta(object):
         self.prices = prices
 
     @staticmethod
+    @instrumented
     def momenta(prices: pd.DataFrame, periods: List[int], freq: str, columns: Optional[Union[List[str], str]] = None,
-                    normalize: bool = True, dropna: bool = False, return_full: bool = True) -> pd.DataFrame:
-        """ Calculates momentums from prices."""
-        prices = prices.copy()
+                    normalize: bool = True, dropna: bool = False, return_full: bool = True,
+                    out: Optional[Union[pd.DataFrame, np.ndarray]] = None) -> Union[pd.DataFrame, np.ndarray]:
+        """ 
+        Calculates momentums from prices. With `out`, the momenta are written into a preallocated frame,
+        or (rows, features) block in the order of `return_full=False`, instead.
+
+        The returns are read from the prices if they have the return columns. Otherwise they are computed, and are
+        only shared with the other factor calls on the same prices inside `RETURNS_CACHE.scope()`, e.g.
+        `with RETURNS_CACHE.scope(): Returns.lagged_returns(prices, ...); Momenta.momenta(prices, ...)`. Outside
+        a scope every call computes its own returns. `FactorPipeline` shares them without a scope.
+        """
         # Set Columns to calculate the lagged momentums for
         columns = utils._get_columns(columns, ['high', 'low', 'open', 'close', 'volume'])
 
@@ -27,35 +38,29 @@ class Momenta(object):
         if 1 in periods:
             raise ValueError("Period 1 is not allowed for momenta")
         
+        features = {}
         for column in columns:
-            # If return_1 is not in prices, calculate it
-            if not f"{column}_return_1{freq}" in prices.columns:
-                prices[f"{column}_return_1{freq}"] = Returns.returns(prices, [1], freq, [column], normalize, dropna, return_full=False)[f"{column}_return_1{freq}"]
+            # Returns are read from the prices if present, otherwise computed, and shared inside `RETURNS_CACHE.scope()`
+            returns_1 = RETURNS_CACHE.returns(prices, column, 1, freq, normalize)
+            if returns_1.name not in prices.columns:
+                features[returns_1.name] = returns_1
             
             for period in periods:
-                if not f"column_return_{period}{freq}" in prices.columns:
-                    prices[f"{column}_return_{period}{freq}"] = Returns.returns(prices, [period], freq, [column],
-                                                                            normalize, dropna, return_full=False)[f"{column}_return_{period}{freq}"]
+                returns = RETURNS_CACHE.returns(prices, column, period, freq, normalize)
+                if returns.name not in prices.columns:
+                    features[returns.name] = returns
 
-                prices[f"{column}_momentum_{period}{freq}"] = prices[f"{column}_return_{period}{freq}"].sub(prices[f"{column}_return_1{freq}"])
+                features[f"{column}_momentum_{period}{freq}"] = returns.sub(returns_1)
 
             # Calculate momentum 3-12
             if (3 in periods) and (12 in periods):
-                print(True)
-                prices[f"{column}_momentum_3_12{freq}"] = prices[f"{column}_momentum_12{freq}"].sub(prices[f"{column}_momentum_3{freq}"])
+                features[f"{column}_momentum_3_12{freq}"] = features[f"{column}_momentum_12{freq}"].sub(features[f"{column}_momentum_3{freq}"])
         
-        # Drop NaNs
-        if dropna:
-            prices.dropna(inplace=True)
-
         # Return full dataframe or only the columns with the momenta
-        if not return_full:
-            cols = [f'{column}_momentum_{period}{freq}' for column in columns for period in periods]
-            if (3 in periods) and (12 in periods):
-                cols += [f'{column}_momentum_3_12{freq}' for column in columns]
-            return prices[cols]
-            
-        return prices
+        cols = [f'{column}_momentum_{period}{freq}' for column in columns for period in periods]
+        if (3 in periods) and (12 in periods):
+            cols += [f'{column}_momentum_3_12{freq}' for column in columns]
+        return utils._collect(prices, features, dropna, return_full, cols, out=out)
 
     @staticmethod
     def hourly(prices: pd.DataFrame, periods: List[int], columns: Optional[List[str]] = None,
@@ -0,0 +1,241 @@
+import numpy as np
+import pandas as pd
+
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from xtrader.factors import utils
+from xtrader.factors.returns import _returns_matrix
+from xtrader.factors.seasonal import _calendar_features
+from xtrader.instrumentation import instrumented
+
+
+def _group_positions(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the position of every row within its symbol and the number of rows after it in the same symbol,
+    for symbol codes whose rows are contiguous.
+    """
+    n_rows = len(codes)
+    boundary = np.r_[True, codes[1:] != codes[:-1]] if n_rows else np.zeros(0, dtype=bool)
+    starts = np.flatnonzero(boundary)
+    group = np.cumsum(boundary) - 1
+    sizes = np.diff(np.r_[starts, n_rows])
+    position = np.arange(n_rows) - starts[group]
+    return position, sizes[group] - position - 1
+
+
+def _panel_returns(values: np.ndarray, periods: List[int], normalize: bool, position: np.ndarray) -> np.ndarray:
+    """ Calculates the returns of every column for every period, masking the windows that cross a symbol boundary. """
+    n_rows, n_columns = values.shape
+    out = _returns_matrix(values, periods, normalize).reshape(n_rows, n_columns, len(periods))
+    for k, period in enumerate(periods):
+        out[position < period, :, k] = np.nan
+    return out
+
+
+def _panel_shift(values: np.ndarray, lag: int, position: np.ndarray, remaining: np.ndarray) -> np.ndarray:
+    """ Shifts the rows of every symbol by `lag`, forward for positive and backward for negative lags. """
+    out = np.full(values.shape, np.nan)
+    k = min(abs(lag), len(values))
+    if lag >= 0:
+        out[k:] = values[:len(values) - k]
+        out[position < lag] = np.nan
+    else:
+        out[:len(values) - k] = values[k:]
+        out[remaining < -lag] = np.nan
+    return out
+
+
+class Panel(object):
+
+    def __init__(self, prices: Optional[pd.DataFrame] = None, symbol: str = 'symbol'):
+        """ Initializes the `Panel` class."""
+        self.prices = prices
+        self.symbol = symbol
+
+    @staticmethod
+    @instrumented
+    def returns(prices: Union[pd.DataFrame, np.ndarray], periods: List[int], freq: str,
+                columns: Optional[Union[str, List[str]]] = None, normalize: bool = True, dropna: bool = False,
+                return_full: bool = True, symbol: str = 'symbol') -> Union[pd.DataFrame, np.ndarray]:
+        """
+        Calculates returns for all symbols of a panel at once. The returns are optionally normalized with the geometric average.
+
+        The panel is either a long frame indexed by (symbol, date), or with a `symbol` column and a date index, or a
+        3D block of shape (dates, symbols, columns). Long frames are sorted by symbol and date and no window crosses
+        from one symbol to the next. Blocks return a block of shape (dates, symbols, columns x periods).
+
+        :param prices: Panel of prices to calculate the returns from.
+        :param periods: List of periods to calculate the returns for.
+        :param freq: Frequency of the prices. Can be 'h' for hour, 'd' for day etc.
+        :param columns: Columns to calculate the returns for. For blocks, the names of the columns of the block.
+        :param normalize: If True, the returns are normalized with the geometric average.
+        :param dropna: If True, the rows with NaNs are dropped. Ignored for blocks.
+        :param return_full: If True, the full dataframe is returned. If False, only the columns with the returns. Ignored for blocks.
+        :param symbol: Name of the symbol index level or column.
+        """
+        columns = utils._get_columns(columns, ['high', 'low', 'open', 'close', 'volume'])
+        names = [f'{column}_return_{period}{freq}' for column in columns for period in periods]
+
+        prices, values, position, _ = Panel._values(prices, columns, symbol)
+        out = _panel_returns(values, periods, normalize, position)
+        return Panel._output(prices, [out], names, dropna, return_full)
+
+    @staticmethod
+    @instrumented
+    def lagged_returns(prices: Union[pd.DataFrame, np.ndarray], lags: List[int], freq: str,
+                       columns: Optional[Union[str, List[str]]] = None, normalize: bool = True, dropna: bool = False,
+                       return_full: bool = True, symbol: str = 'symbol') -> Union[pd.DataFrame, np.ndarray]:
+        """
+        Calculates lagged 1-period returns for all symbols of a panel at once, see `Panel.returns` for the panel layouts.
+
+        :param prices: Panel of prices to calculate the returns from.
+        :param lags: List of lags to calculate the returns for.
+        :param freq: Frequency of the prices label. Can be 'h' for hour, 'd' for day etc.
+        :param columns: Columns to calculate the returns for. For blocks, the names of the columns of the block.
+        :param normalize: If True, the returns are normalized with the geometric average.
+        :param dropna: If True, the rows with NaNs are dropped. Ignored for blocks.
+        :param return_full: If True, the full dataframe is returned. If False, only the columns with the returns. Ignored for blocks.
+        :param symbol: Name of the symbol index level or column.
+        """
+        columns = utils._get_columns(columns, ['high', 'low', 'open', 'close', 'volume'])
+        names = [f'{column}_return_1{freq}_lag_{lag}' for column in columns for lag in lags]
+
+        prices, values, position, remaining = Panel._values(prices, columns, symbol)
+        returns = _panel_returns(values, [1], normalize, position)[:, :, 0]
+        out = np.stack([_panel_shift(returns, lag, position, remaining) for lag in lags], axis=2)
+        return Panel._output(prices, [out], names, dropna, return_full)
+
+    @staticmethod
+    @instrumented
+    def forward_returns(prices: Union[pd.DataFrame, np.ndarray], lags: List[int], freq: str,
+                        columns: Optional[Union[str, List[str]]] = None, normalize: bool = True, dropna: bool = False,
+                        return_full: bool = True, symbol: str = 'symbol') -> Union[pd.DataFrame, np.ndarray]:
+        """
+        Calculates forward returns (targets) for all symbols of a panel at once, see `Panel.returns` for the panel layouts.
+
+        :param prices: Panel of prices to calculate the returns from.
+        :param lags: List of lags to calculate the returns for.
+        :param freq: Frequency of the prices label. Can be 'h' for hour, 'd' for day etc.
+        :param columns: Columns to calculate the returns for. For blocks, the names of the columns of the block.
+        :param normalize: If True, the returns are normalized with the geometric average.
+        :param dropna: If True, the rows with NaNs are dropped. Ignored for blocks.
+        :param return_full: If True, the full dataframe is returned. If False, only the columns with the targets. Ignored for blocks.
+        :param symbol: Name of the symbol index level or column.
+        """
+        columns = utils._get_columns(columns, ['high', 'low', 'open', 'close', 'volume'])
+        names = [f'{column}_target_{lag}{freq}' for column in columns for lag in lags]
+
+        prices, values, position, remaining = Panel._values(prices, columns, symbol)
+        returns = _panel_returns(values, lags, normalize, position)
+        out = np.stack([_panel_shift(returns[:, :, k], -lag, position, remaining) for k, lag in enumerate(lags)], axis=2)
+        return Panel._output(prices, [out], names, dropna, return_full)
+
+    @staticmethod
+    @instrumented
+    def momenta(prices: Union[pd.DataFrame, np.ndarray], periods: List[int], freq: str,
+                columns: Optional[Union[str, List[str]]] = None, normalize: bool = True, dropna: bool = False,
+                return_full: bool = True, symbol: str = 'symbol') -> Union[pd.DataFrame, np.ndarray]:
+        """
+        Calculates momenta for all symbols of a panel at once, see `Panel.returns` for the panel layouts.
+
+        :param prices: Panel of prices to calculate the momenta from.
+        :param periods: List of periods to calculate the momenta for.
+        :param freq: Frequency of the prices label. Can be 'h' for hour, 'd' for day etc.
+        :param columns: Columns to calculate the momenta for. For blocks, the names of the columns of the block.
+        :param normalize: If True, the returns are normalized with the geometric average.
+        :param dropna: If True, the rows with NaNs are dropped. Ignored for blocks.
+        :param return_full: If True, the full dataframe is returned. If False, only the columns with the momenta. Ignored for blocks.
+        :param symbol: Name of the symbol index level or column.
+        """
+        if 1 in periods:
+            raise ValueError("Period 1 is not allowed for momenta")
+        columns = utils._get_columns(columns, ['high', 'low', 'open', 'close', 'volume'])
+        names = [f'{column}_momentum_{period}{freq}' for column in columns for period in periods]
+
+        prices, values, position, _ = Panel._values(prices, columns, symbol)
+        returns = _panel_returns(values, [1] + list(periods), normalize, position)
+        parts = [returns[:, :, 1:] - returns[:, :, :1]]
+        # Calculate momentum 3-12, which is ordered after the other momenta as in `Momenta.momenta`
+        if (3 in periods) and (12 in periods):
+            parts.append(parts[0][:, :, [periods.index(12)]] - parts[0][:, :, [periods.index(3)]])
+            names += [f'{column}_momentum_3_12{freq}' for column in columns]
+        return Panel._output(prices, parts, names, dropna, return_full)
+
+    @staticmethod
+    @instrumented
+    def time_indicators(prices: pd.DataFrame, return_full: bool = True, symbol: str = 'symbol') -> pd.DataFrame:
+        """
+        Gets time indicators like month, day of week, etc. for all symbols of a long panel. The indicators
+        are looked up in the calendar table of `Seasonal.time_indicators` and broadcast to the rows of every symbol.
+
+        :param prices: Long panel of prices
+        :param return_full: return full dataframe or just the indicators
+        :param symbol: Name of the symbol index level or column.
+        """
+        prices = Panel._sort(prices, symbol)
+        features = _calendar_features(pd.DatetimeIndex(Panel._dates(prices, symbol)))
+        cols = ['month', 'day', 'day_of_week', 'week_of_year', 'quarter', 'year']
+        return utils._collect(prices, features, False, return_full, cols)
+
+    @staticmethod
+    def _sort(prices: pd.DataFrame, symbol: str) -> pd.DataFrame:
+        """ Sorts a long panel by symbol and date unless the rows of every symbol are already contiguous and ordered. """
+        symbols = Panel._symbols(prices, symbol)
+        codes, _ = pd.factorize(symbols)
+        dates = Panel._dates(prices, symbol).to_numpy()
+        same = codes[1:] == codes[:-1]
+        if np.all(codes[1:] >= codes[:-1]) and np.all(dates[1:][same] > dates[:-1][same]):
+            return prices
+        codes, _ = pd.factorize(symbols, sort=True)
+        return prices.iloc[np.lexsort((dates, codes))]
+
+    @staticmethod
+    def _symbols(prices: pd.DataFrame, symbol: str) -> pd.Index:
+        if isinstance(prices.index, pd.MultiIndex):
+            return prices.index.get_level_values(symbol)
+        return pd.Index(prices[symbol])
+
+    @staticmethod
+    def _dates(prices: pd.DataFrame, symbol: str) -> pd.Index:
+        if isinstance(prices.index, pd.MultiIndex):
+            return prices.index.droplevel(symbol)
+        return prices.index
+
+    @staticmethod
+    def _values(prices: Union[pd.DataFrame, np.ndarray], columns: List[str],
+                symbol: str) -> Tuple[Union[pd.DataFrame, np.ndarray], np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the sorted panel and its 2D values, with the position of every row within its symbol and
+        the number of rows after it. The columns of the values of a block are its (symbol, column) pairs.
+        """
+        if isinstance(prices, np.ndarray):
+            if prices.ndim != 3 or prices.shape[2] != len(columns):
+                raise ValueError("Blocks must have shape (dates, symbols, columns) with one column per name in `columns`")
+            n_dates, n_symbols, n_columns = prices.shape
+            values = prices.astype(float, copy=False).reshape(n_dates, n_symbols * n_columns)
+            position = np.arange(n_dates)
+            return prices, values, position, n_dates - position - 1
+
+        prices = Panel._sort(prices, symbol)
+        codes, _ = pd.factorize(Panel._symbols(prices, symbol))
+        position, remaining = _group_positions(codes)
+        return prices, prices[columns].to_numpy(dtype=float), position, remaining
+
+    @staticmethod
+    def _output(prices: Union[pd.DataFrame, np.ndarray], parts: List[np.ndarray], names: List[str],
+                dropna: bool, return_full: bool) -> Union[pd.DataFrame, np.ndarray]:
+        """
+        Joins the (rows, columns, features) parts of the results, ordered column first and feature second within
+        every part, into a (dates, symbols, features) block for blocks or into a frame for long panels.
+        """
+        n_rows = parts[0].shape[0]
+        n_symbols = prices.shape[1] if isinstance(prices, np.ndarray) else 1
+        values = np.concatenate([part.reshape(n_rows, n_symbols, -1) for part in parts], axis=2)
+        if isinstance(prices, np.ndarray):
+            return values
+
+        features = pd.DataFrame(values.reshape(n_rows, -1), index=prices.index, columns=names, copy=False)
+        return utils._collect(prices, features, dropna, return_full)
@@ -0,0 +1,174 @@
+import os
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import tzinfo
+from multiprocessing import shared_memory
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from xtrader.factors import precision
+from xtrader.factors import utils
+from xtrader.factors.panel import Panel
+from xtrader.factors.panel import _group_positions
+
+PANEL_METHODS = ['returns', 'lagged_returns', 'forward_returns', 'momenta', 'time_indicators']
+TECHNICAL_METHODS = ['rsi', 'bbands']
+
+
+def _attach(name: str, shape: Tuple[int, ...], dtype: str) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    """ Attaches to a shared memory block created by the parent process and wraps it in an array. """
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always registers the block with the resource tracker
+        shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _index(dates: np.ndarray, tz: Optional[tzinfo]) -> pd.DatetimeIndex:
+    """ Rebuilds the dates of the panel from their int64 nanoseconds, which are UTC for tz-aware panels. """
+    index = pd.DatetimeIndex(dates.view('datetime64[ns]'))
+    return index if tz is None else index.tz_localize('UTC').tz_convert(tz)
+
+
+def _compute(chunk: pd.DataFrame, method: str, kwargs: Dict[str, Any]) -> pd.DataFrame:
+    """ Computes the factor of a chunk of whole symbols, with the same functions as the serial path. """
+    if method in PANEL_METHODS:
+        return getattr(Panel, method)(chunk, return_full=False, **kwargs)
+
+    from xtrader.factors.technical import Technical
+
+    codes = chunk['symbol'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    stops = np.r_[starts[1:], len(codes)]
+    return pd.concat([getattr(Technical, method)(chunk.iloc[start:stop], return_full=False, **kwargs)
+                      for start, stop in zip(starts, stops)])
+
+
+def _run_chunk(task: Dict[str, Any]) -> None:
+    """ Computes the factor of the rows [start, stop) of the shared inputs and writes it into the shared output. """
+    blocks = []
+    try:
+        shm, values = _attach(*task['values'])
+        blocks.append(shm)
+        shm, codes = _attach(*task['codes'])
+        blocks.append(shm)
+        shm, dates = _attach(*task['dates'])
+        blocks.append(shm)
+        shm, out = _attach(*task['out'])
+        blocks.append(shm)
+
+        start, stop = task['rows']
+        chunk = pd.DataFrame(values[start:stop], columns=task['columns'], index=_index(dates[start:stop], task['tz']))
+        chunk['symbol'] = codes[start:stop]
+        with precision._local_policy(task['policy']):
+            out[start:stop] = _compute(chunk, task['method'], task['kwargs']).to_numpy(dtype=float)
+        del values, codes, dates, out, chunk
+    finally:
+        for shm in blocks:
+            shm.close()
+
+
+class ParallelFactors(object):
+
+    def __init__(self, n_workers: Optional[int] = None, chunk_size: Optional[int] = None):
+        """
+        Initializes the `ParallelFactors` class, which computes factors of a long panel (see `Panel.returns`) by
+        sharding whole symbols across a process pool. The OHLCV columns, symbols and dates are placed in shared
+        memory once and every worker writes its rows into a shared output block, so no DataFrames are pickled.
+        Every chunk is computed with the same functions as the serial path, so the result is identical to it.
+
+        :param n_workers: Number of worker processes. Defaults to the number of CPUs. With 1 worker the serial path is run.
+        :param chunk_size: Number of symbols per task. Defaults to spreading the symbols over four tasks per worker.
+        """
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+    def run(self, prices: pd.DataFrame, method: str, columns: Optional[List[str]] = None, symbol: str = 'symbol',
+            dropna: bool = False, return_full: bool = False, **kwargs) -> pd.DataFrame:
+        """
+        Computes a factor for all symbols of a long panel and gathers the results into one frame.
+
+        :param prices: Long panel of prices, indexed by (symbol, date) or with a symbol column and a date index.
+        :param method: One of 'returns', 'lagged_returns', 'forward_returns', 'momenta', 'time_indicators', 'rsi' or 'bbands'.
+        :param columns: Columns to calculate the factor for. Defaults to the OHLCV columns.
+        :param symbol: Name of the symbol index level or column.
+        :param dropna: If True, the rows with NaNs are dropped.
+        :param return_full: If True, the prices are returned with the factor joined. If False, only the factor.
+        :param kwargs: Parameters of the factor method, e.g. periods=[1, 2] and freq='h'.
+        """
+        if method not in PANEL_METHODS + TECHNICAL_METHODS:
+            raise ValueError(f"`method` must be one of {PANEL_METHODS + TECHNICAL_METHODS}")
+        columns = utils._get_columns(columns, ['high', 'low', 'open', 'close', 'volume'])
+        if method != 'time_indicators':
+            kwargs['columns'] = columns
+
+        prices = Panel._sort(prices, symbol)
+        codes, _ = pd.factorize(Panel._symbols(prices, symbol))
+        dates = pd.DatetimeIndex(Panel._dates(prices, symbol)).as_unit('ns')
+        tz = dates.tz
+        dates = dates.asi8
+        values = prices[columns].to_numpy(dtype=float)
+
+        # Chunks are computed at full precision, the active policy is applied to the gathered result. The full
+        # precision policy is set for this thread only and passed to the workers, other threads keep the active one.
+        policy = precision.PrecisionPolicy()
+        with precision._local_policy(policy):
+            # Names and dtypes of the features from a dry run on the first row
+            sample = pd.DataFrame(values[:1], columns=columns, index=_index(dates[:1], tz))
+            sample['symbol'] = codes[:1]
+            dtypes = _compute(sample, method, kwargs).dtypes
+            names = list(dtypes.index)
+
+            if self.n_workers == 1:
+                chunk = pd.DataFrame(values, columns=columns, index=_index(dates, tz))
+                chunk['symbol'] = codes
+                out = _compute(chunk, method, kwargs).to_numpy(dtype=float)
+            else:
+                out = self._run_pool(values, codes, dates, tz, columns, names, method, kwargs, policy)
+
+        features = pd.DataFrame(out, index=prices.index, columns=names, copy=False).astype(dtypes.to_dict())
+        return utils._collect(prices, features, dropna, return_full)
+
+    def _chunks(self, codes: np.ndarray) -> List[Tuple[int, int]]:
+        """ Splits the rows into ranges of whole symbols with `chunk_size` symbols each. """
+        position, _ = _group_positions(codes)
+        starts = np.flatnonzero(position == 0)
+        chunk_size = self.chunk_size or max(1, -(-len(starts) // (4 * self.n_workers)))
+        bounds = list(starts[::chunk_size]) + [len(codes)]
+        return [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+    def _run_pool(self, values: np.ndarray, codes: np.ndarray, dates: np.ndarray, tz: Optional[tzinfo],
+                  columns: List[str], names: List[str], method: str, kwargs: Dict[str, Any],
+                  policy: precision.PrecisionPolicy) -> np.ndarray:
+        """ Shares the inputs and the output through shared memory and runs the chunks on the process pool. """
+        blocks, shared = [], {}
+        try:
+            inputs = {'values': values, 'codes': codes.astype(np.int64), 'dates': dates}
+            specs = {key: (array.shape, array.dtype) for key, array in inputs.items()}
+            specs['out'] = ((len(values), len(names)), np.dtype(np.float64))
+            for key, (shape, dtype) in specs.items():
+                shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+                blocks.append(shm)
+                if key in inputs:
+                    view = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+                    view[:] = inputs[key]
+                    del view
+                shared[key] = (shm.name, shape, dtype.str)
+
+            tasks = [{**shared, 'rows': rows, 'columns': columns, 'tz': tz, 'method': method, 'kwargs': kwargs,
+                      'policy': policy} for rows in self._chunks(codes)]
+            with ProcessPoolExecutor(max_workers=self.n_workers) as pool:
+                list(pool.map(_run_chunk, tasks))
+
+            name, shape, dtype = shared['out']
+            return np.ndarray(shape, dtype=dtype, buffer=blocks[-1].buf).copy()
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
@@ -0,0 +1,272 @@
+import numpy as np
+import pandas as pd
+
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import List
+from typing import Tuple
+
+from pandas.tseries.holiday import AbstractHolidayCalendar
+
+from xtrader.factors import precision
+from xtrader.factors import technical
+from xtrader.factors import utils
+from xtrader.factors.returns import _returns_matrix
+from xtrader.factors.seasonal import Seasonal
+from xtrader.instrumentation import instrumented
+
+DEFAULT_COLUMNS = ['high', 'low', 'open', 'close', 'volume']
+DEFAULT_METHODS = {'returns': 'returns', 'momenta': 'momenta', 'seasonal': 'time_indicators'}
+
+
+class _Node(object):
+
+    def __init__(self, key: Tuple[Hashable, ...], names: List[str], deps: List[Tuple[Hashable, ...]],
+                 compute: Callable[[pd.DataFrame, List[np.ndarray], Any], None], frame: bool = False):
+        """
+        Initializes a node of the factor DAG.
+
+        :param key: Unique key of the node, used to remove duplicate intermediates.
+        :param names: Names of the columns the node produces.
+        :param deps: Keys of the nodes whose outputs are the inputs of this node.
+        :param compute: Function that receives the prices, the inputs and a (rows, len(names)) float array to write to.
+        :param frame: If True, `compute` receives the output frame instead and adds its columns to it in their own
+                      dtypes, e.g. the calendar features. Such nodes cannot be the inputs of other nodes.
+        """
+        self.key = key
+        self.names = names
+        self.deps = deps
+        self.compute = compute
+        self.frame = frame
+
+
+class FactorPipeline(object):
+
+    def __init__(self, spec: List[Dict[str, Any]]):
+        """
+        Initializes the `FactorPipeline` class from a declarative feature spec. Each entry of the spec is a dictionary with:
+
+            factor: Factor class or its name, one of `Returns`, `Momenta`, `Technical` or `Seasonal`.
+            method: Method of the factor class, e.g. 'lagged_returns' or 'rsi'. Defaults to the main method of the class.
+            params: Parameters of the method, e.g. {'periods': [3, 12], 'normalize': True}.
+            columns: Columns to calculate the factor for. Defaults to the OHLCV columns.
+            freq: Frequency label of the prices, e.g. 'h' for hour.
+
+        The spec is planned into a DAG whose shared intermediates, like the 1-period return, are computed only once.
+        Running the pipeline writes all the requested features into one preallocated block.
+
+        :param spec: List of feature specifications.
+        """
+        self.spec = spec
+        self._nodes: Dict[Tuple[Hashable, ...], _Node] = {}
+        self._outputs: List[Tuple[Hashable, ...]] = []
+        for entry in spec:
+            self._add_entry(entry)
+        self.plan = self._toposort()
+
+    @property
+    def feature_names(self) -> List[str]:
+        """ Returns the names of the features in the order they are returned. """
+        outputs = [self._nodes[key] for key in self._outputs]
+        return ([name for node in outputs if not node.frame for name in node.names] +
+                [name for node in outputs if node.frame for name in node.names])
+
+    @instrumented
+    def run(self, prices: pd.DataFrame, dropna: bool = False, return_full: bool = False) -> pd.DataFrame:
+        """
+        Runs the DAG once over the prices and returns the features. Numeric features are written into a single
+        preallocated float block, wrapped in the frame that is returned without a copy, and the nodes with their
+        own dtypes, like the calendar features, add their columns to that frame. Intermediates that were not
+        requested are released as soon as their last consumer has run.
+
+        :param prices: Prices to calculate the features from.
+        :param dropna: If True, the rows with NaNs are dropped.
+        :param return_full: If True, the prices are returned with the features joined. If False, only the features.
+        """
+        n_rows = len(prices)
+        outputs = set(self._outputs)
+        nodes = [self._nodes[key] for key in self._outputs if not self._nodes[key].frame]
+        names = [name for node in nodes for name in node.names]
+        # Float features are allocated in the dtype of the precision policy, but computed in float64
+        block = np.empty((n_rows, len(names)), dtype=precision.get_policy().float_dtype)
+        features = pd.DataFrame(block, index=prices.index, columns=names, copy=False)
+        slots, start = {}, 0
+        for node in nodes:
+            slots[node.key] = block[:, start:start + len(node.names)]
+            start += len(node.names)
+
+        # Count the consumers of every node so that intermediates can be released early
+        consumers = {key: 0 for key in self._nodes}
+        for node in self._nodes.values():
+            for dep in node.deps:
+                consumers[dep] += 1
+
+        results = {}
+        for key in self.plan:
+            node = self._nodes[key]
+            if node.frame:
+                continue
+            if key in outputs and slots[key].dtype == np.float64:
+                out = slots[key]
+            else:
+                # Intermediates, and outputs that are downcast, are computed at full precision
+                out = np.empty((n_rows, len(node.names)))
+            node.compute(prices, [results[dep][:, 0] for dep in node.deps], out)
+            if key in outputs and out is not slots[key]:
+                slots[key][:] = out
+            if consumers[key] > 0:
+                results[key] = out
+            for dep in node.deps:
+                consumers[dep] -= 1
+                if consumers[dep] == 0:
+                    del results[dep]
+        # The columns of the other dtypes are added once the float block is complete
+        for key in self._outputs:
+            if self._nodes[key].frame:
+                self._nodes[key].compute(prices, [], features)
+
+        return utils._collect(prices, features, dropna, return_full)
+
+    def _add(self, node: _Node, output: bool = False) -> Tuple[Hashable, ...]:
+        """ Adds a node to the DAG unless an identical one exists and returns its key. """
+        if node.key not in self._nodes:
+            self._nodes[node.key] = node
+        if output and node.key not in self._outputs:
+            taken = {name for key in self._outputs for name in self._nodes[key].names}
+            if taken.intersection(node.names):
+                raise ValueError(f"Features {sorted(taken.intersection(node.names))} are requested with different parameters")
+            self._outputs.append(node.key)
+        return node.key
+
+    def _add_entry(self, entry: Dict[str, Any]) -> None:
+        """ Expands an entry of the spec into nodes of the DAG. """
+        factor = entry['factor']
+        factor = (factor.__name__ if isinstance(factor, type) else factor).lower()
+        method = entry.get('method', DEFAULT_METHODS.get(factor))
+        params = dict(entry.get('params', {}))
+        columns = utils._get_columns(entry.get('columns'), DEFAULT_COLUMNS)
+        freq = entry.get('freq', '')
+        normalize = params.get('normalize', True)
+
+        if (factor, method) == ('returns', 'returns'):
+            for column in columns:
+                for period in params['periods']:
+                    self._add(self._return(column, period, freq, normalize), output=True)
+        elif (factor, method) == ('returns', 'lagged_returns'):
+            for column in columns:
+                returns = self._add(self._return(column, 1, freq, normalize))
+                for lag in params['lags']:
+                    self._add(_Node(('lag', returns, lag), [f'{column}_return_1{freq}_lag_{lag}'], [returns],
+                                    _shift(lag)), output=True)
+        elif (factor, method) == ('returns', 'forward_returns'):
+            for column in columns:
+                for lag in params['lags']:
+                    returns = self._add(self._return(column, lag, freq, normalize))
+                    self._add(_Node(('target', returns, lag), [f'{column}_target_{lag}{freq}'], [returns],
+                                    _shift(-lag)), output=True)
+        elif (factor, method) == ('momenta', 'momenta'):
+            periods = params['periods']
+            if 1 in periods:
+                raise ValueError("Period 1 is not allowed for momenta")
+            for column in columns:
+                returns_1 = self._add(self._return(column, 1, freq, normalize))
+                momenta = {}
+                for period in periods:
+                    returns = self._add(self._return(column, period, freq, normalize))
+                    momenta[period] = self._add(_Node(('momentum', returns, returns_1), [f'{column}_momentum_{period}{freq}'],
+                                                      [returns, returns_1], _subtract), output=True)
+                if (3 in periods) and (12 in periods):
+                    self._add(_Node(('momentum', momenta[12], momenta[3]), [f'{column}_momentum_3_12{freq}'],
+                                    [momenta[12], momenta[3]], _subtract), output=True)
+        elif (factor, method) == ('technical', 'rsi'):
+            time_period = params.get('time_period', 21)
+            for column in columns:
+                self._add(_Node(('rsi', column, time_period, freq), [f'{column}_rsi_{time_period}{freq}'], [],
+                                _rsi(column, time_period)), output=True)
+        elif (factor, method) == ('technical', 'bbands'):
+            time_period, stds_up, stds_down = params.get('time_period', 21), params.get('stds_up', 2), params.get('stds_down', 2)
+            for column in columns:
+                names = [f'{column}_bbands_{time_period}{freq}_{stds_up}_{stds_down}_{x}' for x in ['up', 'mid', 'low']]
+                self._add(_Node(('bbands', column, time_period, stds_up, stds_down, freq), names, [],
+                                _bbands(column, time_period, stds_up, stds_down)), output=True)
+        elif (factor, method) == ('seasonal', 'time_indicators'):
+            params = {name: params[name] for name in ['cyclical', 'flags', 'holidays'] if name in params}
+            holidays = params.get('holidays')
+            if holidays is not None and not isinstance(holidays, AbstractHolidayCalendar):
+                holidays = tuple(holidays)
+            # The features of the options, from the indicators of no dates
+            names = list(Seasonal.time_indicators(pd.DataFrame(index=pd.DatetimeIndex([])), return_full=False,
+                                                  **params).columns)
+            self._add(_Node(('calendar', params.get('cyclical', False), params.get('flags', False), holidays), names,
+                            [], _calendar(params), frame=True), output=True)
+        else:
+            raise ValueError(f"Unknown factor method: {factor}.{method}")
+
+    @staticmethod
+    def _return(column: str, period: int, freq: str, normalize: bool) -> _Node:
+        """ Returns the node of the `period` return of `column`. The 1-period return does not depend on `normalize`. """
+        normalize = normalize and period != 1
+        return _Node(('return', column, period, freq, normalize), [f'{column}_return_{period}{freq}'], [],
+                     _returns(column, period, normalize))
+
+    def _toposort(self) -> List[Tuple[Hashable, ...]]:
+        """ Orders the nodes of the DAG so that every node runs after its dependencies. """
+        order, visited = [], set()
+
+        def visit(key):
+            if key in visited:
+                return
+            visited.add(key)
+            for dep in self._nodes[key].deps:
+                visit(dep)
+            order.append(key)
+
+        for key in self._nodes:
+            visit(key)
+        return order
+
+
+def _returns(column: str, period: int, normalize: bool) -> Callable:
+    def compute(prices, inputs, out):
+        values = prices[column].to_numpy(dtype=float).reshape(-1, 1)
+        out[:] = _returns_matrix(values, [period], normalize)
+    return compute
+
+
+def _shift(lag: int) -> Callable:
+    def compute(prices, inputs, out):
+        values, out = inputs[0], out[:, 0]
+        k = min(abs(lag), len(values))
+        if lag >= 0:
+            out[:k] = np.nan
+            out[k:] = values[:len(values) - k]
+        else:
+            out[len(values) - k:] = np.nan
+            out[:len(values) - k] = values[k:]
+    return compute
+
+
+def _subtract(prices, inputs, out):
+    np.subtract(inputs[0], inputs[1], out=out[:, 0])
+
+
+def _rsi(column: str, time_period: int) -> Callable:
+    def compute(prices, inputs, out):
+        out[:, 0] = technical._rsi(prices[column].to_numpy(dtype=float), time_period)
+    return compute
+
+
+def _bbands(column: str, time_period: int, stds_up: int, stds_down: int) -> Callable:
+    def compute(prices, inputs, out):
+        bands = technical._bbands(prices[column].to_numpy(dtype=float), time_period, stds_up, stds_down)
+        for i, band in enumerate(bands):
+            out[:, i] = band
+    return compute
+
+
+def _calendar(params: Dict[str, Any]) -> Callable:
+    def compute(prices, inputs, out):
+        Seasonal.time_indicators(prices, return_full=False, out=out, **params)
+    return compute
@@ -0,0 +1,105 @@
+import threading
+import numpy as np
+import pandas as pd
+
+from contextlib import contextmanager
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Union
+
+# Pandas nullable counterparts of the numpy integer dtypes
+NULLABLE_INTS = {np.dtype(np.int8): 'Int8', np.dtype(np.int16): 'Int16',
+                 np.dtype(np.int32): 'Int32', np.dtype(np.int64): 'Int64'}
+
+
+def memory_footprint(frame: pd.DataFrame) -> Dict[str, Any]:
+    """ Returns the memory footprint of a dataframe in bytes, in total and per dtype, excluding the index. """
+    usage = frame.memory_usage(index=False, deep=False)
+    by_dtype = {}
+    for column, dtype in frame.dtypes.items():
+        by_dtype[str(dtype)] = by_dtype.get(str(dtype), 0) + int(usage[column])
+    return {'bytes': int(usage.sum()), 'by_dtype': by_dtype, 'columns': frame.shape[1], 'rows': frame.shape[0]}
+
+
+class PrecisionPolicy(object):
+
+    def __init__(self, float_dtype: Union[str, type] = np.float64, nullable_ints: bool = False, record: bool = False):
+        """
+        Initializes the `PrecisionPolicy` class, which sets the dtypes of the factor outputs. Factors are always
+        calculated in float64 and only their outputs are downcast, so cancellations like the differences of
+        the momenta happen at full precision.
+
+        :param float_dtype: Dtype of the float features, e.g. 'float32'.
+        :param nullable_ints: If True, integer features (e.g. calendar features) use the pandas nullable dtypes.
+        :param record: If True, the memory footprint of every output is recorded in `footprints`.
+        """
+        self.float_dtype = np.dtype(float_dtype)
+        self.nullable_ints = nullable_ints
+        self.record = record
+        self.footprints: List[Dict[str, Any]] = []
+
+    @property
+    def total_bytes(self) -> int:
+        """ Returns the total size of the outputs recorded under the policy. """
+        return sum(footprint['bytes'] for footprint in self.footprints)
+
+    def apply(self, features: pd.DataFrame) -> pd.DataFrame:
+        """ Casts a block of features to the dtypes of the policy and records its memory footprint. """
+        dtypes = {}
+        for column, dtype in features.dtypes.items():
+            if dtype == np.float64 and self.float_dtype != np.float64:
+                dtypes[column] = self.float_dtype
+            elif self.nullable_ints and dtype in NULLABLE_INTS:
+                dtypes[column] = NULLABLE_INTS[dtype]
+        if dtypes:
+            features = features.astype(dtypes)
+        if self.record:
+            self.footprints.append(memory_footprint(features))
+        return features
+
+
+_POLICY = PrecisionPolicy()
+# Policies of the calling thread that override the package-wide one, see `_local_policy`
+_LOCAL = threading.local()
+
+
+def get_policy() -> PrecisionPolicy:
+    """ Returns the active precision policy, the one of the calling thread if it set one. """
+    return getattr(_LOCAL, 'policy', None) or _POLICY
+
+
+def set_policy(policy: PrecisionPolicy) -> PrecisionPolicy:
+    """ Sets the package-wide precision policy and returns the previous one. """
+    global _POLICY
+    previous, _POLICY = _POLICY, policy
+    return previous
+
+
+@contextmanager
+def _local_policy(policy: PrecisionPolicy) -> Iterator[PrecisionPolicy]:
+    """ Sets the precision policy of the calling thread only, leaving the package-wide policy to other threads. """
+    previous = getattr(_LOCAL, 'policy', None)
+    _LOCAL.policy = policy
+    try:
+        yield policy
+    finally:
+        _LOCAL.policy = previous
+
+
+@contextmanager
+def precision(float_dtype: Union[str, type] = np.float32, nullable_ints: bool = False) -> Iterator[PrecisionPolicy]:
+    """
+    Sets the precision policy of all factor outputs within the context and records their memory footprints,
+    e.g. `with precision('float32') as policy: ...` and then `policy.total_bytes`.
+
+    :param float_dtype: Dtype of the float features.
+    :param nullable_ints: If True, integer features use the pandas nullable dtypes.
+    """
+    policy = PrecisionPolicy(float_dtype, nullable_ints, record=True)
+    previous = set_policy(policy)
+    try:
+        yield policy
+    finally:
+        set_policy(previous)
@@ -1,13 +1,130 @@
+import numpy as np
 import pandas as pd
 
 from typing import Optional
 from typing import List
 from typing import Union
 
+from xtrader.factors import precision
 from xtrader.factors import utils
+from xtrader.factors.cache import RETURNS_CACHE
+from xtrader.instrumentation import instrumented
 from xtrader.utils import TIME_SYMBOLS
 
 
+def _returns_matrix(values: np.ndarray, periods: List[int], normalize: bool = True,
+                    out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Calculates the returns of every column of `values` for every period in one batched computation.
+    The result has one column per (column, period) pair, ordered column first and period second,
+    and is bit-identical to `pd.Series.pct_change(period)`, optionally normalized with the geometric
+    average as `.add(1).pow(1 / period).sub(1)`.
+
+    :param values: 2D array of prices with shape (rows, columns).
+    :param periods: List of periods to calculate the returns for.
+    :param normalize: If True, the returns are normalized with the geometric average.
+    :param out: Optional float64 array of shape (rows, columns x periods) to write the returns into.
+    """
+    n_rows, n_columns = values.shape
+    if out is None:
+        out = np.empty((n_rows, n_columns * len(periods)), dtype=np.float64)
+    result = out
+    # Splitting the last axis is always a view, whatever the strides of `out`
+    out = out.reshape(n_rows, n_columns, len(periods))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for k, period in enumerate(periods):
+            if period <= 0:
+                raise ValueError("Periods must be positive integers")
+            head = min(period, n_rows)
+            out[:head, :, k] = np.nan
+            np.divide(values[period:], values[:-period], out=out[period:, :, k])
+            np.subtract(out[period:, :, k], 1, out=out[period:, :, k])
+            if normalize:
+                # (1 + r) ** (1 / period) - 1 from the rounded return r, as pandas does, not from the price ratio
+                np.add(out[period:, :, k], 1, out=out[period:, :, k])
+                np.power(out[period:, :, k], 1 / period, out=out[period:, :, k])
+                np.subtract(out[period:, :, k], 1, out=out[period:, :, k])
+    return result
+
+
+class LagMatrix(object):
+
+    def __init__(self, values: np.ndarray, index: pd.Index, columns: List[str], lags: List[int], freq: str):
+        """
+        Initializes the `LagMatrix` class, which holds the lagged 1-period returns of every column as an array of
+        shape (rows, columns, lags). The array is a strided sliding-window view of one padded block of returns,
+        so no lag is copied until its named column is materialized.
+
+        :param values: Lagged returns with shape (rows, columns, lags).
+        :param index: Index of the prices.
+        :param columns: Columns the returns were calculated for.
+        :param lags: Lags of the last axis of `values`.
+        :param freq: Frequency of the prices label. Can be 'h' for hour, 'd' for day etc.
+        """
+        self.values = values
+        self.index = index
+        self.columns = columns
+        self.lags = lags
+        self.freq = freq
+
+    @classmethod
+    def from_prices(cls, prices: pd.DataFrame, lags: List[int], freq: str, columns: List[str],
+                    normalize: bool = True) -> 'LagMatrix':
+        """ 
+        Builds the lag matrix of the 1-period returns of `columns`. Evenly spaced lags are a view of the padded
+        returns, other lags are gathered into one contiguous block.
+
+        :param prices: Prices to calculate the returns from.
+        :param lags: List of non-negative lags.
+        :param freq: Frequency of the prices label. Can be 'h' for hour, 'd' for day etc.
+        :param columns: List of columns to calculate the returns for.
+        :param normalize: If True, the returns are normalized with the geometric average.
+        """
+        if min(lags) < 0:
+            raise ValueError("Lags must be non-negative integers")
+        max_lag = max(lags)
+        # The returns are padded with `max_lag` NaNs, so that row t of the window ending at t + max_lag holds lags max_lag..0
+        padded = np.full((len(prices) + max_lag, len(columns)), np.nan, dtype=precision.get_policy().float_dtype)
+        for i, column in enumerate(columns):
+            padded[max_lag:, i] = RETURNS_CACHE.returns(prices, column, 1, freq, normalize).to_numpy()
+        windows = np.lib.stride_tricks.sliding_window_view(padded, max_lag + 1, axis=0)
+
+        steps = np.diff(lags)
+        if len(lags) == 1 or (np.all(steps == steps[0]) and steps[0] != 0):
+            # Lag k is at position max_lag - k of the window, so evenly spaced lags are a strided slice
+            first, step = max_lag - lags[0], -int(steps[0]) if len(lags) > 1 else 1
+            stop = first + step * len(lags)
+            values = windows[:, :, first:(stop if stop >= 0 else None):step]
+        else:
+            values = np.ascontiguousarray(windows[:, :, [max_lag - lag for lag in lags]])
+        return cls(values, prices.index, columns, list(lags), freq)
+
+    @property
+    def names(self) -> List[str]:
+        """ Returns the names of the lagged return columns, as in `Returns.lagged_returns`. """
+        return [f'{column}_return_1{self.freq}_lag_{lag}' for column in self.columns for lag in self.lags]
+
+    def __getitem__(self, name: str) -> pd.Series:
+        """ Returns one named lagged return column as a series backed by the view. """
+        i = self.names.index(name)
+        column, lag = divmod(i, len(self.lags))
+        return pd.Series(self.values[:, column, lag], index=self.index, name=name, copy=False)
+
+    def to_numpy(self) -> np.ndarray:
+        """ Returns the lagged returns as one contiguous (rows, columns x lags) block. """
+        return np.ascontiguousarray(self.values).reshape(len(self.index), -1)
+
+    def to_frame(self, names: Optional[List[str]] = None) -> pd.DataFrame:
+        """ 
+        Materializes the named lagged return columns, as returned by `Returns.lagged_returns` with `return_full=False`.
+
+        :param names: Names of the columns to materialize. If None, all columns are materialized.
+        """
+        if names is None:
+            return pd.DataFrame(self.to_numpy(), index=self.index, columns=self.names, copy=False)
+        return pd.DataFrame({name: self[name] for name in names}, index=self.index)
+
+
 class Returns(object):
 
     def __init__(self, prices: Optional[pd.DataFrame] = None):
@@ -18,8 +135,10 @@ class Returns(object):
         pass
 
     @staticmethod
+    @instrumented
     def returns(prices: pd.DataFrame, periods: List[int], freq: str, columns: Optional[Union[str, List[str]]] = None,
-                normalize: bool = True, dropna: bool = False, return_full: bool = True) -> pd.DataFrame:
+                normalize: bool = True, dropna: bool = False, return_full: bool = True,
+                out: Optional[Union[pd.DataFrame, np.ndarray]] = None) -> Union[pd.DataFrame, np.ndarray]:
         """ 
         Calculates lagged returns from prices. The returns are optionally normalized with the geometric average.
         
@@ -30,27 +149,24 @@ class Returns(object):
         :param normalize: If True, the returns are normalized with the geometric average.
         :param dropna: If True, the rows with NaNs are dropped.
         :param return_full: If True, the full dataframe is returned. If False, only the columns with the returns are returned.
+        :param out: Preallocated frame, or (rows, features) block in the order of `return_full=False`, to write the returns into instead.
         """
-        prices = prices.copy()
         # Set Columns to calculate the lagged returns for
         columns = utils._get_columns(columns, ['high', 'low', 'open', 'close', 'volume'])
+        names = [f'{column}_return_{period}{freq}' for column in columns for period in periods]
 
-        # For each column calculate the lagged returns for the lags that were specified
-        for column in columns:
-            for period in periods:
-                prices[f'{column}_return_{period}{freq}'] = prices[column].pct_change(period)
-                # Normalize returns
-                if normalize:
-                    prices[f'{column}_return_{period}{freq}'] = prices[f'{column}_return_{period}{freq}'].add(1).pow(1 / period).sub(1)
-
-        # Drop NaNs
-        if dropna:
-            prices.dropna(inplace=True)
-        # Return full dataframe or only the columns with the returns
-        if not return_full:
-            return prices[[f'{column}_return_{period}{freq}' for column in columns for period in periods]]
-        
-        return prices
+        # Write straight into a float64 block, other dtypes are filled after the math is done at full precision.
+        # Blocks with options they cannot honour go through `_collect`, which raises
+        direct = (isinstance(out, np.ndarray) and out.dtype == np.float64 and out.shape == (len(prices), len(names))
+                  and not dropna and not return_full)
+
+        # Calculate the returns for every (column, period) pair in one pass and wrap them in a single block
+        values = _returns_matrix(prices[columns].to_numpy(dtype=float), periods, normalize, out=out if direct else None)
+        if direct:
+            return out
+        returns = pd.DataFrame(values, index=prices.index, columns=names, copy=False)
+
+        return utils._collect(prices, returns, dropna, return_full, out=out)
 
     @staticmethod
     def hourly(prices: pd.DataFrame, periods: List[int], columns: Optional[List[str]] = None,
@@ -71,10 +187,15 @@ class Returns(object):
         return Returns.returns(prices, periods, TIME_SYMBOLS["month"], columns, normalize, dropna, return_full)
 
     @staticmethod
+    @instrumented
     def lagged_returns(prices: pd.DataFrame, lags: List[int], freq: str, columns: Optional[Union[str, List[str]]] = None,
-                       normalize: bool = True, dropna: bool = False, return_full: bool = True) -> pd.DataFrame:
+                       normalize: bool = True, dropna: bool = False, return_full: bool = True,
+                       as_matrix: bool = False, out: Optional[Union[pd.DataFrame, np.ndarray]] = None
+                       ) -> Union[pd.DataFrame, np.ndarray, 'LagMatrix']:
         """ 
         Calculates lagged returns from prices. The returns are optionally normalized with the geometric average.
+        The 1-period returns are only shared with the other factor calls inside `RETURNS_CACHE.scope()`, e.g.
+        `with RETURNS_CACHE.scope(): ...` around the `Returns` and `Momenta` calls on the same prices.
 
         :param prices: Prices to calculate the returns from.
         :param lags: List of lags to calculate the returns for.
@@ -83,27 +204,25 @@ class Returns(object):
         :param normalize: If True, the returns are normalized with the geometric average.
         :param dropna: If True, the rows with NaNs are dropped.
         :param return_full: If True, the full dataframe is returned. If False, only the columns with the returns are returned.
+        :param as_matrix: If True, a `LagMatrix` view of the lags is returned instead, and `dropna` and `return_full` are ignored.
+        :param out: Preallocated frame, or (rows, features) block in the order of `return_full=False`, to write the returns into instead.
         """
-        prices = prices.copy()
         # Set Columns to calculate the lagged returns for
         columns = utils._get_columns(columns, ['high', 'low', 'open', 'close', 'volume'])
+        if as_matrix:
+            return LagMatrix.from_prices(prices, lags, freq, columns, normalize)
 
         # For each column calculate the lagged returns for the lags that were specified
+        features = {}
         for column in columns:
-            if f"{column}_return_1{freq}" not in prices.columns:
-                prices[f'{column}_return_1{freq}'] = Returns.returns(prices, [1], freq,
-                                                                            [column], normalize, dropna, False)[f'{column}_return_1{freq}']
+            returns = RETURNS_CACHE.returns(prices, column, 1, freq, normalize)
+            if returns.name not in prices.columns:
+                features[returns.name] = returns
             for lag in lags:
-                prices[f'{column}_return_1{freq}_lag_{lag}'] = prices[f'{column}_return_1{freq}'].shift(lag)
-
-        # Drop NaNs
-        if dropna:
-            prices.dropna(inplace=True)
-        # Return full dataframe or only the columns with the returns
-        if not return_full:
-            return prices[[f'{column}_return_1{freq}_lag_{lag}' for column in columns for lag in lags]]
-        
-        return prices
+                features[f'{column}_return_1{freq}_lag_{lag}'] = returns.shift(lag)
+
+        cols = [f'{column}_return_1{freq}_lag_{lag}' for column in columns for lag in lags]
+        return utils._collect(prices, features, dropna, return_full, cols, out=out)
 
     @staticmethod
     def hourly_lagged(prices: pd.DataFrame, lags: List[int], columns: Optional[List[str]] = None,
@@ -124,10 +243,13 @@ class Returns(object):
         return Returns.lagged_returns(prices, lags, TIME_SYMBOLS["month"], columns, normalize, dropna, return_full)
 
     @staticmethod
+    @instrumented
     def forward_returns(prices: pd.DataFrame, lags: List[int],  freq: str, columns: Optional[Union[str, List[str]]] = None,
-                        normalize: bool = True, dropna: bool = False, return_full: bool = True) -> pd.DataFrame:
+                        normalize: bool = True, dropna: bool = False, return_full: bool = True,
+                        out: Optional[Union[pd.DataFrame, np.ndarray]] = None) -> Union[pd.DataFrame, np.ndarray]:
         """ 
         Calculates forward returns from prices. The returns are optionally normalized with the geometric average.
+        The returns are only shared with the other factor calls inside `RETURNS_CACHE.scope()`.
         
         :param prices: Prices to calculate the returns from.
         :param lags: List of lags to calculate the returns for.
@@ -136,28 +258,24 @@ class Returns(object):
         :param normalize: If True, the returns are normalized with the geometric average.
         :param dropna: If True, the rows with NaNs are dropped.
         :param return_full: If True, the full dataframe is returned. If False, only the columns with the returns are returned.
+        :param out: Preallocated frame, or (rows, features) block in the order of `return_full=False`, to write the returns into instead.
         """
-        prices = prices.copy()
         # Set Columns to calculate the lagged returns for
         columns = utils._get_columns(columns, ['high', 'low', 'open', 'close', 'volume'])
 
-        # For each column calculate the lagged returns for the lags that were specified
+        # For each column calculate the forward returns for the lags that were specified
+        features, targets = {}, {}
         for column in columns:
             for lag in lags:
-                if f"{column}_return_{lag}{freq}" not in prices.columns:
-                    prices[f'{column}_return_{lag}{freq}'] = Returns.returns(prices, [lag], freq, [column], normalize, dropna, False)[f'{column}_return_{lag}{freq}']
-            
-            for lag in lags:
-                prices[f"{column}_target_{lag}{freq}"] = prices[f"{column}_return_{lag}{freq}"].shift(-lag)
-
-        # Drop NaNs
-        if dropna:
-            prices.dropna(inplace=True)
-        # Return full dataframe or only the columns with the returns
-        if not return_full:
-            return prices[[f'{column}_target_{lag}{freq}' for column in columns for lag in lags]]
-        
-        return prices
+                returns = RETURNS_CACHE.returns(prices, column, lag, freq, normalize)
+                if returns.name not in prices.columns:
+                    features[returns.name] = returns
+                targets[f'{column}_target_{lag}{freq}'] = returns.shift(-lag)
+            features.update(targets)
+            targets.clear()
+
+        cols = [f'{column}_target_{lag}{freq}' for column in columns for lag in lags]
+        return utils._collect(prices, features, dropna, return_full, cols, out=out)
 
     @staticmethod
     def hourly_forward(prices: pd.DataFrame, lags: List[int], columns: Optional[List[str]] = None,
@@ -1,5 +1,74 @@
+import numpy as np
 import pandas as pd
+
+from functools import lru_cache
+from typing import Dict
+from typing import Iterable
 from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from pandas.tseries.holiday import AbstractHolidayCalendar
+
+from xtrader.factors import utils
+from xtrader.instrumentation import instrumented
+
+# Calendar indicators and their compact dtypes
+CALENDAR_DTYPES = {'day': np.int8, 'day_of_week': np.int8, 'week_of_year': np.int8,
+                   'month': np.int8, 'quarter': np.int8, 'year': np.int16}
+# Periods of the cyclical encodings
+CYCLICAL_PERIODS = {'hour': 24, 'day_of_week': 7, 'day': 31, 'week_of_year': 53, 'month': 12}
+# Day of a NaT in days since the epoch
+NAT_DAY = np.iinfo(np.int64).min
+
+
+@lru_cache(maxsize=32)
+def _calendar_table(first_day: int, last_day: int) -> Dict[str, np.ndarray]:
+    """
+    Returns the calendar indicators of every day between `first_day` and `last_day`, given in days since the epoch.
+    Tables are cached, so the indicators of a date range are only calculated once.
+    """
+    dates = pd.DatetimeIndex(np.arange(first_day, last_day + 1).astype('datetime64[D]'))
+    table = {'day': dates.day, 'day_of_week': dates.dayofweek, 'week_of_year': dates.isocalendar().week.to_numpy(),
+             'month': dates.month, 'quarter': dates.quarter, 'year': dates.year}
+    table = {name: np.asarray(values).astype(CALENDAR_DTYPES[name]) for name, values in table.items()}
+    for values in table.values():
+        values.setflags(write=False)
+    return table
+
+
+def _days(index: pd.DatetimeIndex) -> np.ndarray:
+    """ Returns the local calendar day of every timestamp in days since the epoch, NaT included as int64 min. """
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.values.astype('datetime64[D]').astype(np.int64)
+
+
+def _day_range(days: np.ndarray) -> Tuple[int, int]:
+    """ Returns the first and last days of timestamps, leaving the NaTs out. """
+    valid = days[days != NAT_DAY]
+    return (int(valid.min()), int(valid.max())) if len(valid) else (0, -1)
+
+
+def _lookup(values: np.ndarray, days: np.ndarray, first_day: int) -> np.ndarray:
+    """
+    Broadcasts the indicators of a calendar table to the timestamps. The indicators of NaTs are missing, as
+    pandas returns them, so a table of integers is returned as float64 with NaNs when there are NaTs.
+    """
+    missing = days == NAT_DAY
+    if not missing.any():
+        return values[days - first_day]
+    looked_up = np.full(len(days), np.nan)
+    looked_up[~missing] = values[days[~missing] - first_day]
+    return looked_up
+
+
+def _calendar_features(index: pd.DatetimeIndex) -> Dict[str, np.ndarray]:
+    """ Looks up the calendar indicators of every timestamp in the cached calendar table of its date range. """
+    days = _days(index)
+    first_day, last_day = _day_range(days)
+    table = _calendar_table(first_day, last_day)
+    return {name: _lookup(values, days, first_day) for name, values in table.items()}
 
 
 class Seasonal(object):
@@ -9,21 +78,53 @@ class Seasonal(object):
         self.prices = prices.copy()
 
     @staticmethod
-    def time_indicators(prices: pd.DataFrame, return_full: bool = True):
-        """ 
-        Gets time indicators like month, day of week, etc. 
+    @instrumented
+    def time_indicators(prices: pd.DataFrame, return_full: bool = True, cyclical: bool = False, flags: bool = False,
+                        holidays: Optional[Union[Iterable, AbstractHolidayCalendar]] = None,
+                        out: Optional[Union[pd.DataFrame, np.ndarray]] = None) -> Union[pd.DataFrame, np.ndarray]:
+        """
+        Gets time indicators like month, day of week, etc. The indicators are looked up in a cached calendar
+        table with one row per day and broadcast to the timestamps, and are stored as int8 (int16 for the year),
+        or as float64 with NaNs in the rows of NaTs when the index has NaTs.
+
         :param prices: prices dataframe
         :param return_full: return full dataframe or just the indicators
+        :param cyclical: add sin/cos encodings of the hour, day of week, day, week of year and month as float32
+        :param flags: add int8 flags for weekends, month/quarter starts and ends, holidays and sessions (business days)
+        :param holidays: holiday dates, or a pandas holiday calendar, used by the holiday and session flags
+        :param out: preallocated frame, or (rows, features) block in the order of `return_full=False`, to write to
         """
-        prices = prices.copy()
-        prices['day'] = prices.index.day
-        prices['day_of_week'] = prices.index.dayofweek
-        prices['week_of_year'] = prices.index.isocalendar().week  
-        prices['month'] = prices.index.month  
-        prices['quarter'] = prices.index.quarter
-        prices['year'] = prices.index.year
-        
-        if return_full:
-            return prices
-        else:
-            return prices[['month', 'day', 'day_of_week', 'week_of_year', 'quarter', 'year']]
\ No newline at end of file
+        index = pd.DatetimeIndex(prices.index)
+        features = _calendar_features(index)
+        cols = ['month', 'day', 'day_of_week', 'week_of_year', 'quarter', 'year']
+
+        if cyclical:
+            values = dict(features, hour=np.asarray(index.hour))
+            for name, period in CYCLICAL_PERIODS.items():
+                angle = 2 * np.pi * values[name].astype(np.float32) / period
+                features[f'{name}_sin'] = np.sin(angle)
+                features[f'{name}_cos'] = np.cos(angle)
+                cols += [f'{name}_sin', f'{name}_cos']
+
+        if flags or holidays is not None:
+            days = _days(index)
+            first_day, last_day = _day_range(days)
+            table = _calendar_table(first_day, last_day)
+            table_days = np.arange(first_day, last_day + 1)
+            dates = table_days.astype('datetime64[D]')
+            if isinstance(holidays, AbstractHolidayCalendar):
+                holidays = holidays.holidays(start=pd.Timestamp(dates[0]), end=pd.Timestamp(dates[-1])) if len(dates) else []
+            holiday_days = _days(pd.DatetimeIndex([] if holidays is None else list(holidays)))
+            is_holiday = np.isin(table_days, holiday_days)
+            is_weekend = table['day_of_week'] >= 5
+            month_start = dates.astype('datetime64[M]').astype('datetime64[D]')
+            month_end = (dates.astype('datetime64[M]') + 1).astype('datetime64[D]') - 1
+            flag_table = {'is_weekend': is_weekend, 'is_holiday': is_holiday, 'is_session': ~is_weekend & ~is_holiday,
+                          'is_month_start': dates == month_start, 'is_month_end': dates == month_end,
+                          'is_quarter_start': (dates == month_start) & (table['month'] % 3 == 1),
+                          'is_quarter_end': (dates == month_end) & (table['month'] % 3 == 0)}
+            for name, values in flag_table.items():
+                features[name] = _lookup(values.astype(np.int8), days, first_day)
+                cols.append(name)
+
+        return utils._collect(prices, features, False, return_full, cols, out=out)
@@ -0,0 +1,284 @@
+import numpy as np
+import pandas as pd
+
+from abc import ABC
+from abc import abstractmethod
+from typing import Dict
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Union
+
+from xtrader.factors import utils
+
+
+class _RingBuffer(object):
+
+    def __init__(self, capacity: int, width: int):
+        """
+        Initializes a ring buffer that keeps the last `capacity` rows of `width` values.
+
+        :param capacity: Number of rows kept.
+        :param width: Number of values per row.
+        """
+        self.capacity = capacity
+        self.count = 0
+        self._data = np.full((capacity, width), np.nan)
+        self._head = -1
+
+    def append(self, values: np.ndarray) -> None:
+        """ Appends a row, overwriting the oldest one when the buffer is full. """
+        self._head = (self._head + 1) % self.capacity
+        self._data[self._head] = values
+        self.count += 1
+
+    def get(self, lag: int) -> np.ndarray:
+        """ Returns the row appended `lag` steps ago, with `lag=0` the latest one, or NaNs if it is not available. """
+        if lag >= min(self.count, self.capacity):
+            return np.full(self._data.shape[1], np.nan)
+        return self._data[(self._head - lag) % self.capacity]
+
+
+class _StreamingFactor(ABC):
+
+    def __init__(self, columns: Optional[Union[str, List[str]]] = None):
+        """ Initializes the columns of a streaming factor. """
+        self.columns = utils._get_columns(columns, ['high', 'low', 'open', 'close', 'volume'])
+
+    def update(self, bar: Mapping[str, float]) -> Dict[str, float]:
+        """
+        Takes a new bar and returns the values of the factor at that bar.
+
+        :param bar: New bar, e.g. a dictionary or a row of the prices dataframe.
+        """
+        return self._update(np.array([bar[column] for column in self.columns], dtype=float))
+
+    def warmup(self, prices: pd.DataFrame) -> pd.DataFrame:
+        """
+        Feeds the history of the prices through the calculator and returns the factor values of every row,
+        after which `update` continues from the last bar of the history.
+
+        :param prices: Prices to warm up the calculator with.
+        """
+        values = prices[self.columns].to_numpy(dtype=float)
+        return pd.DataFrame([self._update(row) for row in values], index=prices.index)
+
+    @abstractmethod
+    def _update(self, values: np.ndarray) -> Dict[str, float]:
+        """ Takes the values of the columns of a new bar and returns the values of the factor at that bar. """
+
+
+class StreamingReturns(_StreamingFactor):
+
+    def __init__(self, periods: List[int], freq: str, columns: Optional[Union[str, List[str]]] = None,
+                 normalize: bool = True):
+        """
+        Initializes the `StreamingReturns` class, which calculates the same returns as `Returns.returns`
+        one bar at a time in O(columns x periods), keeping only the last max(periods) + 1 bars.
+
+        :param periods: List of periods to calculate the returns for.
+        :param freq: Frequency of the prices label. Can be 'h' for hour, 'd' for day etc.
+        :param columns: List of columns to calculate the returns for. If None, the returns are calculated for all columns.
+        :param normalize: If True, the returns are normalized with the geometric average.
+        """
+        super().__init__(columns)
+        self.periods = periods
+        self.freq = freq
+        self.normalize = normalize
+        self._buffer = _RingBuffer(max(periods) + 1, len(self.columns))
+
+    def _update(self, values: np.ndarray) -> Dict[str, float]:
+        self._buffer.append(values)
+        features = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for i, column in enumerate(self.columns):
+                for period in self.periods:
+                    returns = values[i] / self._buffer.get(period)[i] - 1
+                    if self.normalize:
+                        # Normalized from the rounded return, as in `Returns.returns`
+                        returns = np.power(returns + 1, 1 / period) - 1
+                    features[f'{column}_return_{period}{self.freq}'] = returns
+        return features
+
+
+class StreamingLaggedReturns(_StreamingFactor):
+
+    def __init__(self, lags: List[int], freq: str, columns: Optional[Union[str, List[str]]] = None,
+                 normalize: bool = True):
+        """
+        Initializes the `StreamingLaggedReturns` class, which calculates the same lagged returns as
+        `Returns.lagged_returns` one bar at a time, keeping the last max(lags) + 1 1-period returns.
+
+        :param lags: List of lags to calculate the returns for.
+        :param freq: Frequency of the prices label. Can be 'h' for hour, 'd' for day etc.
+        :param columns: List of columns to calculate the returns for. If None, the returns are calculated for all columns.
+        :param normalize: If True, the returns are normalized with the geometric average.
+        """
+        super().__init__(columns)
+        self.lags = lags
+        self.freq = freq
+        self._returns = StreamingReturns([1], freq, self.columns, normalize)
+        self._buffer = _RingBuffer(max(lags) + 1, len(self.columns))
+
+    def _update(self, values: np.ndarray) -> Dict[str, float]:
+        returns = self._returns._update(values)
+        self._buffer.append([returns[f'{column}_return_1{self.freq}'] for column in self.columns])
+        return {f'{column}_return_1{self.freq}_lag_{lag}': self._buffer.get(lag)[i]
+                for i, column in enumerate(self.columns) for lag in self.lags}
+
+
+class StreamingMomenta(_StreamingFactor):
+
+    def __init__(self, periods: List[int], freq: str, columns: Optional[Union[str, List[str]]] = None,
+                 normalize: bool = True):
+        """
+        Initializes the `StreamingMomenta` class, which calculates the same momenta as `Momenta.momenta`
+        one bar at a time, keeping only the last max(periods) + 1 bars.
+
+        :param periods: List of periods to calculate the momenta for.
+        :param freq: Frequency of the prices label. Can be 'h' for hour, 'd' for day etc.
+        :param columns: List of columns to calculate the momenta for. If None, the momenta are calculated for all columns.
+        :param normalize: If True, the returns are normalized with the geometric average.
+        """
+        super().__init__(columns)
+        if 1 in periods:
+            raise ValueError("Period 1 is not allowed for momenta")
+        self.periods = periods
+        self.freq = freq
+        self._returns = StreamingReturns([1] + list(periods), freq, self.columns, normalize)
+
+    def _update(self, values: np.ndarray) -> Dict[str, float]:
+        returns = self._returns._update(values)
+        features = {}
+        for column in self.columns:
+            returns_1 = returns[f'{column}_return_1{self.freq}']
+            for period in self.periods:
+                features[f'{column}_momentum_{period}{self.freq}'] = returns[f'{column}_return_{period}{self.freq}'] - returns_1
+        # Calculate momentum 3-12
+        if (3 in self.periods) and (12 in self.periods):
+            for column in self.columns:
+                features[f'{column}_momentum_3_12{self.freq}'] = (features[f'{column}_momentum_12{self.freq}'] -
+                                                                  features[f'{column}_momentum_3{self.freq}'])
+        return features
+
+
+class StreamingRSI(_StreamingFactor):
+
+    def __init__(self, time_period: int = 21, freq: str = '', columns: Optional[Union[str, List[str]]] = None):
+        """
+        Initializes the `StreamingRSI` class, which calculates the same RSI as `Technical.rsi` one bar at a time
+        in O(1). The average gains and losses are seeded with their mean over the first `time_period` changes
+        and then updated with Wilder smoothing, as in TA-Lib. As in TA-Lib, the leading NaNs of every column are
+        skipped and a later NaN makes the RSI of the column NaN from then on.
+
+        :param time_period: period for RSI
+        :param freq: Frequency of the prices label. Can be 'h' for hour, 'd' for day etc.
+        :param columns: columns to calculate RSI for
+        """
+        super().__init__(columns)
+        self.time_period = time_period
+        self.freq = freq
+        self._count = np.zeros(len(self.columns), dtype=int)
+        self._previous = np.full(len(self.columns), np.nan)
+        self._gain = np.zeros(len(self.columns))
+        self._loss = np.zeros(len(self.columns))
+
+    def _update(self, values: np.ndarray) -> Dict[str, float]:
+        change = values - self._previous
+        self._previous = values
+        # Bars are counted from the first finite one of every column
+        self._count += (self._count > 0) | ~np.isnan(values)
+
+        gain = np.where(np.isnan(change), np.nan, np.where(change > 0, change, 0))
+        loss = np.where(np.isnan(change), np.nan, np.where(change < 0, -change, 0))
+        # Seed the averages with the mean of the first `time_period` changes
+        seeding = (1 < self._count) & (self._count <= self.time_period + 1)
+        self._gain = np.where(seeding, self._gain + gain, self._gain)
+        self._loss = np.where(seeding, self._loss + loss, self._loss)
+        seeded = self._count == self.time_period + 1
+        self._gain = np.where(seeded, self._gain / self.time_period, self._gain)
+        self._loss = np.where(seeded, self._loss / self.time_period, self._loss)
+        # Wilder smoothing
+        smoothing = self._count > self.time_period + 1
+        self._gain = np.where(smoothing, (self._gain * (self.time_period - 1) + gain) / self.time_period, self._gain)
+        self._loss = np.where(smoothing, (self._loss * (self.time_period - 1) + loss) / self.time_period, self._loss)
+
+        rsi = np.where(self._count > self.time_period, self._rsi(), np.nan)
+        return {f'{column}_rsi_{self.time_period}{self.freq}': rsi[i] for i, column in enumerate(self.columns)}
+
+    def _rsi(self) -> np.ndarray:
+        total = self._gain + self._loss
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(np.abs(total) < 1e-8, 0, 100 * (self._gain / total))
+
+
+class StreamingBBands(_StreamingFactor):
+
+    def __init__(self, time_period: int = 21, stds_up: int = 2, stds_down: int = 2, freq: str = '',
+                 columns: Optional[Union[str, List[str]]] = None):
+        """
+        Initializes the `StreamingBBands` class, which calculates the same Bollinger Bands as `Technical.bbands`
+        one bar at a time in amortized O(1), keeping the running sums of the last `time_period` bars. The sums are
+        of the differences to a shift close to the mean of the window, so that the variance does not lose its
+        precision at high price levels. The bands are NaN while a NaN is in the window, as in the batch
+        calculation, and the NaNs are counted rather than added to the sums, so the bands are available again as
+        soon as the NaN leaves the window.
+
+        :param time_period: period for BBANDS
+        :param stds_up: number of standard deviations for upper band
+        :param stds_down: number of standard deviations for lower band
+        :param freq: Frequency of the prices label. Can be 'h' for hour, 'd' for day etc.
+        :param columns: columns to calculate BBANDS for
+        """
+        super().__init__(columns)
+        self.time_period = time_period
+        self.stds_up = stds_up
+        self.stds_down = stds_down
+        self.freq = freq
+        self._buffer = _RingBuffer(time_period, len(self.columns))
+        self._sum = np.zeros(len(self.columns))
+        self._sum_squares = np.zeros(len(self.columns))
+        self._nans = np.zeros(len(self.columns), dtype=int)
+        self._shift = np.full(len(self.columns), np.nan)
+
+    def _update(self, values: np.ndarray) -> Dict[str, float]:
+        if self._buffer.count >= self.time_period:
+            oldest = self._buffer.get(self.time_period - 1)
+            self._nans -= np.isnan(oldest)
+            oldest = np.where(np.isnan(oldest), 0, oldest - self._shift)
+            self._sum -= oldest
+            self._sum_squares -= oldest * oldest
+        self._buffer.append(values)
+        self._nans += np.isnan(values)
+        # Nothing was added to the sums of the columns without a shift yet
+        self._shift = np.where(np.isnan(self._shift), values, self._shift)
+        values = np.where(np.isnan(values), 0, values - self._shift)
+        self._sum += values
+        self._sum_squares += values * values
+        if self._buffer.count % self.time_period == 0:
+            # Recompute the running sums once per window, around the mean of the window, so that rounding errors
+            # do not accumulate and the shift follows the prices
+            data = self._buffer._data
+            finite = ~np.isnan(data)
+            with np.errstate(invalid='ignore'):
+                mean = np.where(finite, data, 0).sum(axis=0) / finite.sum(axis=0)
+            self._shift = mean
+            window = np.where(finite, data - self._shift, 0)
+            self._sum = window.sum(axis=0)
+            self._sum_squares = (window * window).sum(axis=0)
+
+        mid = np.full(len(self.columns), np.nan)
+        std = np.full(len(self.columns), np.nan)
+        if self._buffer.count >= self.time_period:
+            offset = self._sum / self.time_period
+            mid = np.where(self._nans > 0, np.nan, self._shift + offset)
+            variance = self._sum_squares / self.time_period - offset * offset
+            std = np.where(self._nans > 0, np.nan, np.sqrt(np.where(variance > 0, variance, 0)))
+
+        features = {}
+        for i, column in enumerate(self.columns):
+            name = f'{column}_bbands_{self.time_period}{self.freq}_{self.stds_up}_{self.stds_down}'
+            features[f'{name}_up'] = mid[i] + self.stds_up * std[i]
+            features[f'{name}_mid'] = mid[i]
+            features[f'{name}_low'] = mid[i] - self.stds_down * std[i]
+        return features
@@ -1,13 +1,34 @@
-from talib import RSI
-from talib import BBANDS
-
+import numpy as np
 import pandas as pd
 
 from typing import Optional
 from typing import Union
 from typing import List
 
+from xtrader.factors import kernels
 from xtrader.factors import utils
+from xtrader.instrumentation import instrumented
+
+try:
+    from talib import RSI
+    from talib import BBANDS
+except ImportError:
+    # TA-Lib is optional, the NumPy kernels are used without it
+    RSI, BBANDS = None, None
+
+
+def _rsi(values: np.ndarray, time_period: int) -> np.ndarray:
+    """ Calculates the RSI with TA-Lib if it is installed, otherwise with the NumPy kernel. """
+    if RSI is not None:
+        return RSI(values, timeperiod=time_period)
+    return kernels.rsi(values, [time_period])[time_period]
+
+
+def _bbands(values: np.ndarray, time_period: int, stds_up: float, stds_down: float) -> List[np.ndarray]:
+    """ Calculates the Bollinger Bands with TA-Lib if it is installed, otherwise with the NumPy kernel. """
+    if BBANDS is not None:
+        return BBANDS(values, timeperiod=time_period, nbdevup=stds_up, nbdevdn=stds_down)
+    return kernels.bbands(values, [time_period], [stds_up], [stds_down])[(time_period, stds_up, stds_down)]
 
 
 class Technical(object):
@@ -18,8 +39,10 @@ class Technical(object):
         self.prices = prices
 
     @staticmethod
+    @instrumented
     def bbands(prices: pd.DataFrame, time_period: int = 21, stds_up: int = 2, stds_down: int = 2, freq: str = '', 
-               columns: Optional[Union[str, List[str]]] = None, dropna: bool = False, return_full: bool = True) -> pd.DataFrame:
+               columns: Optional[Union[str, List[str]]] = None, dropna: bool = False, return_full: bool = True,
+               out: Optional[Union[pd.DataFrame, np.ndarray]] = None) -> Union[pd.DataFrame, np.ndarray]:
         """ 
         Bollinger Bands consist of a simple moving average (SMA) surrounded by bands two rolling
         standard deviations below and above the SMA. It was introduced for the visualization of
@@ -30,35 +53,29 @@ class Technical(object):
         :param time_period: period for RSI
         :parram stds_up: number of standard deviations for upper band
         :parram stds_down: number of standard deviations for lower band
-        :param columns: columns to calculate BBANDS for
+        :param columns: columns to calculate BBANDS for, each from its own values
         :param dropna: drop NaNs
         :param return_full: return full dataframe or only BBANDS columns
+        :param out: preallocated frame, or (rows, features) block in the order of `return_full=False`, to write to
         """
-        prices = prices.copy()
         # Set the columns to calculate BBANDS for
         columns = utils._get_columns(columns, ['open', 'high', 'low', 'close', 'volume'])
 
+        features = {}
         for column in columns:
-            up, mid, low = BBANDS(prices['close'], timeperiod=time_period, nbdevup=stds_up, nbdevdn=stds_down)
-            prices[f'{column}_bbands_{time_period}{freq}_{stds_up}_{stds_down}_up'] = up
-            prices[f'{column}_bbands_{time_period}{freq}_{stds_up}_{stds_down}_mid'] = mid
-            prices[f'{column}_bbands_{time_period}{freq}_{stds_up}_{stds_down}_low'] = low
-
-        # Drop NaNs
-        if dropna:
-            prices.dropna(inplace=True)
-
-        if not return_full:
-            cols = [f'{column}_bbands_{time_period}{freq}_{stds_up}_{stds_down}_{x}' 
-                    for column in columns for x in ['up', 'mid', 'low']]
-            return prices[cols]
-        
-        return prices
+            up, mid, low = _bbands(prices[column].to_numpy(dtype=float), time_period, stds_up, stds_down)
+            features[f'{column}_bbands_{time_period}{freq}_{stds_up}_{stds_down}_up'] = up
+            features[f'{column}_bbands_{time_period}{freq}_{stds_up}_{stds_down}_mid'] = mid
+            features[f'{column}_bbands_{time_period}{freq}_{stds_up}_{stds_down}_low'] = low
+
+        return utils._collect(prices, features, dropna, return_full, out=out)
     
     @staticmethod
+    @instrumented
     def rsi(prices: pd.DataFrame, time_period: int = 21, freq: str = '',
             columns: Optional[Union[str, List[str]]] = None, dropna: bool = False,
-            return_full: bool = True) -> pd.DataFrame:
+            return_full: bool = True,
+            out: Optional[Union[pd.DataFrame, np.ndarray]] = None) -> Union[pd.DataFrame, np.ndarray]:
         """ 
         RSI (Relative strencth Index) compares the magnitude of recent price changes
         across stocks to identify stocks as overbought or oversold. A high RSI (usually above 70)
@@ -66,22 +83,74 @@ class Technical(object):
 
         :param prices: prices dataframe
         :param time_period: period for RSI
+        :param columns: columns to calculate RSI for, each from its own values
+        :param dropna: drop NaNs
+        :param return_full: return full dataframe or only RSI columns
+        :param out: preallocated frame, or (rows, features) block in the order of `return_full=False`, to write to
+        """
+        # Set the columns to calculate RSI for
+        columns = utils._get_columns(columns, ['open', 'high', 'low', 'close', 'volume'])
+
+        features = {}
+        for column in columns:
+            features[f'{column}_rsi_{time_period}{freq}'] = _rsi(prices[column].to_numpy(dtype=float), time_period)
+
+        return utils._collect(prices, features, dropna, return_full, out=out)
+
+    @staticmethod
+    @instrumented
+    def bbands_grid(prices: pd.DataFrame, time_periods: List[int], stds_up: List[float], stds_down: List[float],
+                    freq: str = '', columns: Optional[Union[str, List[str]]] = None, dropna: bool = False,
+                    return_full: bool = True,
+                    out: Optional[Union[pd.DataFrame, np.ndarray]] = None) -> Union[pd.DataFrame, np.ndarray]:
+        """ 
+        Calculates the Bollinger Bands for every combination of `time_periods`, `stds_up` and `stds_down` in one pass
+        over each column with the NumPy kernel. The columns are named as in `Technical.bbands`.
+
+        :param prices: prices dataframe
+        :param time_periods: periods for BBANDS
+        :param stds_up: numbers of standard deviations for upper band
+        :param stds_down: numbers of standard deviations for lower band
+        :param columns: columns to calculate BBANDS for
+        :param dropna: drop NaNs
+        :param return_full: return full dataframe or only BBANDS columns
+        :param out: preallocated frame, or (rows, features) block in the order of `return_full=False`, to write to
         """
-        prices = prices.copy()
+        # Set the columns to calculate BBANDS for
+        columns = utils._get_columns(columns, ['open', 'high', 'low', 'close', 'volume'])
 
+        features = {}
+        for column in columns:
+            bands = kernels.bbands(prices[column].to_numpy(dtype=float), time_periods, stds_up, stds_down)
+            for (time_period, up, down), values in bands.items():
+                for x, band in zip(['up', 'mid', 'low'], values):
+                    features[f'{column}_bbands_{time_period}{freq}_{up}_{down}_{x}'] = band
+
+        return utils._collect(prices, features, dropna, return_full, out=out)
+
+    @staticmethod
+    @instrumented
+    def rsi_grid(prices: pd.DataFrame, time_periods: List[int], freq: str = '',
+                 columns: Optional[Union[str, List[str]]] = None, dropna: bool = False,
+                 return_full: bool = True,
+                 out: Optional[Union[pd.DataFrame, np.ndarray]] = None) -> Union[pd.DataFrame, np.ndarray]:
+        """ 
+        Calculates the RSI for every period of `time_periods` in one pass over each column with the NumPy kernel.
+        The columns are named as in `Technical.rsi`.
+
+        :param prices: prices dataframe
+        :param time_periods: periods for RSI
+        :param columns: columns to calculate RSI for
+        :param dropna: drop NaNs
+        :param return_full: return full dataframe or only RSI columns
+        :param out: preallocated frame, or (rows, features) block in the order of `return_full=False`, to write to
+        """
         # Set the columns to calculate RSI for
         columns = utils._get_columns(columns, ['open', 'high', 'low', 'close', 'volume'])
 
+        features = {}
         for column in columns:
-            prices[f'{column}_rsi_{time_period}{freq}'] = RSI(prices['close'], timeperiod=time_period)
-
-        # Drop NaNs
-        if dropna:
-            prices.dropna(inplace=True)
-        
-        if not return_full:
-            cols = [f'{column}_rsi_{time_period}{freq}' for column in columns]
-            return prices[cols]
-        
-        return prices
+            for time_period, values in kernels.rsi(prices[column].to_numpy(dtype=float), time_periods).items():
+                features[f'{column}_rsi_{time_period}{freq}'] = values
 
+        return utils._collect(prices, features, dropna, return_full, out=out)
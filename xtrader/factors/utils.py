@@ -1,4 +1,8 @@
-from typing import List, Optional
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Union
+
+from xtrader.factors import precision
 
 def _get_columns(columns: Optional[List[str]], default: List[str]) -> List[str]:
     """ Returns the columns to calculate the lagged returns for """
@@ -8,4 +12,88 @@ def _get_columns(columns: Optional[List[str]], default: List[str]) -> List[str]:
         if isinstance(columns, str):
             columns = [columns]
         return [col.lower() for col in columns]
-    
\ No newline at end of file
+    
+
+def _join_columns(prices: pd.DataFrame, block: pd.DataFrame) -> pd.DataFrame:
+    """ 
+    Joins a block of factor columns to the prices in a single allocation. Columns of the block
+    that already exist in the prices replace them in place, the rest are appended in order.
+    """
+    overlap = block.columns.intersection(prices.columns)
+    if overlap.empty:
+        return pd.concat([prices, block], axis=1)
+    
+    joined = pd.concat([prices, block.drop(columns=overlap)], axis=1)
+    joined[overlap] = block[overlap]
+    return joined
+
+
+def _check_out(out: Optional[Union[pd.DataFrame, np.ndarray]], dropna: bool, return_full: bool) -> None:
+    """ Raises for the options that a preallocated output cannot honour. """
+    if out is None:
+        return
+    if dropna:
+        raise ValueError("`dropna` cannot be used with a preallocated `out`")
+    if return_full and isinstance(out, np.ndarray):
+        raise ValueError("An array `out` only holds the features, use `return_full=False` or a frame `out`")
+
+
+def _collect(prices: pd.DataFrame, features: Union[pd.DataFrame, Dict[str, Any]], dropna: bool, return_full: bool,
+             columns: Optional[List[str]] = None,
+             out: Optional[Union[pd.DataFrame, np.ndarray]] = None) -> Union[pd.DataFrame, np.ndarray]:
+    """ 
+    Builds the output of a factor function from its feature columns without copying the prices more than once.
+
+    :param prices: Prices the features were calculated from.
+    :param features: Block of features, or feature columns in the order they are added to the prices.
+    :param dropna: If True, the rows with NaNs in the prices or in the features are dropped.
+    :param return_full: If True, the prices are returned with the features joined. If False, only the features.
+    :param columns: Features to return when `return_full` is False. If None, all features are returned.
+    :param out: Preallocated frame or (rows, features) block to write the features into instead, see `_write`.
+    """
+    if out is not None:
+        _check_out(out, dropna, return_full)
+        return _write(out, features, columns if columns is not None else list(features), len(prices))
+
+    if isinstance(features, pd.DataFrame):
+        block = features
+    else:
+        block = pd.DataFrame(features, index=prices.index)
+    # Drop NaNs, looking at the full dataframe regardless of what is returned
+    if dropna:
+        rows = block.notna().all(axis=1) & prices.notna().all(axis=1)
+        prices, block = prices[rows], block[rows]
+    if not return_full and columns is not None:
+        block = block[columns]
+    # Cast the returned features to the dtypes of the active precision policy
+    block = precision.get_policy().apply(block)
+    # Return full dataframe or only the requested features
+    if return_full:
+        return _join_columns(prices, block)
+    return block
+
+
+def _write(out: Union[pd.DataFrame, np.ndarray], features: Union[pd.DataFrame, Dict[str, Any]],
+           names: List[str], n_rows: int) -> Union[pd.DataFrame, np.ndarray]:
+    """ 
+    Writes features into a preallocated output and returns it. A frame gets one column per feature, added or
+    overwritten by name. A 2D array gets the features in the order of `names`, i.e. the order they are returned
+    with `return_full=False`, and keeps its own dtype. Frames follow the active precision policy.
+    """
+    if len(out) != n_rows:
+        raise ValueError(f"`out` has {len(out)} rows, but the prices have {n_rows}")
+
+    if isinstance(out, np.ndarray):
+        if out.ndim != 2 or out.shape[1] != len(names):
+            raise ValueError(f"`out` must have shape ({n_rows}, {len(names)})")
+        for j, name in enumerate(names):
+            out[:, j] = features[name]
+        return out
+
+    float_dtype = precision.get_policy().float_dtype
+    for name in names:
+        values = np.asarray(features[name])
+        if values.dtype == np.float64:
+            values = values.astype(float_dtype, copy=False)
+        out[name] = values
+    return out
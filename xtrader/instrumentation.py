@@ -0,0 +1,183 @@
+import json
+import time
+import inspect
+import functools
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+from contextlib import contextmanager
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+# Statistics kept per factor and parameter set
+STATISTICS = ['calls', 'seconds', 'rows', 'output_bytes', 'peak_bytes', 'cache_hits', 'cache_misses']
+# Highest traced peak of every running traced call, of all the instrumentations, as the peak is reset at the
+# start of each nested call
+_PEAKS: List[int] = []
+
+
+def _nbytes(value: Any) -> int:
+    """ Returns the size of the arrays and frames in a factor output, without the objects they hold. """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=False, deep=False).sum())
+    if isinstance(value, (pd.Series, np.ndarray)):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sum(_nbytes(item) for item in value.values())
+    if hasattr(value, 'to_numpy'):
+        return int(value.to_numpy().nbytes)
+    return 0
+
+
+def _rows(arguments: Dict[str, Any], result: Any) -> int:
+    """ Returns the number of rows processed, i.e. of the first frame or array argument, or else of the output. """
+    for value in arguments.values():
+        if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+            return len(value)
+    if isinstance(result, (pd.DataFrame, pd.Series, np.ndarray)):
+        return len(result)
+    if isinstance(result, dict):
+        return max([len(item) for item in result.values() if hasattr(item, '__len__')], default=0)
+    return 0
+
+
+def _params(arguments: Dict[str, Any]) -> str:
+    """ Describes the parameters of a call, leaving out the frames and arrays. """
+    return ', '.join(f'{name}={value!r}' for name, value in arguments.items()
+                     if not isinstance(value, (pd.DataFrame, pd.Series, pd.Index, np.ndarray)))
+
+
+def _cache_counts() -> Tuple[int, int]:
+    """ Returns the hits and misses of the shared returns cache. """
+    from xtrader.factors.cache import RETURNS_CACHE
+
+    return RETURNS_CACHE.hits, RETURNS_CACHE.misses
+
+
+class Instrumentation(object):
+
+    def __init__(self, memory: bool = False):
+        """
+        Initializes the `Instrumentation` class, which collects the statistics of the instrumented factor
+        functions and loaders per function and parameter set: number of calls, wall time, rows processed,
+        bytes of the outputs, peak bytes allocated and hits/misses of the returns cache. The statistics of
+        a call include those of the instrumented calls it makes, e.g. `load_prices` includes `_read_prices`.
+
+        :param memory: If True, the peak bytes allocated by every call are traced with `tracemalloc`, which slows the calls down.
+        """
+        self.memory = memory
+        self.records: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def _call(self, name: str, signature: inspect.Signature, function: Callable, args: tuple, kwargs: dict) -> Any:
+        """ Calls an instrumented function and records its statistics. """
+        try:
+            arguments = signature.bind_partial(*args, **kwargs).arguments
+        except TypeError:
+            arguments = {}
+        hits, misses = _cache_counts()
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if _PEAKS:
+                _PEAKS[-1] = max(_PEAKS[-1], peak)
+            tracemalloc.reset_peak()
+            _PEAKS.append(current)
+
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            peak_bytes = 0
+            if self.memory:
+                peak = max(_PEAKS.pop(), tracemalloc.get_traced_memory()[1])
+                peak_bytes = peak - current
+                if _PEAKS:
+                    _PEAKS[-1] = max(_PEAKS[-1], peak)
+
+        new_hits, new_misses = _cache_counts()
+        record = self.records.setdefault((name, _params(arguments)), dict.fromkeys(STATISTICS, 0))
+        record['calls'] += 1
+        record['seconds'] += seconds
+        record['rows'] += _rows(arguments, result)
+        record['output_bytes'] += _nbytes(result)
+        record['peak_bytes'] = max(record['peak_bytes'], peak_bytes)
+        # The cache is reset by `clear`, in which case the counts of the call are unknown
+        record['cache_hits'] += max(new_hits - hits, 0)
+        record['cache_misses'] += max(new_misses - misses, 0)
+        return result
+
+    def summary(self) -> pd.DataFrame:
+        """ Returns the statistics as a frame with one row per function and parameter set, slowest first. """
+        rows = [{'function': name, 'params': params, **record} for (name, params), record in self.records.items()]
+        summary = pd.DataFrame(rows, columns=['function', 'params'] + STATISTICS)
+        summary['seconds_per_call'] = summary['seconds'] / summary['calls'].clip(lower=1)
+        summary['rows_per_second'] = summary['rows'] / summary['seconds'].where(summary['seconds'] > 0)
+        return summary.sort_values('seconds', ascending=False, ignore_index=True)
+
+    def report(self) -> str:
+        """ Returns the statistics as a text table. """
+        if not self.records:
+            return 'No instrumented calls'
+        return self.summary().to_string(index=False)
+
+    def to_json(self, path: Optional[str] = None) -> str:
+        """
+        Returns the statistics as JSON and writes them to `path` if given.
+
+        :param path: Path of the JSON file.
+        """
+        records = [{'function': name, 'params': params, **record} for (name, params), record in self.records.items()]
+        dump = json.dumps({'memory': self.memory, 'records': records}, indent=2)
+        if path is not None:
+            with open(path, 'w') as file:
+                file.write(dump)
+        return dump
+
+
+_INSTRUMENTATION: Optional[Instrumentation] = None
+
+
+def instrumented(function: Callable) -> Callable:
+    """
+    Decorates a factor function or loader so that its calls are recorded while an `instrument` context is
+    active. Otherwise the function is called directly, at the cost of a single check.
+    """
+    name = function.__qualname__
+    signature = inspect.signature(function)
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if _INSTRUMENTATION is None:
+            return function(*args, **kwargs)
+        return _INSTRUMENTATION._call(name, signature, function, args, kwargs)
+
+    return wrapper
+
+
+@contextmanager
+def instrument(memory: bool = False) -> Iterator[Instrumentation]:
+    """
+    Records the calls of the instrumented factor functions and loaders within the context,
+    e.g. `with instrument() as stats: ...` and then `print(stats.report())` or `stats.to_json(path)`.
+    A nested context records the calls made within it instead of the outer one, but the peaks of the running
+    calls of the outer one still include the memory allocated within it.
+
+    :param memory: If True, the peak bytes allocated by every call are traced with `tracemalloc`.
+    """
+    global _INSTRUMENTATION
+    previous, _INSTRUMENTATION = _INSTRUMENTATION, Instrumentation(memory)
+    tracing = memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    try:
+        yield _INSTRUMENTATION
+    finally:
+        if tracing:
+            tracemalloc.stop()
+        _INSTRUMENTATION = previous